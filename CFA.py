@@ -1,10 +1,13 @@
 # === awareness_cfa.py ===
 
+import os
 import pandas as pd
 from semopy import Model, semplot, calc_stats
-
-# Load your dataset (replace with your actual file path)
-df = pd.read_csv("/Users/bazam/Library/CloudStorage/OneDrive-Personal/Documentos/academia/#PhD PLASTIC UNDERGROUND/7.1_excel/survey/data/database_awareness_questions.csv")
+from polychoric import polychoric_matrix
+from survey_store import CACHE_DIR_NAME
+from awareness_tests import groups as awareness_groups
+from cfa_batch import cfa_batch, spec_from_groups, specs_from_efa
+from cfa_invariance import measurement_invariance, survey_groups
 
 # Define the CFA model (Lavaan-like syntax)
 model_desc = """
@@ -13,17 +16,78 @@ F2_water_contamination =~ Q9 + Q10
 F3_mps_knowledge =~ Q14 + Q19 + Q21
 """
 
-# Create and fit the CFA model
-model = Model(model_desc)
-model.fit(df)
+use_polychoric = True
+run_invariance = True  # configural/metric/scalar/strict across countries (see cfa_invariance.py)
+invariance_question = "Q33"  # country of residency in the transformed survey
+
+# Alternative structures compared against model_desc (groups as in chronbach_alpha_awareness.py)
+alpha_groups = {
+    "Water_contamination": ["Q8", "Q9", "Q10"],
+    "MPs_awareness": ["Q14", "Q19", "Q21", "Q24", "Q29"],
+}
+candidate_specs = [
+    {"name": "Hand_3F", "desc": model_desc, "parent": None},
+    spec_from_groups("Awareness_tests_3F", awareness_groups),
+    spec_from_groups("Alpha_groups_2F", alpha_groups, parent="Awareness_tests_3F"),
+    spec_from_groups("One_factor", {"Awareness": sum(alpha_groups.values(), [])}, parent="Alpha_groups_2F"),
+]
+efa_loadings_csv = "EFA_factor_loadings.csv"
+
+if __name__ == "__main__":
+    # Load your dataset (replace with your actual file path)
+    data_csv = "/Users/bazam/Library/CloudStorage/OneDrive-Personal/Documentos/academia/#PhD PLASTIC UNDERGROUND/7.1_excel/survey/data/database_awareness_questions.csv"
+    df = pd.read_csv(data_csv)
+
+    # Create and fit the CFA model
+    model = Model(model_desc)
+    if use_polychoric:
+        # binary/ordinal items: fit the polychoric correlations (cached by data hash)
+        items = model.vars["observed"]
+        poly = polychoric_matrix(df[items], cache_dir=os.path.join(os.path.dirname(data_csv), CACHE_DIR_NAME))
+        model.fit(cov=poly, n_samples=poly.attrs["n_obs"])
+    else:
+        model.fit(df)
+
+    # Get fit statistics
+    stats = calc_stats(model)
+    print(stats)
+
+    # Compare the candidate structures (EFA-derived ones too, once EFA.py has run)
+    specs = list(candidate_specs)
+    if os.path.exists(efa_loadings_csv):
+        specs += specs_from_efa(pd.read_csv(efa_loadings_csv, index_col=0))
+    used = {v for s in specs for v in Model(s["desc"]).vars["observed"]}
+    items = [c for c in df.columns if c in used]
+    if use_polychoric:
+        poly = polychoric_matrix(df[items], cache_dir=os.path.join(os.path.dirname(data_csv), CACHE_DIR_NAME))
+        comparison, estimates = cfa_batch(specs, cov=poly, n_samples=poly.attrs["n_obs"])
+    else:
+        comparison, estimates = cfa_batch(specs, data=df[items])
+    print("\n=== CFA model comparison ===\n")
+    print(comparison.drop(columns="Error").round(3).to_string(index=False))
+    failed = comparison[comparison["Error"] != ""]
+    if len(failed):
+        print(f"\n⚠️  {len(failed)} model(s) failed:")
+        print(failed[["Model", "Error"]].to_string(index=False))
+    comparison.to_csv("CFA_model_comparison.csv", index=False)
+    print("✅ Comparison saved to 'CFA_model_comparison.csv'")
 
-# Get fit statistics
-stats = calc_stats(model)
-print(stats)
+    # Measurement invariance of model_desc across countries (raw items, normal-theory ML)
+    if run_invariance:
+        survey_csv = "/Users/bazam/Library/CloudStorage/OneDrive-Personal/Documentos/academia/#PhD PLASTIC UNDERGROUND/7.1_excel/survey_transformed_3.csv"
+        by_group = df.set_index("respondent_id")
+        by_group[invariance_question] = survey_groups(survey_csv, invariance_question)
+        invariance = measurement_invariance(by_group, invariance_question, model_desc)
+        print(f"\n=== Measurement invariance across {invariance_question} ===")
+        for g, reason in invariance["excluded"].items():
+            print(f"⚠️  {g} left out: {reason}")
+        print(invariance["fit"].round(3).to_string(index=False))
+        invariance["fit"].to_csv("CFA_invariance.csv", index=False)
+        print("✅ Invariance table saved to 'CFA_invariance.csv'")
 
-# Optional: visualize the model (requires graphviz installed)
-try:
-    semplot(model, "awareness_cfa_model.png")
-    print("Model diagram saved as 'awareness_cfa_model.png'")
-except:
-    print("Graphviz not installed — skipping visualization.")
+    # Optional: visualize the model (requires graphviz installed)
+    try:
+        semplot(model, "awareness_cfa_model.png")
+        print("Model diagram saved as 'awareness_cfa_model.png'")
+    except:
+        print("Graphviz not installed — skipping visualization.")
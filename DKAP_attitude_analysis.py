@@ -18,6 +18,7 @@ from reportlab.lib.pagesizes import A4
 from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, Image
 from reportlab.lib.styles import getSampleStyleSheet
 from reportlab.lib import utils
+from survey_store import load_table
 
 # ------------------------------------------------------------
 # Paths
@@ -32,9 +33,9 @@ awareness_file = base_in + "database_awareness_questions_norm.csv"
 # ------------------------------------------------------------
 # Load data
 # ------------------------------------------------------------
-att = pd.read_csv(attitude_file)
-know = pd.read_csv(knowledge_file)
-aware = pd.read_csv(awareness_file)
+att = load_table(attitude_file)
+know = load_table(knowledge_file)
+aware = load_table(awareness_file)
 
 # ------------------------------------------------------------
 # Compute composite scores
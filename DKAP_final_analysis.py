@@ -19,6 +19,7 @@ from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, Image
 from reportlab.lib.styles import getSampleStyleSheet
 from reportlab.lib.pagesizes import A4
 from reportlab.lib.units import inch
+from survey_store import load_table
 
 # === PATH SETUP ===
 base_data = "/Users/bazam/Library/CloudStorage/OneDrive-Personal/Documentos/academia/#PhD PLASTIC UNDERGROUND/7.1_excel/survey/data/"
@@ -31,9 +32,9 @@ attitude_file = base_data + "database_attitude_norm.csv"
 demographics_file = base_data + "demographics_clean.csv" 
 
 # === LOAD DATASETS ===
-df_k = pd.read_csv(knowledge_file)
-df_a = pd.read_csv(awareness_file)
-df_p = pd.read_csv(attitude_file)
+df_k = load_table(knowledge_file)
+df_a = load_table(awareness_file)
+df_p = load_table(attitude_file)
 
 # === COMPUTE COMPOSITES ===
 df_a["awareness_composite"] = df_a.drop(columns=["respondent_id"]).mean(axis=1)
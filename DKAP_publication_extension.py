@@ -7,6 +7,7 @@ import seaborn as sns
 from statsmodels.formula.api import ols
 from fpdf import FPDF
 from PyPDF2 import PdfMerger
+from survey_store import load_table
 
 # ------------------------------------------------
 # PATH CONFIGURATION
@@ -17,9 +18,9 @@ base_out = "/Users/bazam/dev/GW-MP-survey-analysis/"
 # ------------------------------------------------
 # DATA IMPORT
 # ------------------------------------------------
-knowledge = pd.read_csv(base_in + "knowledge_score_clusters.csv")
-awareness = pd.read_csv(base_in + "database_awareness_questions_norm.csv")
-attitude = pd.read_csv(base_in + "database_attitude_norm.csv")
+knowledge = load_table(base_in + "knowledge_score_clusters.csv")
+awareness = load_table(base_in + "database_awareness_questions_norm.csv")
+attitude = load_table(base_in + "database_attitude_norm.csv")
 
 # Merge composites
 awareness["awareness_composite"] = awareness.drop(columns=["respondent_id"]).mean(axis=1)
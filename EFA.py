@@ -1,68 +1,91 @@
 # === awareness_efa.py ===
-import pandas as pd
-import matplotlib.pyplot as plt
-from factor_analyzer import FactorAnalyzer, calculate_kmo, calculate_bartlett_sphericity
+import numpy as np
+from efa_session import EFASession
+from parallel_analysis import parallel_analysis, plot_parallel_analysis
+from efa_sweep import efa_sweep, save_sweep
+from efa_bootstrap import efa_bootstrap
+from survey_store import load_table
 import warnings
 warnings.filterwarnings("ignore", category=FutureWarning)
 
 
 
-# === 1. Load your dataset ===
-file_path = "/Users/bazam/Library/CloudStorage/OneDrive-Personal/Documentos/academia/#PhD PLASTIC UNDERGROUND/7.1_excel/survey/data/database_awareness_questions.csv"  # replace with your actual path
-df = pd.read_csv(file_path)
+correlation = "polychoric"  # or "pearson"
+rotation = "varimax"  # or an oblique one, e.g. "oblimin" / "promax"
+run_sweep = False  # also fit every factor count x method x rotation (see efa_sweep.py); slow
+run_bootstrap = False  # bootstrap CIs and cross-loading frequencies for the chosen model; slow
+n_boot = 500  # bootstrap resamples (polychoric refits are the expensive part)
 
-# Drop respondent_id if present
-if 'respondent_id' in df.columns:
-    df = df.drop(columns=['respondent_id'])
+if __name__ == "__main__":
+    # === 1. Load your dataset ===
+    file_path = "/Users/bazam/Library/CloudStorage/OneDrive-Personal/Documentos/academia/#PhD PLASTIC UNDERGROUND/7.1_excel/survey/data/database_awareness_questions.csv"  # replace with your actual path
 
-# === 2. Adequacy checks ===
-# KMO (sampling adequacy)
-kmo_all, kmo_model = calculate_kmo(df)
-print(f"Kaiser-Meyer-Olkin (KMO) overall measure: {kmo_model:.3f}")
-if kmo_model < 0.6:
-    print("⚠️  KMO is below 0.6 — sample may not be adequate for factor analysis.\n")
+    # Correlation matrix (and its inverse/determinant) computed once, cached next to
+    # this script and reused until the CSV changes; respondent_id is dropped.
+    # The items are binary/ordinal, so factor their polychoric (tetrachoric) correlations
+    session = EFASession.from_csv(file_path, cache_path="EFA_session.json", correlation=correlation)
 
-# Bartlett’s test of sphericity
-chi_square_value, p_value = calculate_bartlett_sphericity(df)
-print(f"Bartlett’s test chi-square: {chi_square_value:.2f}, p-value: {p_value:.4f}")
-if p_value >= 0.05:
-    print("⚠️  Data may not be suitable for factor analysis (non-significant test).")
+    # === 2. Adequacy checks ===
+    # KMO (sampling adequacy)
+    kmo_all, kmo_model = session.kmo()
+    print(f"Kaiser-Meyer-Olkin (KMO) overall measure: {kmo_model:.3f}")
+    if kmo_model < 0.6:
+        print("⚠️  KMO is below 0.6 — sample may not be adequate for factor analysis.\n")
 
-# === 3. Check eigenvalues to decide number of factors ===
-fa = FactorAnalyzer(rotation=None)
-fa.fit(df)
+    # Bartlett’s test of sphericity
+    chi_square_value, p_value = session.bartlett()
+    print(f"Bartlett’s test chi-square: {chi_square_value:.2f}, p-value: {p_value:.4f}")
+    if p_value >= 0.05:
+        print("⚠️  Data may not be suitable for factor analysis (non-significant test).")
 
-eigen_values, vectors = fa.get_eigenvalues()
+    # === 3. Decide number of factors with Horn's parallel analysis ===
+    # The random reference eigenvalues are those of Pearson correlations, so compare them with
+    # the Pearson matrix of the items: polychoric eigenvalues are larger and would retain too many
+    if correlation == "pearson":
+        pa_corr, pa_n = session.corr, session.n_obs
+    else:
+        complete = load_table(file_path)[session.columns].dropna()
+        pa_corr, pa_n = np.corrcoef(complete.to_numpy(dtype=np.float64), rowvar=False), len(complete)
+    pa = parallel_analysis(pa_corr, pa_n, n_iter=1000, percentile=95)
+    print("\n=== Parallel Analysis (observed vs random eigenvalues) ===")
+    print(pa["table"].round(3).to_string(index=False))
 
-# Scree plot
-plt.figure(figsize=(6, 4))
-plt.plot(range(1, len(eigen_values)+1), eigen_values, "o-", linewidth=2)
-plt.title("Scree Plot (Eigenvalues by Factor Number)")
-plt.xlabel("Factor Number")
-plt.ylabel("Eigenvalue")
-plt.axhline(1, color='red', linestyle='--')
-plt.tight_layout()
-plt.show()
+    # Scree plot with the random-data threshold, saved instead of shown
+    plot_parallel_analysis(pa, "EFA_parallel_analysis.png", title="Scree Plot")
 
-# === 4. Extract 3 factors (adjust if scree plot suggests otherwise) ===
-n_factors = 3
-fa = FactorAnalyzer(n_factors=n_factors, rotation="varimax")
-fa.fit(df)
+    # === 4. Extract the retained factors ===
+    n_factors = max(pa["n_factors"], 1)
+    print(f"\nParallel analysis retains {pa['n_factors']} factor(s); extracting {n_factors}.")
 
-# === 5. Factor loadings and variance explained ===
-loadings = pd.DataFrame(fa.loadings_, index=df.columns, columns=[f"Factor{i+1}" for i in range(n_factors)])
-print("\n=== Factor Loadings ===")
-print(loadings.round(3))
+    # === 5. Factor loadings and variance explained ===
+    loadings = session.loadings(n_factors=n_factors, rotation=rotation)
+    print("\n=== Factor Loadings ===")
+    print(loadings.round(3))
 
-# Variance explained
-variance = pd.DataFrame({
-    "Factor": [f"Factor{i+1}" for i in range(n_factors)],
-    "Variance Explained (%)": fa.get_factor_variance()[1] * 100
-})
-print("\n=== Variance Explained by Each Factor ===")
-print(variance.round(2))
+    # Variance explained
+    variance = session.variance(n_factors=n_factors, rotation=rotation)[["Factor", "Variance Explained (%)"]]
+    print("\n=== Variance Explained by Each Factor ===")
+    print(variance.round(2))
 
-# === 6. Save results ===
-loadings.to_csv("EFA_factor_loadings.csv", index=True)
-variance.to_csv("EFA_variance_explained.csv", index=False)
-print("\n✅ Results saved to 'EFA_factor_loadings.csv' and 'EFA_variance_explained.csv'")
+    # === 6. Save results ===
+    loadings.to_csv("EFA_factor_loadings.csv", index=True)
+    variance.to_csv("EFA_variance_explained.csv", index=False)
+    pa["table"].to_csv("EFA_parallel_analysis.csv", index=False)
+    print("\n✅ Results saved to 'EFA_factor_loadings.csv', 'EFA_variance_explained.csv' and 'EFA_parallel_analysis.csv/.png'")
+
+    # === 7. Sweep mode: all factor counts, extraction methods and rotations ===
+    if run_sweep:
+        sweep_files = save_sweep(efa_sweep(session))
+        print(f"✅ Sweep results saved to {', '.join(sweep_files)}")
+
+    # === 8. Bootstrap mode: loading CIs and cross-loading frequencies ===
+    if run_bootstrap:
+        items = load_table(file_path)[session.columns]
+        boot = efa_bootstrap(items, n_factors, rotation=rotation, correlation=correlation, n_boot=n_boot)
+        print(f"\n=== Bootstrap loading stability ({n_boot} resamples) ===")
+        print(boot["items"].round(3).to_string(index=False))
+        if boot["n_failed"]:
+            print(f"⚠️  {boot['n_failed']} resample(s) could not be fitted and were skipped")
+        boot["loadings"].to_csv("EFA_bootstrap_loadings.csv", index=False)
+        boot["items"].to_csv("EFA_bootstrap_items.csv", index=False)
+        print("✅ Bootstrap results saved to 'EFA_bootstrap_loadings.csv' and 'EFA_bootstrap_items.csv'")
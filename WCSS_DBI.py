@@ -1,48 +1,30 @@
-import pandas as pd
-from kmodes.kprototypes import KPrototypes
-from sklearn.metrics import davies_bouldin_score
+from cluster_sweep import load_knowledge_data, kprototypes_sweep
+from cluster_validity import validity_report
 
-def evaluate_clusters(data_csv, k_range=[3,4,5,6]):
+def evaluate_clusters(data_csv, k_range=[3,4,5,6], sweep=None):
     """
-    Compute Inertia (WCSS) and Davies-Bouldin Index for different cluster numbers.
+    Compute Inertia (WCSS), Davies-Bouldin Index and the other validity indices
+    (silhouette, Calinski-Harabasz, Gower silhouette) for different cluster numbers.
+    sweep: optional result of kprototypes_sweep covering k_range (fitted here if None).
     """
-    # Load dataset (skip first row of section headers, use second row for columns)
-    df = pd.read_csv(data_csv, header=1)
+    # Load dataset and identify categorical vs numeric
+    df, respondent_ids, categorical_cols = load_knowledge_data(data_csv)
 
-    respondent_ids = df["respondent_id"]
-    df = df.drop(columns=["respondent_id"])
-    df["Knowledge_score"] = df["Knowledge_score"].astype(float)
+    # One parallel sweep for every k
+    if sweep is None:
+        sweep = kprototypes_sweep(df, categorical_cols, k_range, n_init=10, random_state=42)
 
-    # Identify categorical vs numeric
-    categorical_cols = [i for i, col in enumerate(df.columns) if set(df[col].unique()) <= {0, 1}]
-    numeric_cols = [i for i, col in enumerate(df.columns) if i not in categorical_cols]
+    # All indices from one shared encoded matrix
+    results = validity_report(df, categorical_cols, sweep, k_range=k_range)
 
-    results = {}
-
-    for k in k_range:
+    for k, row in results.iterrows():
         print(f"\n--- Evaluating {k} clusters ---")
-        kproto = KPrototypes(n_clusters=k, random_state=42, init='Huang', n_init=10)
-        clusters = kproto.fit_predict(df, categorical=categorical_cols)
-
-        # WCSS (Inertia from K-Prototypes)
-        inertia = kproto.cost_
-
-        # Prepare encoded version for DBI
-        df_for_dbi = df.copy()
-        for col_idx in categorical_cols:
-            col_name = df.columns[col_idx]
-            df_for_dbi[col_name] = df_for_dbi[col_name].astype(str)
-        df_encoded = pd.get_dummies(df_for_dbi, drop_first=False)
-
-        # DBI
-        dbi = davies_bouldin_score(df_encoded, clusters)
-
-        results[k] = {"Inertia (WCSS)": inertia, "Davies-Bouldin Index": dbi}
-        print(f"Inertia (WCSS): {inertia:.2f}")
-        print(f"Davies-Bouldin Index: {dbi:.3f}")
+        print(f"Inertia (WCSS): {row['Inertia (WCSS)']:.2f}")
+        print(f"Davies-Bouldin Index: {row['Davies-Bouldin Index']:.3f}")
 
-    return pd.DataFrame(results).T
+    return results
 
-results = evaluate_clusters("/Users/bazam/Library/CloudStorage/OneDrive-Personal/Documentos/academia/#PhD PLASTIC UNDERGROUND/7.1_excel/survey/data/knowledge_database_clean.csv", k_range=[3,4,5,6])
-print("\n=== Clustering Evaluation Results ===")
-print(results)
+if __name__ == "__main__":
+    results = evaluate_clusters("/Users/bazam/Library/CloudStorage/OneDrive-Personal/Documentos/academia/#PhD PLASTIC UNDERGROUND/7.1_excel/survey/data/knowledge_database_clean.csv", k_range=[3,4,5,6])
+    print("\n=== Clustering Evaluation Results ===")
+    print(results)
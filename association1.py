@@ -1,47 +1,48 @@
-import pandas as pd
 import matplotlib.pyplot as plt
 import textwrap
-from mlxtend.frequent_patterns import apriori, association_rules
+from survey_schema import read_survey, LIKERT_QUESTIONS
+from bitmatrix import BitMatrix
+from eclat import eclat
+from topk_rules import topk_rules
 
 # ------------- USER PARAMETERS -------------
 # this code runs for the file survey_transformed_3 with binary and numeric (likert) data 
 file_path = "/Users/bazam/Library/CloudStorage/OneDrive-Personal/Documentos/academia/#PhD PLASTIC UNDERGROUND/7.1_excel/survey_transformed_3.csv"   # adjust
-min_support = 0.05              # minimum support (try 0.05 to 0.1)
-max_len = 3                     # maximum itemset length (keeps memory manageable)
-lift_threshold = 1.0            # association_rules min_threshold on chosen metric
+min_support = 0.05              # minimum support (Eclat copes with values below 0.05)
+max_len = None                  # maximum itemset length (None = no cap; "all" mode only)
+itemset_mode = "all"            # "all", "closed" (lossless compression) or "maximal" (summary only)
+lift_threshold = 1.0            # minimum lift of the exported rules
+top_k_rules = 1000              # how many rules (highest support) to export
 top_n = 10                      # how many top itemsets/rules to show
 wrap_width = 45                 # wrap labels at this many characters
 output_rules_csv = "simplified_association_rules.csv"
 output_itemsets_csv = "frequent_itemsets_2plus.csv"
 # -------------------------------------------
 
-# 1) Load dataset (3-level header)
-df = pd.read_csv(file_path, header=[0,1,2])
+# 1) Load dataset (3-level header); respondent_id becomes the index
+df, schema = read_survey(file_path)
 
-# 2) Set respondent_id as index if present
-if ('respondent_id', 'respondent_id', 'respondent_id') in df.columns:
-    df = df.set_index(('respondent_id', 'respondent_id', 'respondent_id'))
+# 2) Exclude Likert questions from pattern analysis (they are numeric)
+binary_positions = schema.binary_positions(exclude=LIKERT_QUESTIONS)
 
-# 3) Exclude Likert questions from pattern analysis (they are numeric)
-likert_questions = {"Q6", "Q15", "Q17", "Q26"}
-binary_df = df.drop(columns=df.columns[df.columns.get_level_values(1).isin(likert_questions)])
-
-# 4) Flatten the MultiIndex column names into single strings (safe for mlxtend)
+# 3) Pack the one-hot block one bit per respondent per option, with the
+#    MultiIndex column names flattened into single strings (safe for mlxtend)
 #    e.g., ('water_quality','Q1','Q1_Public_water_supply') -> 'water_quality_Q1_Q1_Public_water_supply'
-binary_df.columns = ["_".join(map(str, col)).replace(" ", "_") for col in binary_df.columns]
-
-# 5) Convert to boolean as recommended by mlxtend
-binary_df = binary_df.astype(bool)
+bits = BitMatrix.from_dense(df.iloc[:, binary_positions].to_numpy(), schema.flat_names(binary_positions), df.index)
+del df
 
-# 6) Run apriori to get ALL frequent itemsets (including singletons)
-print("\nRunning apriori (this may take a bit depending on dataset size)...")
-frequent_all = apriori(binary_df, min_support=min_support, max_len=max_len, use_colnames=True)
+# 4) Mine the frequent itemsets (including singletons) depth-first on the packed
+#    bitsets; same 'support'/'itemsets' columns as mlxtend's apriori.
+#    In "closed" mode the support of any frequent itemset can still be looked up
+#    with eclat.ClosedItemsets(frequent_all).support([...])
+print(f"\nRunning Eclat ({itemset_mode} itemsets) on the packed response bitsets...")
+frequent_all = eclat(bits, min_support=min_support, max_len=max_len, mode=itemset_mode)
 if frequent_all.empty:
     print("No frequent itemsets found with the current min_support and max_len. Try lowering min_support.")
 else:
-    print(f"Apriori found {len(frequent_all)} frequent itemsets (support >= {min_support}).")
+    print(f"Eclat found {len(frequent_all)} frequent {itemset_mode} itemsets (support >= {min_support}).")
 
-    # 7) Create a version restricted to 2+ items for plotting/reporting
+    # 5) Create a version restricted to 2+ items for plotting/reporting
     frequent_2plus = frequent_all[frequent_all['itemsets'].apply(lambda s: len(s) >= 2)].copy()
     frequent_2plus = frequent_2plus.sort_values(by="support", ascending=False)
 
@@ -54,7 +55,7 @@ else:
         frequent_2plus.to_csv(output_itemsets_csv, index=False)
         print(f"Saved frequent 2+ itemsets to '{output_itemsets_csv}' ({len(frequent_2plus)} rows).")
 
-        # 8) Plot top N frequent 2+ itemsets with wrapped labels and larger left margin
+        # 6) Plot top N frequent 2+ itemsets with wrapped labels and larger left margin
         top_itemsets = frequent_2plus.head(top_n)
         labels = [textwrap.fill(", ".join(sorted(it)), width=wrap_width) for it in top_itemsets['itemsets']]
         values = top_itemsets['support'] * 100  # percent
@@ -68,22 +69,14 @@ else:
         plt.show()
         
         
-# --- Generate and save ALL association rules for clarity ---
-rules_all = association_rules(frequent_all, metric="lift", min_threshold=1.0)
+# --- Generate and save the top rules by support ---
+# Only the top_k_rules best rules are ever held: itemsets that cannot beat the
+# weakest kept rule are pruned during the search instead of enumerating all rules
+rules_export = topk_rules(bits, k=top_k_rules, min_support=min_support, min_lift=lift_threshold, max_len=max_len)
 
-if rules_all.empty:
+if rules_export.empty:
     print("No rules generated, try lowering min_support.")
 else:
-    # Format antecedents and consequents as strings
-    rules_all['Antecedent'] = rules_all['antecedents'].apply(lambda x: ", ".join(sorted(x)))
-    rules_all['Consequent'] = rules_all['consequents'].apply(lambda x: ", ".join(sorted(x)))
-
-    # Keep only useful columns
-    rules_export = rules_all[['Antecedent','Consequent','support','confidence','lift']].copy()
-
-    # Sort by support (highest first) and keep only top 1000
-    rules_export = rules_export.sort_values(by="support", ascending=False).head(1000)
-
-    # Save to CSV
+    # Save to CSV (Antecedent, Consequent, support, confidence, lift)
     rules_export.to_csv("frequent_itemsets_rules.csv", index=False)
-    print("Top 1000 rules by support saved to 'frequent_itemsets_rules.csv'.")
+    print(f"Top {len(rules_export)} rules by support saved to 'frequent_itemsets_rules.csv'.")
@@ -7,6 +7,7 @@ import seaborn as sns
 from statsmodels.stats.multicomp import pairwise_tukeyhsd
 import statsmodels.api as sm
 from statsmodels.formula.api import ols
+from survey_store import load_table
 
 # === Paths ===
 base_input = "/Users/bazam/Library/CloudStorage/OneDrive-Personal/Documentos/academia/#PhD PLASTIC UNDERGROUND/7.1_excel/survey/data/"
@@ -17,9 +18,9 @@ knowledge_file = os.path.join(base_input, "knowledge_score_clusters.csv")
 awareness_file = os.path.join(base_input, "database_awareness_questions_norm.csv")
 
 # === Load datasets ===
-att = pd.read_csv(attitude_file)
-know = pd.read_csv(knowledge_file)
-aware = pd.read_csv(awareness_file)
+att = load_table(attitude_file)
+know = load_table(knowledge_file)
+aware = load_table(awareness_file)
 
 # === Merge datasets ===
 df = att.merge(know, on="respondent_id", how="left").merge(aware, on="respondent_id", how="left")
@@ -5,6 +5,7 @@ import matplotlib.pyplot as plt
 import seaborn as sns
 import statsmodels.formula.api as smf
 from pathlib import Path
+from survey_store import load_table
 
 # ---------------- USER PARAMETERS ----------------
 # Paths (adjust as needed)
@@ -65,7 +66,7 @@ merged = df.copy()
 if knowledge_csv:
     kp = Path(knowledge_csv)
     if kp.exists():
-        kdf = pd.read_csv(kp)
+        kdf = load_table(kp)
         merged = merged.merge(kdf, on="respondent_id", how="left")
         print("Merged knowledge data:", kdf.shape)
     else:
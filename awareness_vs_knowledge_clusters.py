@@ -5,6 +5,7 @@ import seaborn as sns
 import statsmodels.api as sm
 from scipy.stats import pearsonr, f_oneway
 from statsmodels.stats.multicomp import pairwise_tukeyhsd
+from survey_store import load_table
 
 # === File paths ===
 base_input = "/Users/bazam/Library/CloudStorage/OneDrive-Personal/Documentos/academia/#PhD PLASTIC UNDERGROUND/7.1_excel/survey/data/"
@@ -18,8 +19,8 @@ output_reg = os.path.join(base_output, "awareness_question_regressions.txt")
 output_anova = os.path.join(base_output, "awareness_anova_results.csv")
 
 # === Load data ===
-df_aw = pd.read_csv(awareness_file)
-df_know = pd.read_csv(knowledge_file)
+df_aw = load_table(awareness_file)
+df_know = load_table(knowledge_file)
 
 # Merge on respondent_id
 df = df_aw.merge(df_know, on="respondent_id", how="left")
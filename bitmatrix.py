@@ -0,0 +1,181 @@
+import numpy as np
+import pandas as pd
+
+if hasattr(np, "bitwise_count"):
+    def popcount(a):
+        """Number of set bits in each element of a uint8/uint64 array."""
+        return np.bitwise_count(a)
+else:  # numpy < 2.0
+    _POPCOUNT_TABLE = np.array([bin(i).count("1") for i in range(256)], dtype=np.uint8)
+
+    def popcount(a):
+        """Number of set bits in each element of a uint8/uint64 array."""
+        a = np.ascontiguousarray(a)
+        bytes_ = a.view(np.uint8).reshape(a.shape + (a.itemsize,))
+        return _POPCOUNT_TABLE[bytes_].sum(axis=-1, dtype=np.uint8)
+
+
+class BitMatrix:
+    """
+    One-hot survey responses packed one bit per respondent per option.
+
+    Storage is column-major ("vertical"): bits[j] holds the respondents who
+    ticked option j, packed into uint64 words. Column sums, co-occurrence
+    counts and subgroup counts are computed with AND + popcount on the words,
+    so no dense int64/bool frame is needed after loading.
+    """
+
+    def __init__(self, bits, n_rows, columns, index=None):
+        self.bits = np.ascontiguousarray(bits, dtype=np.uint64)
+        self.n_rows = int(n_rows)
+        self.columns = list(columns)
+        self.index = index
+        self._col_pos = {c: j for j, c in enumerate(self.columns)}
+
+    # --- construction ---
+    @classmethod
+    def from_dense(cls, values, columns=None, index=None):
+        values = np.asarray(values)
+        if values.ndim != 2:
+            raise ValueError("Expected a 2-D respondents x options array.")
+        if not np.isin(values, (0, 1)).all():
+            raise ValueError("BitMatrix only holds 0/1 data (found other values or NaN).")
+        n_rows, n_cols = values.shape
+        packed = pack_rows(values.T.astype(bool))
+        if columns is None:
+            columns = list(range(n_cols))
+        return cls(packed, n_rows, columns, index)
+
+    @classmethod
+    def from_frame(cls, df):
+        return cls.from_dense(df.to_numpy(), list(df.columns), df.index)
+
+    # --- basic properties ---
+    @property
+    def n_cols(self):
+        return len(self.columns)
+
+    @property
+    def shape(self):
+        return (self.n_rows, self.n_cols)
+
+    @property
+    def nbytes(self):
+        return self.bits.nbytes
+
+    def col_index(self, column):
+        return self._col_pos[column]
+
+    def column_bits(self, column):
+        return self.bits[self._col_pos[column]]
+
+    # --- counting ---
+    def column_sums(self, where=None):
+        """Number of respondents who ticked each option (optionally within a row bitset)."""
+        bits = self.bits if where is None else self.bits & where
+        return popcount(bits).sum(axis=1, dtype=np.int64)
+
+    def support_count(self, columns, where=None):
+        """Number of respondents who ticked all of `columns`."""
+        acc = self.all_rows() if where is None else where.copy()
+        for c in columns:
+            acc &= self.bits[self._col_pos[c]]
+        return int(popcount(acc).sum(dtype=np.int64))
+
+    def cooccurrence(self, where=None):
+        """Options x options matrix of joint counts (diagonal = column sums)."""
+        bits = self.bits if where is None else self.bits & where
+        k = bits.shape[0]
+        out = np.empty((k, k), dtype=np.int64)
+        for i in range(k):
+            out[i, i:] = popcount(bits[i] & bits[i:]).sum(axis=1, dtype=np.int64)
+            out[i:, i] = out[i, i:]
+        return out
+
+    def pair_counts(self, a_idx, b_idx, where=None):
+        """
+        Joint counts for aligned pairs of columns: returns (n11, n_a, n_b, n).
+        n11[i] counts respondents with both a_idx[i] and b_idx[i] ticked.
+        """
+        a_idx = np.asarray(a_idx, dtype=np.intp)
+        b_idx = np.asarray(b_idx, dtype=np.intp)
+        bits = self.bits if where is None else self.bits & where
+        sums = popcount(bits).sum(axis=1, dtype=np.int64)
+        n11 = np.empty(len(a_idx), dtype=np.int64)
+        # chunk so the temporary AND stays small for very long pair lists
+        step = max(1, (1 << 22) // max(1, bits.shape[1]))
+        for s in range(0, len(a_idx), step):
+            a, b = a_idx[s:s + step], b_idx[s:s + step]
+            n11[s:s + step] = popcount(bits[a] & bits[b]).sum(axis=1, dtype=np.int64)
+        n = self.n_rows if where is None else int(popcount(where).sum(dtype=np.int64))
+        return n11, sums[a_idx], sums[b_idx], n
+
+    # --- row selection ---
+    def all_rows(self):
+        """Bitset with every respondent set (padding bits cleared)."""
+        return pack_rows(np.ones((1, self.n_rows), dtype=bool))[0]
+
+    def rows_bitset(self, mask):
+        """Pack a boolean respondent mask into a bitset usable as `where=`."""
+        mask = np.asarray(mask, dtype=bool)
+        if mask.shape != (self.n_rows,):
+            raise ValueError(f"Row mask must have length {self.n_rows}.")
+        return pack_rows(mask[None, :])[0]
+
+    def select_rows(self, rows):
+        """New BitMatrix restricted to `rows` (boolean mask or integer positions)."""
+        dense = self.unpack()[:, rows]
+        index = None if self.index is None else self.index[rows]
+        return BitMatrix(pack_rows(dense), dense.shape[1], self.columns, index)
+
+    def select_columns(self, columns):
+        idx = [self._col_pos[c] for c in columns]
+        return BitMatrix(self.bits[idx], self.n_rows, columns, self.index)
+
+    def unpack(self):
+        """Options x respondents boolean array."""
+        as_bytes = self.bits.view(np.uint8)
+        return np.unpackbits(as_bytes, axis=1, count=self.n_rows, bitorder="little").astype(bool)
+
+    # --- adapters ---
+    def to_bool_frame(self):
+        """Dense respondents x options boolean frame (the input mlxtend expects)."""
+        return pd.DataFrame(self.unpack().T, index=self.index, columns=self.columns)
+
+    def crosstab(self, a, b):
+        """2x2 table of options a vs b, laid out like pd.crosstab(df[a], df[b])."""
+        n11, na, nb, n = self.pair_counts([self._col_pos[a]], [self._col_pos[b]])
+        n11, na, nb = int(n11[0]), int(na[0]), int(nb[0])
+        table = pd.DataFrame([[n - na - nb + n11, nb - n11], [na - n11, n11]], index=[0, 1], columns=[0, 1])
+        table.index.name, table.columns.name = a, b
+        # pd.crosstab only has rows/columns for values that occur
+        return table.loc[[v for v in (0, 1) if (na if v else n - na) > 0],
+                         [v for v in (0, 1) if (nb if v else n - nb) > 0]]
+
+    def group_counts(self, groups, columns=None):
+        """
+        Counts of ticked options per group, like df[columns].groupby(groups).sum().
+        groups: array-like of group labels, one per respondent.
+        """
+        cols = self.columns if columns is None else list(columns)
+        idx = [self._col_pos[c] for c in cols]
+        groups = pd.Series(np.asarray(groups))
+        out = {}
+        for label, positions in groups.groupby(groups, sort=True).indices.items():
+            mask = np.zeros(self.n_rows, dtype=bool)
+            mask[positions] = True
+            out[label] = popcount(self.bits[idx] & self.rows_bitset(mask)).sum(axis=1, dtype=np.int64)
+        result = pd.DataFrame.from_dict(out, orient="index")
+        result.columns = pd.MultiIndex.from_tuples(cols) if cols and isinstance(cols[0], tuple) else cols
+        return result
+
+
+def pack_rows(bool_rows):
+    """Pack a (k, n) boolean array into (k, ceil(n/64)) uint64 words."""
+    bool_rows = np.asarray(bool_rows, dtype=bool)
+    k, n = bool_rows.shape
+    n_words = max(1, -(-n // 64))
+    packed = np.packbits(bool_rows, axis=1, bitorder="little")
+    out = np.zeros((k, n_words * 8), dtype=np.uint8)
+    out[:, :packed.shape[1]] = packed
+    return out.view(np.uint64)
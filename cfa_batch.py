@@ -0,0 +1,171 @@
+import logging
+import os
+from concurrent.futures import ProcessPoolExecutor
+import pandas as pd
+from scipy.stats import chi2
+from semopy import Model, calc_stats
+
+STAT_COLUMNS = {"DoF": "DoF", "chi2": "Chi2", "chi2 p-value": "Chi2_p", "CFI": "CFI", "TLI": "TLI",
+                "RMSEA": "RMSEA", "AIC": "AIC", "BIC": "BIC"}
+
+
+def model_description(groups):
+    """Lavaan-style measurement model, one factor per group: {"F1": ["Q8", "Q9"], ...}."""
+    return "\n".join(f"{factor} =~ {' + '.join(items)}" for factor, items in groups.items())
+
+
+def spec_from_groups(name, groups, parent=None):
+    """A model specification for cfa_batch from a groups dict (as in awareness_tests.py)."""
+    return {"name": name, "desc": model_description(groups), "parent": parent}
+
+
+def efa_groups(loadings, threshold=0.4):
+    """
+    Simple structure of an EFA loading table: every item on its strongest
+    factor, items without a loading >= threshold and factors with fewer than
+    two items left out.
+    """
+    primary = loadings.abs().idxmax(axis=1)
+    keep = loadings.abs().max(axis=1) >= threshold
+    groups = {f: list(primary.index[keep & (primary == f)]) for f in loadings.columns}
+    return {f: items for f, items in groups.items() if len(items) >= 2}
+
+
+def specs_from_efa(loadings, threshold=0.4, cross_loadings=True, prefix="EFA"):
+    """
+    Candidate CFA models from an EFA loading table (items x factors, e.g.
+    EFA_factor_loadings.csv read with index_col=0).
+
+    The simple-structure model is efa_groups(loadings, threshold). With
+    cross_loadings, a second model also frees every other loading >=
+    threshold; it is nested in the first and warm-starts from it.
+    """
+    simple = efa_groups(loadings, threshold)
+    keep = loadings.abs().max(axis=1) >= threshold
+    specs = [spec_from_groups(f"{prefix}_simple", simple)]
+    if cross_loadings:
+        full = {f: list(loadings.index[(loadings[f].abs() >= threshold) & keep]) for f in simple}
+        if full != simple:
+            specs.append(spec_from_groups(f"{prefix}_cross", full, parent=f"{prefix}_simple"))
+    return specs
+
+
+def _param_keys(model):
+    """(matrix, row, column) name of every free parameter, in param_vals order."""
+    keys = []
+    for param in model.parameters.values():
+        if not param.active:
+            continue
+        loc = param.locations[0]
+        n = next(i for i, mx in enumerate(model.matrices) if mx is loc.matrix)
+        rows, cols = model.names[n]
+        row, col = rows[loc.indices[0]], cols[loc.indices[1]]
+        if loc.symmetric:
+            row, col = sorted((row, col))
+        keys.append((model.matrices_names[n], row, col))
+    return keys
+
+
+# Worker state, set once per process by the pool initializer
+_WORKER = {}
+
+
+def _init_worker(data, cov, n_samples, obj):
+    logging.getLogger().setLevel(logging.ERROR)  # semopy logs a warning per non-PD information matrix
+    _WORKER.update(data=data, cov=cov, n_samples=n_samples, obj=obj)
+
+
+def _fit_spec(task):
+    spec, start = task
+    w = _WORKER
+    out = {"name": spec["name"], "estimates": None, "params": None}
+    try:
+        model = Model(spec["desc"])
+        if w["data"] is not None:
+            model.load(data=w["data"])
+        else:
+            model.load(cov=w["cov"], n_samples=w["n_samples"])
+        keys = _param_keys(model)
+        warm = 0
+        if start:
+            # parameters shared with the parent start from its estimates
+            for i, key in enumerate(keys):
+                if key in start:
+                    model.param_vals[i] = start[key]
+                    warm += 1
+        res = model.fit(obj=w["obj"])
+        stats = calc_stats(model).iloc[0]
+        out.update({new: float(stats[old]) for old, new in STAT_COLUMNS.items()})
+        out.update({"Iterations": int(res.n_it), "Converged": bool(res.success), "Warm_Started_Params": warm,
+                    "Error": ""})
+        out["params"] = dict(zip(keys, model.param_vals))
+        out["estimates"] = model.inspect()
+    except Exception as e:  # one bad specification should not stop the batch
+        out["Error"] = f"{type(e).__name__}: {e}"
+    return out
+
+
+def _levels(specs):
+    """Group specs so every parent is fitted in an earlier level than its children."""
+    names = {s["name"] for s in specs}
+    done, levels, pending = set(), [], list(specs)
+    while pending:
+        ready = [s for s in pending if s.get("parent") not in names or s["parent"] in done]
+        if not ready:
+            raise ValueError("Model parents form a cycle.")
+        levels.append(ready)
+        done |= {s["name"] for s in ready}
+        pending = [s for s in pending if s["name"] not in done]
+    return levels
+
+
+def cfa_batch(specs, data=None, cov=None, n_samples=None, obj="MLW", n_jobs=None):
+    """
+    Fit several CFA specifications and compare them in one table.
+
+    specs: list of {"name", "desc" (semopy syntax), "parent" (optional name)}
+    data: raw data, or cov + n_samples for a precomputed (e.g. polychoric) matrix
+
+    Models without a parent are fitted first, in parallel; each further level
+    is fitted in parallel once its parents are done, starting every parameter
+    it shares with its parent from the parent's estimate. For parents with
+    different degrees of freedom a chi-square difference test is reported.
+
+    Returns (comparison DataFrame, {name: semopy inspect() table}).
+    """
+    if len({s["name"] for s in specs}) != len(specs):
+        raise ValueError("Model names must be unique.")
+    initargs = (data, cov, n_samples, obj)
+    n_jobs = n_jobs or os.cpu_count() or 1
+    results = {}
+
+    pool = None
+    if n_jobs == 1 or len(specs) == 1:
+        _init_worker(*initargs)
+        run = lambda tasks: [_fit_spec(t) for t in tasks]
+    else:
+        pool = ProcessPoolExecutor(max_workers=min(n_jobs, len(specs)), initializer=_init_worker,
+                                   initargs=initargs)
+        run = lambda tasks: list(pool.map(_fit_spec, tasks))
+    try:
+        for level in _levels(specs):
+            tasks = [(s, (results.get(s.get("parent")) or {}).get("params")) for s in level]
+            for r in run(tasks):
+                results[r["name"]] = r
+    finally:
+        if pool is not None:
+            pool.shutdown()
+
+    rows = []
+    for s in specs:
+        r = results[s["name"]]
+        row = {"Model": s["name"], "Parent": s.get("parent") or ""}
+        row.update({k: v for k, v in r.items() if k not in ("name", "estimates", "params")})
+        parent = results.get(s.get("parent"))
+        if parent and not r["Error"] and not parent["Error"] and parent["DoF"] != r["DoF"]:
+            d_chi2 = abs(parent["Chi2"] - r["Chi2"])
+            d_dof = abs(parent["DoF"] - r["DoF"])
+            row.update({"Delta_Chi2": d_chi2, "Delta_DoF": d_dof, "Delta_p": chi2.sf(d_chi2, d_dof)})
+        rows.append(row)
+    table = pd.DataFrame(rows)
+    return table, {name: r["estimates"] for name, r in results.items() if r["estimates"] is not None}
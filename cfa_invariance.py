@@ -0,0 +1,376 @@
+import os
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+import pandas as pd
+from scipy.optimize import minimize
+from scipy.stats import chi2 as chi2_dist
+from semopy.parser import parse_desc
+from survey_schema import read_survey, decode_onehot
+
+LEVELS = ("configural", "metric", "scalar", "strict")
+
+# Parameter blocks held equal across groups at each level
+EQUAL_BLOCKS = {
+    "configural": set(),
+    "metric": {"lambda"},
+    "scalar": {"lambda", "nu"},
+    "strict": {"lambda", "nu", "theta"},
+}
+
+# Usual cut-offs for a non-worse fit of the more constrained model (Chen, 2007)
+DELTA_CFI = -0.010
+DELTA_RMSEA = 0.015
+
+OPS = {"lambda": "=~", "phi": "~~", "theta": "~~", "nu": "~1", "kappa": "~1"}
+
+
+class MeasurementModel:
+    """
+    Pattern of a semopy/lavaan measurement model ("F =~ a + b + 0.5*c" lines).
+
+    Loadings written with a number are fixed to it; the first free loading of
+    every factor is fixed to 1 (marker variable). Factors are correlated and
+    items have uncorrelated residuals, as in a plain semopy CFA.
+    """
+
+    def __init__(self, desc):
+        ops, _ = parse_desc(desc)
+        other = set(ops) - {"=~"}
+        if other:
+            raise ValueError(f"Only measurement models (=~) are supported, found {sorted(other)}.")
+        self.factors = list(ops["=~"])
+        self.items = list(dict.fromkeys(i for f in self.factors for i in ops["=~"][f]))
+        self.base = np.zeros((len(self.items), len(self.factors)))  # fixed loadings
+        self.free = []  # (item index, factor index) of free loadings
+        self.marker = {}  # factor index -> item index used for start values
+        for f, factor in enumerate(self.factors):
+            loadings = ops["=~"][factor]
+            has_fixed = any(v is not None for v in loadings.values())
+            for item, value in loadings.items():
+                j = self.items.index(item)
+                self.marker.setdefault(f, j)
+                if value is not None:
+                    self.base[j, f] = float(value)
+                elif not has_fixed and self.marker[f] == j:
+                    self.base[j, f] = 1.0
+                else:
+                    self.free.append((j, f))
+
+
+class _Layout:
+    """Free parameters of a multi-group model at one invariance level."""
+
+    def __init__(self, model, level, groups):
+        self.model, self.level, self.groups = model, level, list(groups)
+        self.keys, index = [], {}
+        shared = EQUAL_BLOCKS[level]
+        items, factors = model.items, model.factors
+        m = len(factors)
+
+        def free(block, lhs, rhs, group):
+            key = (block, lhs, rhs, None if block in shared else group)
+            if key not in index:
+                index[key] = len(self.keys)
+                self.keys.append(key)
+            return index[key]
+
+        self.parts = []
+        for gi, g in enumerate(self.groups):
+            lam = [(j, f, free("lambda", factors[f], items[j], g)) for j, f in model.free]
+            phi = [(a, b, free("phi", factors[a], factors[b], g)) for a in range(m) for b in range(a, m)]
+            theta = [(j, free("theta", items[j], items[j], g)) for j in range(len(items))]
+            nu = [(j, free("nu", items[j], "1", g)) for j in range(len(items))]
+            # factor means are identified once intercepts are equal; the first group is the reference
+            kappa = [(f, free("kappa", factors[f], "1", g)) for f in range(m)] \
+                if "nu" in shared and gi > 0 else []
+            self.parts.append({name: np.array(v, dtype=np.intp).reshape(len(v), width)
+                               for name, v, width in (("lambda", lam, 3), ("phi", phi, 3), ("theta", theta, 2),
+                                                      ("nu", nu, 2), ("kappa", kappa, 2))})
+
+    def bounds(self):
+        variance = [(k[0] == "theta") or (k[0] == "phi" and k[1] == k[2]) for k in self.keys]
+        return [(1e-6, None) if v else (None, None) for v in variance]
+
+    def matrices(self, x, gi):
+        part, model = self.parts[gi], self.model
+        p, m = model.base.shape
+        L = model.base.copy()
+        L[part["lambda"][:, 0], part["lambda"][:, 1]] = x[part["lambda"][:, 2]]
+        Phi = np.zeros((m, m))
+        Phi[part["phi"][:, 0], part["phi"][:, 1]] = x[part["phi"][:, 2]]
+        Phi = Phi + np.triu(Phi, 1).T
+        theta = x[part["theta"][:, 1]]
+        nu = x[part["nu"][:, 1]]
+        kappa = np.zeros(m)
+        if len(part["kappa"]):
+            kappa[part["kappa"][:, 0]] = x[part["kappa"][:, 1]]
+        return L, Phi, theta, nu, kappa
+
+
+def group_moments(X):
+    """(n, mean vector, ML covariance matrix) of one group's complete cases."""
+    X = np.asarray(X, dtype=np.float64)
+    return len(X), X.mean(axis=0), np.cov(X, rowvar=False, bias=True)
+
+
+def _objective(x, layout, moments):
+    """
+    Multi-group ML discrepancy sum_g (n_g / N) F_g with its gradient, where
+    F_g = log|Sigma| + tr(S Sigma^-1) + (m - mu)' Sigma^-1 (m - mu) - log|S| - p.
+    """
+    total = sum(n for n, _, _ in moments)
+    value, grad = 0.0, np.zeros_like(x)
+    for gi, (n, mean, S) in enumerate(moments):
+        L, Phi, theta, nu, kappa = layout.matrices(x, gi)
+        Sigma = L @ Phi @ L.T + np.diag(theta)
+        sign, logdet = np.linalg.slogdet(Sigma)
+        if sign <= 0:
+            return 1e10, np.zeros_like(x)
+        Si = np.linalg.inv(Sigma)
+        d = mean - nu - L @ kappa
+        Sid = Si @ d
+        w = n / total
+        value += w * (logdet + np.trace(S @ Si) + d @ Sid - np.linalg.slogdet(S)[1] - len(mean))
+
+        M = Si - Si @ (S + np.outer(d, d)) @ Si  # dF/dSigma
+        part = layout.parts[gi]
+        gL = 2 * M @ L @ Phi - 2 * np.outer(Sid, kappa)
+        gPhi = L.T @ M @ L
+        lam, phi = part["lambda"], part["phi"]
+        np.add.at(grad, lam[:, 2], w * gL[lam[:, 0], lam[:, 1]])
+        np.add.at(grad, phi[:, 2], w * np.where(phi[:, 0] == phi[:, 1], 1, 2) * gPhi[phi[:, 0], phi[:, 1]])
+        np.add.at(grad, part["theta"][:, 1], w * np.diag(M))
+        np.add.at(grad, part["nu"][:, 1], w * -2 * Sid)
+        if len(part["kappa"]):
+            np.add.at(grad, part["kappa"][:, 1], w * (-2 * L.T @ Sid)[part["kappa"][:, 0]])
+    return value, grad
+
+
+def _default_start(model, key, moments_by_group):
+    """Start value from the group's moments (pooled moments for shared keys)."""
+    block, lhs, rhs, g = key
+    mom = [moments_by_group[g]] if g is not None else list(moments_by_group.values())
+    n = np.array([m[0] for m in mom], dtype=np.float64)
+    S = np.tensordot(n / n.sum(), np.array([m[2] for m in mom]), axes=1)
+    mean = np.tensordot(n / n.sum(), np.array([m[1] for m in mom]), axes=1)
+    if block == "phi" and lhs != rhs:
+        return 0.0
+    if block in ("lambda", "phi"):
+        # marker k of the factor: Var(k) = b^2 phi + theta, Cov(j, k) = lambda_j phi b
+        f = model.factors.index(lhs)
+        k = model.marker[f]
+        b = model.base[k, f] if model.base[k, f] != 0 else 1.0
+        phi = 0.5 * S[k, k] / b ** 2
+        return phi if block == "phi" else S[model.items.index(rhs), k] / (phi * b)
+    if block == "theta":
+        j = model.items.index(lhs)
+        return 0.5 * S[j, j]
+    if block == "nu":
+        return mean[model.items.index(lhs)]
+    return 0.0  # factor means
+
+
+def _start_values(layout, moments, start):
+    """
+    Start vector for a layout: values from `start` (estimates of a previous
+    level, keyed like layout.keys) where available. A parameter that becomes
+    shared starts at the size-weighted mean of its group estimates; a group
+    parameter that was shared starts at the shared estimate.
+    """
+    start = start or {}
+    by_group = dict(zip(layout.groups, moments))
+    n = {g: m[0] for g, m in by_group.items()}
+    x = np.empty(len(layout.keys))
+    warm = 0
+    for i, key in enumerate(layout.keys):
+        base = key[:3]
+        if key in start:
+            x[i] = start[key]
+        elif key[3] is None and all(base + (g,) in start for g in layout.groups):
+            x[i] = sum(n[g] * start[base + (g,)] for g in layout.groups) / sum(n.values())
+        elif key[3] is not None and base + (None,) in start:
+            x[i] = start[base + (None,)]
+        else:
+            x[i] = _default_start(layout.model, key, by_group)
+            continue
+        warm += 1
+    return x, warm
+
+
+def _fit(model, level, groups, moments, start=None):
+    layout = _Layout(model, level, groups)
+    x0, warm = _start_values(layout, moments, start)
+    res = minimize(_objective, x0, args=(layout, moments), jac=True, method="L-BFGS-B",
+                   bounds=layout.bounds(), options={"maxiter": 10000, "ftol": 1e-14, "gtol": 1e-8})
+    return {"params": dict(zip(layout.keys, res.x)), "value": float(res.fun), "n_free": len(layout.keys),
+            "Iterations": int(res.nit), "Converged": bool(res.success), "Warm_Started_Params": warm}
+
+
+def fit_statistics(value, n_free, moments):
+    """Chi-square, CFI, TLI and multi-group RMSEA (Steiger's sqrt(G) correction) of an ML fit."""
+    G = len(moments)
+    N = sum(n for n, _, _ in moments)
+    p = len(moments[0][1])
+    chi2 = N * value
+    dof = G * p * (p + 3) // 2 - n_free
+    chi2_base = sum(n * (np.log(np.diag(S)).sum() - np.linalg.slogdet(S)[1]) for n, _, S in moments)
+    dof_base = G * p * (p - 1) // 2
+    cfi = 1 - max(chi2 - dof, 0) / max(chi2_base - dof_base, chi2 - dof, 1e-12)
+    tli = (chi2_base / dof_base - chi2 / dof) / (chi2_base / dof_base - 1) if dof > 0 else np.nan
+    rmsea = np.sqrt(G) * np.sqrt(max(chi2 - dof, 0) / (dof * N)) if dof > 0 else np.nan
+    return {"Chi2": chi2, "DoF": dof, "Chi2_p": chi2_dist.sf(chi2, dof) if dof > 0 else np.nan,
+            "CFI": cfi, "TLI": tli, "RMSEA": rmsea}
+
+
+# Worker state, set once per process by the pool initializer
+_WORKER = {}
+
+
+def _init_worker(model, moments):
+    _WORKER.update(model=model, moments=moments)
+
+
+def _fit_configural_group(g):
+    """Configural model of one group: the groups are independent, so each is its own fit."""
+    out = _fit(_WORKER["model"], "configural", [g], [_WORKER["moments"][g]])
+    out["params"] = {k[:3] + (g,): v for k, v in out["params"].items()}
+    return out
+
+
+def _estimates_table(level, model, groups, params):
+    rows = []
+    for g in groups:
+        for (block, lhs, rhs, key_group), value in params.items():
+            if key_group not in (g, None):
+                continue
+            rows.append({"Level": level, "Group": g, "lval": lhs, "op": OPS[block], "rval": rhs,
+                         "Estimate": value, "Equal_Across_Groups": key_group is None})
+    for g in groups:  # fixed marker / user-fixed loadings
+        for j, f in zip(*np.nonzero(model.base)):
+            rows.append({"Level": level, "Group": g, "lval": model.factors[f], "op": "=~",
+                         "rval": model.items[j], "Estimate": model.base[j, f], "Equal_Across_Groups": True})
+    return pd.DataFrame(rows)
+
+
+def measurement_invariance(data, group, model_desc, levels=LEVELS, min_group_size=30, warm_start=True,
+                           n_jobs=None):
+    """
+    Multi-group CFA with a mean structure across the groups of `group`
+    (e.g. country), testing configural, metric (equal loadings), scalar
+    (+ equal intercepts, free factor means) and strict (+ equal residual
+    variances) invariance.
+
+    data: respondents x items (at least the observed variables of model_desc)
+    group: column name of data or Series aligned with data
+    model_desc: semopy measurement model, e.g. CFA.model_desc
+    min_group_size: smaller groups, and groups where an item does not vary,
+        are left out (listed in "excluded")
+
+    Configural groups are independent models and are fitted concurrently on a
+    process pool. Every further level is one joint ML fit started from the
+    previous level's estimates (shared parameters from the size-weighted mean
+    of the group estimates). Items are treated as continuous (normal-theory
+    ML), as in the pooled semopy fit on raw data.
+
+    Returns a dict with
+        "fit": one row per level with chi2, CFI, TLI, RMSEA and the change
+               against the previous level (Delta_CFI, Delta_RMSEA, chi-square
+               difference test); Invariant is True when
+               Delta_CFI >= -0.010 and Delta_RMSEA <= 0.015
+        "estimates": parameter estimates per level and group
+        "groups": group sizes used
+        "excluded": {group: reason}
+    """
+    model = MeasurementModel(model_desc)
+    key = data[group] if isinstance(group, str) else pd.Series(group, index=data.index)
+    complete = data[model.items].assign(_group=key).dropna()
+
+    moments, excluded = {}, {}
+    for g, sub in complete.groupby("_group", sort=True):
+        if len(sub) < min_group_size:
+            excluded[g] = f"n = {len(sub)} < {min_group_size}"
+            continue
+        n, mean, S = group_moments(sub[model.items])
+        if np.linalg.eigvalsh(S).min() <= 1e-10:
+            excluded[g] = "singular covariance matrix (an item does not vary)"
+            continue
+        moments[g] = (n, mean, S)
+    groups = list(moments)
+    if len(groups) < 2:
+        raise ValueError(f"Need at least two usable groups, got {groups} (excluded: {excluded}).")
+    group_moments_list = [moments[g] for g in groups]
+
+    results = {}
+    n_jobs = n_jobs or os.cpu_count() or 1
+    if n_jobs == 1:
+        _init_worker(model, moments)
+        parts = [_fit_configural_group(g) for g in groups]
+    else:
+        with ProcessPoolExecutor(max_workers=min(n_jobs, len(groups)), initializer=_init_worker,
+                                 initargs=(model, moments)) as pool:
+            parts = list(pool.map(_fit_configural_group, groups))
+    results["configural"] = {
+        "params": {k: v for part in parts for k, v in part["params"].items()},
+        "value": sum(part["value"] * moments[g][0] for g, part in zip(groups, parts)) /
+                 sum(moments[g][0] for g in groups),
+        "n_free": sum(part["n_free"] for part in parts),
+        "Iterations": max(part["Iterations"] for part in parts),
+        "Converged": all(part["Converged"] for part in parts),
+        "Warm_Started_Params": 0,
+    }
+
+    previous = "configural"
+    for level in levels:
+        if level == "configural":
+            continue
+        start = results[previous]["params"] if warm_start else None
+        results[level] = _fit(model, level, groups, group_moments_list, start)
+        previous = level
+
+    rows = []
+    for i, level in enumerate(levels):
+        r = results[level]
+        row = {"Level": level, "N_Groups": len(groups), "N": sum(m[0] for m in group_moments_list)}
+        row.update(fit_statistics(r["value"], r["n_free"], group_moments_list))
+        if i > 0:
+            prev = rows[-1]
+            d_chi2, d_dof = row["Chi2"] - prev["Chi2"], row["DoF"] - prev["DoF"]
+            row.update({"Delta_Chi2": d_chi2, "Delta_DoF": d_dof,
+                        "Delta_p": chi2_dist.sf(max(d_chi2, 0), d_dof) if d_dof > 0 else np.nan,
+                        "Delta_CFI": row["CFI"] - prev["CFI"], "Delta_RMSEA": row["RMSEA"] - prev["RMSEA"]})
+            row["Invariant"] = bool(row["Delta_CFI"] >= DELTA_CFI and row["Delta_RMSEA"] <= DELTA_RMSEA)
+        row.update({k: r[k] for k in ("Iterations", "Converged", "Warm_Started_Params")})
+        rows.append(row)
+
+    estimates = pd.concat([_estimates_table(level, model, groups, results[level]["params"])
+                           for level in levels], ignore_index=True)
+    sizes = pd.Series({g: moments[g][0] for g in groups}, name="N")
+    return {"fit": pd.DataFrame(rows), "estimates": estimates, "groups": sizes, "excluded": excluded}
+
+
+def survey_groups(survey_csv, question):
+    """Group label of every respondent from a one-hot demographic question (e.g. Q33 country)."""
+    df, schema = read_survey(survey_csv)
+    labels = decode_onehot(df, schema, question)
+    labels.index = labels.index.rename("respondent_id")
+    return labels
+
+
+if __name__ == "__main__":
+    from CFA import model_desc
+
+    data_csv = "/Users/bazam/Library/CloudStorage/OneDrive-Personal/Documentos/academia/#PhD PLASTIC UNDERGROUND/7.1_excel/survey/data/database_awareness_questions.csv"
+    survey_csv = "/Users/bazam/Library/CloudStorage/OneDrive-Personal/Documentos/academia/#PhD PLASTIC UNDERGROUND/7.1_excel/survey_transformed_3.csv"
+    df = pd.read_csv(data_csv).set_index("respondent_id")
+
+    for question in ("Q33", "Q31"):  # country of residency, gender
+        df[question] = survey_groups(survey_csv, question)
+        result = measurement_invariance(df, question, model_desc)
+        print(f"\n=== Measurement invariance across {question} ===")
+        print(result["groups"].to_string())
+        for g, reason in result["excluded"].items():
+            print(f"⚠️  {g} left out: {reason}")
+        print(result["fit"].round(3).to_string(index=False))
+        result["fit"].to_csv(f"CFA_invariance_{question}.csv", index=False)
+        result["estimates"].to_csv(f"CFA_invariance_{question}_estimates.csv", index=False)
+        print(f"✅ Saved 'CFA_invariance_{question}.csv' and 'CFA_invariance_{question}_estimates.csv'")
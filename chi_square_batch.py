@@ -0,0 +1,70 @@
+import numpy as np
+import pandas as pd
+from scipy import stats
+
+
+def chi2_2x2(n11, n_a, n_b, n, correction=True):
+    """
+    Chi-square test of independence for many 2x2 tables at once.
+
+    Each table is given by its joint count n11 (both items ticked), the
+    margins n_a and n_b and the sample size n. Results match
+    scipy.stats.chi2_contingency on the pd.crosstab of the two columns:
+    Yates' correction for 2x2 tables, and chi2 = 0, p = 1 (dof 0) when one of
+    the items is constant so the crosstab collapses to a single row/column.
+
+    Returns a DataFrame with Chi2, p-value, dof, CramersV and MinExpected.
+    """
+    n11 = np.asarray(n11, dtype=np.int64)
+    n_a = np.broadcast_to(np.asarray(n_a, dtype=np.int64), n11.shape)
+    n_b = np.broadcast_to(np.asarray(n_b, dtype=np.int64), n11.shape)
+    n = np.broadcast_to(np.asarray(n, dtype=np.int64), n11.shape)
+
+    # observed cells in crosstab order: (0,0), (0,1), (1,0), (1,1)
+    observed = np.stack([n - n_a - n_b + n11, n_b - n11, n_a - n11, n11], axis=1)
+    rows = np.stack([n - n_a, n - n_a, n_a, n_a], axis=1)
+    cols = np.stack([n - n_b, n_b, n - n_b, n_b], axis=1)
+
+    full = (n_a > 0) & (n_a < n) & (n_b > 0) & (n_b < n)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        expected = rows * cols / n[:, None]
+
+        obs = observed.astype(np.float64)
+        if correction:
+            diff = expected - obs
+            obs = obs + np.minimum(0.5, np.abs(diff)) * np.sign(diff)
+        terms = (obs - expected) ** 2 / expected
+        # sum left to right, as numpy does for the 4-cell table in scipy
+        chi2 = ((terms[:, 0] + terms[:, 1]) + terms[:, 2]) + terms[:, 3]
+
+    chi2 = np.where(full, chi2, 0.0)
+    p = np.where(full, stats.chi2.sf(chi2, 1), 1.0)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        # Cramér's V; min(r-1, k-1) is 1 for a full table and 0 otherwise
+        v = np.sqrt((chi2 / n) / full.astype(np.float64))
+    # only cells that appear in the crosstab count towards the warning
+    present = (rows > 0) & (cols > 0)
+    min_expected = np.where(present, expected, np.inf).min(axis=1)
+
+    return pd.DataFrame({
+        "Chi2": chi2,
+        "p-value": p,
+        "dof": full.astype(np.int64),
+        "CramersV": v,
+        "MinExpected": min_expected,
+    })
+
+
+def chi2_pairs(bits, antecedents, consequents, correction=True):
+    """
+    Batched chi-square / Cramér's V for aligned (antecedent, consequent) column
+    pairs of a BitMatrix. Joint counts come from AND + popcount on the packed
+    columns, so every 2x2 table is built in one pass.
+    """
+    a_idx = [bits.col_index(c) for c in antecedents]
+    b_idx = [bits.col_index(c) for c in consequents]
+    n11, n_a, n_b, n = bits.pair_counts(a_idx, b_idx)
+    out = chi2_2x2(n11, n_a, n_b, n, correction=correction)
+    out.insert(0, "Consequent", list(consequents))
+    out.insert(0, "Antecedent", list(antecedents))
+    return out
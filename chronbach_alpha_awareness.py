@@ -1,17 +1,6 @@
 import pandas as pd
 import numpy as np
-
-def cronbach_alpha(df):
-    """
-    Compute Cronbach's Alpha for a given dataframe (columns = items of one scale).
-    """
-    df = df.dropna(axis=0)
-    item_variances = df.var(axis=0, ddof=1)
-    total_var = df.sum(axis=1).var(ddof=1)
-    n_items = df.shape[1]
-
-    alpha = (n_items / (n_items - 1)) * (1 - item_variances.sum() / total_var)
-    return alpha
+from reliability import scale_reliability
 
 def cronbach_alpha_by_group(csv_file, group_dict):
     """
@@ -21,7 +10,7 @@ def cronbach_alpha_by_group(csv_file, group_dict):
     """
 
     df = pd.read_csv(csv_file)
-    results = []
+    scales = {}
 
     for group_name, questions in group_dict.items():
         # Check that all columns exist
@@ -29,14 +18,18 @@ def cronbach_alpha_by_group(csv_file, group_dict):
         if len(valid_cols) < 2:
             print(f"⚠️ Skipping {group_name}: needs ≥2 questions (found {len(valid_cols)})")
             continue
+        scales[group_name] = valid_cols
 
-        alpha = cronbach_alpha(df[valid_cols])
-        results.append({"Group": group_name, "N_Items": len(valid_cols), "Cronbach_Alpha": round(alpha, 3)})
-
-    results_df = pd.DataFrame(results)
+    # All groups from one covariance matrix
+    summary, items = scale_reliability(df, scales)
+    results_df = summary[["Group", "N_Items", "Cronbach_Alpha"]].copy()
+    results_df["Cronbach_Alpha"] = results_df["Cronbach_Alpha"].round(3)
     print("\n=== Cronbach's Alpha by Awareness Group ===\n")
     print(results_df)
 
+    print("\n=== Item statistics ===\n")
+    print(items.round(3))
+
     results_df.to_csv("awareness_cronbach_alpha.csv", index=False)
     print("\n✅ Saved as 'awareness_cronbach_alpha.csv'")
 
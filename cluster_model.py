@@ -0,0 +1,133 @@
+import json
+from datetime import datetime, timezone
+import numpy as np
+from cluster_sweep import load_knowledge_data
+
+MODEL_FORMAT = "kprototypes-cluster-model"
+MODEL_VERSION = 1
+
+
+class ClusterModel:
+    """
+    A fitted K-Prototypes solution that can be saved and reused.
+
+    Holds the prototypes, gamma, which columns are numeric/categorical and the
+    published label of every prototype, so later survey waves can be assigned
+    to the existing clusters without refitting (and without relabelling).
+    """
+
+    def __init__(self, numeric_columns, categorical_columns, numeric_prototypes,
+                 categorical_prototypes, gamma, labels=None, metadata=None):
+        self.numeric_columns = list(numeric_columns)
+        self.categorical_columns = list(categorical_columns)
+        self.numeric_prototypes = np.asarray(numeric_prototypes, dtype=np.float64)
+        self.categorical_prototypes = np.asarray(categorical_prototypes, dtype=np.float64)
+        self.gamma = float(gamma)
+        k = self.numeric_prototypes.shape[0]
+        self.labels = list(range(k)) if labels is None else list(labels)
+        if len(self.labels) != k:
+            raise ValueError(f"Got {len(self.labels)} labels for {k} prototypes.")
+        self.metadata = dict(metadata or {})
+
+    @property
+    def n_clusters(self):
+        return len(self.labels)
+
+    @classmethod
+    def from_sweep(cls, df, categorical_cols, fit, metadata=None):
+        """
+        Build a model from one entry of kprototypes_sweep (fit = sweep[k]).
+        df, categorical_cols: the clustering input the sweep was run on.
+        """
+        categorical_cols = list(categorical_cols)
+        columns = list(df.columns)
+        numeric = [c for i, c in enumerate(columns) if i not in set(categorical_cols)]
+        categorical = [columns[i] for i in categorical_cols]
+        prototypes = np.asarray(fit["prototypes"], dtype=np.float64)
+        # kmodes returns prototypes as [numeric..., categorical...]
+        num_proto = prototypes[:, :len(numeric)]
+        cat_proto = prototypes[:, len(numeric):]
+        meta = {"k": int(prototypes.shape[0]), "cost": float(fit["cost"]),
+                "seed": int(fit["seed"]), "n_train": int(len(df))}
+        meta.update(metadata or {})
+        return cls(numeric, categorical, num_proto, cat_proto, fit["gamma"], metadata=meta)
+
+    # --- persistence ---
+    def to_dict(self):
+        return {
+            "format": MODEL_FORMAT,
+            "version": MODEL_VERSION,
+            "created": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+            "gamma": self.gamma,
+            "numeric_columns": self.numeric_columns,
+            "categorical_columns": self.categorical_columns,
+            "numeric_prototypes": self.numeric_prototypes.tolist(),
+            "categorical_prototypes": self.categorical_prototypes.tolist(),
+            "labels": [_json_label(x) for x in self.labels],
+            "metadata": self.metadata,
+        }
+
+    def save(self, path):
+        with open(path, "w") as f:
+            json.dump(self.to_dict(), f, indent=1)
+
+    @classmethod
+    def load(cls, path):
+        with open(path) as f:
+            d = json.load(f)
+        if d.get("format") != MODEL_FORMAT:
+            raise ValueError(f"{path} is not a saved cluster model.")
+        if d.get("version", 0) > MODEL_VERSION:
+            raise ValueError(f"{path} was written by a newer version ({d['version']}) of cluster_model.")
+        return cls(d["numeric_columns"], d["categorical_columns"], d["numeric_prototypes"],
+                   d["categorical_prototypes"], d["gamma"], d["labels"], d.get("metadata"))
+
+    # --- assignment ---
+    def costs(self, df, chunk_size=100_000):
+        """Respondents x clusters K-Prototypes dissimilarity to every prototype."""
+        missing = [c for c in self.numeric_columns + self.categorical_columns if c not in df.columns]
+        if missing:
+            raise KeyError(f"Columns missing from new data: {missing}")
+        Xnum = df[self.numeric_columns].to_numpy(dtype=np.float64)
+        Xcat = df[self.categorical_columns].to_numpy(dtype=np.float64)
+        P, C = self.numeric_prototypes, self.categorical_prototypes
+
+        out = np.empty((len(df), self.n_clusters))
+        for s in range(0, len(df), chunk_size):
+            xn, xc = Xnum[s:s + chunk_size], Xcat[s:s + chunk_size]
+            # same terms as kmodes: squared Euclidean + gamma * matching dissimilarity
+            d = ((xn[:, None, :] - P[None, :, :]) ** 2).sum(axis=2)
+            mismatch = (xc[:, None, :] != C[None, :, :]).sum(axis=2)
+            out[s:s + chunk_size] = d + self.gamma * mismatch
+        return out
+
+    def predict(self, df):
+        """Cluster label of each respondent (nearest prototype, first on ties)."""
+        idx = self.costs(df).argmin(axis=1)
+        return np.asarray(self.labels)[idx]
+
+
+def _json_label(x):
+    return x.item() if isinstance(x, np.generic) else x
+
+
+def load_cluster_model(path):
+    return ClusterModel.load(path)
+
+
+def assign_clusters(data_csv, model_path, output_csv=None):
+    """
+    Assign respondents in data_csv (same layout as the clustering input) to the
+    clusters of a saved model, without refitting.
+    """
+    model = ClusterModel.load(model_path)
+    df, respondent_ids, _ = load_knowledge_data(data_csv)
+
+    df_out = df.copy()
+    df_out["Cluster"] = model.predict(df)
+    df_out.insert(0, "respondent_id", respondent_ids)
+
+    if output_csv:
+        df_out.to_csv(output_csv, index=False)
+        print(f"Assigned {len(df_out)} respondents to {model.n_clusters} clusters -> {output_csv}")
+    return df_out
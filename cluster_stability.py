@@ -0,0 +1,204 @@
+import hashlib
+import os
+from concurrent.futures import ProcessPoolExecutor, as_completed
+import numpy as np
+import pandas as pd
+from kmodes.kprototypes import KPrototypes
+from scipy.optimize import linear_sum_assignment
+from sklearn.metrics import adjusted_rand_score
+from cluster_sweep import load_knowledge_data, kprototypes_sweep
+from shared_data import SharedArray, attach_array
+
+
+def align_labels(reference, labels, k):
+    """
+    Map bootstrap cluster ids onto reference ids with the Hungarian method,
+    maximising the number of respondents that keep their reference cluster.
+    """
+    overlap = np.zeros((k, k), dtype=np.int64)
+    np.add.at(overlap, (labels, reference), 1)
+    rows, cols = linear_sum_assignment(-overlap)
+    mapping = np.arange(k)
+    mapping[rows] = cols
+    return mapping[labels]
+
+
+def jaccard_by_cluster(reference, aligned, rows, k):
+    """Jaccard similarity of each reference cluster with its aligned bootstrap cluster, on `rows`."""
+    ref, boot = reference[rows], aligned[rows]
+    out = np.full(k, np.nan)
+    for c in range(k):
+        a, b = ref == c, boot == c
+        union = np.count_nonzero(a | b)
+        if union:
+            out[c] = np.count_nonzero(a & b) / union
+    return out
+
+
+# Worker state, set once per process by the pool initializer
+_WORKER = {}
+
+
+def _init_worker(data, categorical_cols, reference, k, gamma, n_init, checkpoint_dir):
+    if isinstance(data, tuple):  # SharedArray spec
+        data = attach_array(data)
+    _WORKER.update(X=data, categorical_cols=categorical_cols, reference=reference, k=k,
+                   gamma=gamma, n_init=n_init, checkpoint_dir=checkpoint_dir)
+
+
+def _checkpoint_path(checkpoint_dir, b):
+    return os.path.join(checkpoint_dir, f"replicate_{b:05d}.npz")
+
+
+def _run_replicate(task):
+    b, seed = task
+    w = _WORKER
+    X, reference, k = w["X"], w["reference"], w["k"]
+    rng = np.random.default_rng(seed)
+    sample = rng.integers(0, len(X), size=len(X))
+
+    kproto = KPrototypes(n_clusters=k, init="Huang", n_init=w["n_init"], gamma=w["gamma"],
+                         random_state=int(seed & 0x7FFFFFFF))
+    kproto.fit(X[sample], categorical=w["categorical_cols"])
+    # assign every respondent to the bootstrap prototypes, then align to the reference
+    labels = np.asarray(kproto.predict(X, categorical=w["categorical_cols"]), dtype=np.int64)
+    aligned = align_labels(reference, labels, k)
+
+    in_bag = np.unique(sample)
+    result = {
+        "replicate": b,
+        "aligned": aligned.astype(np.int16),
+        "jaccard": jaccard_by_cluster(reference, aligned, in_bag, k),
+        "ari": adjusted_rand_score(reference, labels),
+    }
+    if w["checkpoint_dir"]:
+        path = _checkpoint_path(w["checkpoint_dir"], b)
+        tmp = path + ".tmp.npz"
+        np.savez(tmp, **result)
+        os.replace(tmp, path)
+    return result
+
+
+def _check_run_signature(checkpoint_dir, X, ref_labels, k, n_init, random_state):
+    """Refuse to resume from replicates written for different data or settings."""
+    h = hashlib.blake2b(digest_size=16)
+    for part in (X.tobytes(), ref_labels.tobytes(), repr((X.shape, k, n_init, random_state)).encode()):
+        h.update(part)
+    signature = h.hexdigest()
+    path = os.path.join(checkpoint_dir, "run_signature.txt")
+    if os.path.exists(path):
+        with open(path) as f:
+            if f.read().strip() != signature:
+                raise ValueError(f"{checkpoint_dir} holds replicates from a different run; use another checkpoint_dir.")
+    else:
+        with open(path, "w") as f:
+            f.write(signature)
+
+
+def _load_checkpoint(path):
+    with np.load(path) as f:
+        return {"replicate": int(f["replicate"]), "aligned": f["aligned"],
+                "jaccard": f["jaccard"], "ari": float(f["ari"])}
+
+
+def bootstrap_stability(df, categorical_cols, k, n_boot=100, reference=None, n_init=5,
+                        random_state=42, n_jobs=None, checkpoint_dir=None):
+    """
+    Bootstrap stability of a K-Prototypes solution.
+
+    Each of n_boot replicates refits K-Prototypes on a resample of respondents,
+    assigns everyone to the bootstrap prototypes and aligns the labels to the
+    reference solution with Hungarian matching.
+
+    reference: {"labels", "gamma"} for the solution under test, e.g. sweep[k];
+        fitted here with n_init=10 if None
+    checkpoint_dir: if given, every finished replicate is saved there and a
+        rerun with the same arguments only computes the missing ones
+
+    Returns a dict with
+        "clusters": per-cluster size, mean/sd Jaccard and share of replicates
+                    with Jaccard >= 0.75 (Hennig's "stable" threshold)
+        "ari": ARI of every replicate against the reference
+        "assignment_frequency": respondents x clusters share of replicates in
+                    which each respondent was placed in each reference cluster
+    """
+    X = df.to_numpy(dtype=np.float64) if isinstance(df, pd.DataFrame) else np.asarray(df, dtype=np.float64)
+    categorical_cols = list(categorical_cols)
+    if reference is None:
+        reference = kprototypes_sweep(X, categorical_cols, [k], n_init=10, random_state=random_state,
+                                      n_jobs=n_jobs)[k]
+    ref_labels = np.asarray(reference["labels"], dtype=np.int64)
+    gamma = reference["gamma"]
+
+    seeds = [int(s.generate_state(1, dtype=np.uint64)[0])
+             for s in np.random.SeedSequence(random_state).spawn(n_boot)]
+    results = {}
+    if checkpoint_dir:
+        os.makedirs(checkpoint_dir, exist_ok=True)
+        _check_run_signature(checkpoint_dir, X, ref_labels, k, n_init, random_state)
+        for b in range(n_boot):
+            path = _checkpoint_path(checkpoint_dir, b)
+            if os.path.exists(path):
+                results[b] = _load_checkpoint(path)
+        if results:
+            print(f"Resuming: {len(results)} of {n_boot} replicates found in {checkpoint_dir}")
+    tasks = [(b, seeds[b]) for b in range(n_boot) if b not in results]
+
+    n_jobs = n_jobs or os.cpu_count() or 1
+    if tasks and n_jobs == 1:
+        _init_worker(X, categorical_cols, ref_labels, k, gamma, n_init, checkpoint_dir)
+        for t in tasks:
+            r = _run_replicate(t)
+            results[r["replicate"]] = r
+    elif tasks:
+        with SharedArray(X) as shared:
+            initargs = (shared.spec, categorical_cols, ref_labels, k, gamma, n_init, checkpoint_dir)
+            with ProcessPoolExecutor(max_workers=min(n_jobs, len(tasks)),
+                                     initializer=_init_worker, initargs=initargs) as pool:
+                for fut in as_completed([pool.submit(_run_replicate, t) for t in tasks]):
+                    r = fut.result()
+                    results[r["replicate"]] = r
+
+    ordered = [results[b] for b in range(n_boot)]
+    jaccard = np.vstack([r["jaccard"] for r in ordered])
+    ari = np.array([r["ari"] for r in ordered])
+    freq = np.zeros((len(X), k))
+    for r in ordered:
+        freq[np.arange(len(X)), r["aligned"]] += 1
+    freq /= n_boot
+
+    clusters = pd.DataFrame({
+        "Cluster": np.arange(k),
+        "Size": np.bincount(ref_labels, minlength=k),
+        "Jaccard_mean": np.nanmean(jaccard, axis=0),
+        "Jaccard_sd": np.nanstd(jaccard, axis=0, ddof=1) if n_boot > 1 else np.nan,
+        "Share_Jaccard_ge_0.75": np.mean(jaccard >= 0.75, axis=0),
+    })
+    return {
+        "clusters": clusters,
+        "ari": ari,
+        "assignment_frequency": pd.DataFrame(freq, columns=[f"Cluster_{c}" for c in range(k)]),
+    }
+
+
+if __name__ == "__main__":
+    data_csv = "/Users/bazam/Library/CloudStorage/OneDrive-Personal/Documentos/academia/#PhD PLASTIC UNDERGROUND/7.1_excel/survey/data/knowledge_database_clean.csv"
+    df, respondent_ids, categorical_cols = load_knowledge_data(data_csv)
+
+    # Same reference solutions as knowledge_cluster_visual.py, fitted once
+    k_range = [4, 5, 6]
+    sweep = kprototypes_sweep(df, categorical_cols, k_range, n_init=10, random_state=42)
+
+    for k in k_range:
+        print(f"\n=== Bootstrap stability for {k} clusters ===")
+        res = bootstrap_stability(df, categorical_cols, k, n_boot=200, reference=sweep[k],
+                                  checkpoint_dir=f"stability_checkpoints_k{k}")
+        print(res["clusters"].round(3))
+        print(f"ARI vs reference: median {np.median(res['ari']):.3f} "
+              f"(5-95%: {np.percentile(res['ari'], 5):.3f}-{np.percentile(res['ari'], 95):.3f})")
+
+        res["clusters"].to_csv(f"cluster_stability_k{k}.csv", index=False)
+        freq = res["assignment_frequency"]
+        freq.insert(0, "respondent_id", respondent_ids.values)
+        freq.to_csv(f"cluster_assignment_frequency_k{k}.csv", index=False)
+    print("\n✅ Saved cluster_stability_k*.csv and cluster_assignment_frequency_k*.csv")
@@ -0,0 +1,112 @@
+import os
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+import pandas as pd
+from kmodes.kprototypes import KPrototypes
+
+
+def load_knowledge_data(data_csv):
+    """
+    Load the knowledge/demographics table used for clustering.
+    Returns (df, respondent_ids, categorical_cols) where categorical_cols are
+    the positions of the 0/1 columns, as the clustering scripts expect.
+    """
+    # Load dataset (skip first row of section headers, use second row for columns)
+    df = pd.read_csv(data_csv, header=1)
+
+    respondent_ids = df["respondent_id"]
+    df = df.drop(columns=["respondent_id"])
+    df["Knowledge_score"] = df["Knowledge_score"].astype(float)
+
+    # Find categorical (binary) vs numeric columns
+    categorical_cols = [i for i, col in enumerate(df.columns) if set(df[col].unique()) <= {0, 1}]
+    return df, respondent_ids, categorical_cols
+
+
+def kprototypes_gamma(X, categorical_cols):
+    """Huang's default gamma (0.5 * mean std of the numeric columns), as used by kmodes."""
+    numeric = [i for i in range(X.shape[1]) if i not in set(categorical_cols)]
+    return 0.5 * np.mean(np.asarray(X[:, numeric], dtype=float).std(axis=0))
+
+
+# Data shared by every task in a worker process (set once by the pool initializer)
+_WORKER = {}
+
+
+def _init_worker(X, categorical_cols, gamma, init, max_iter):
+    _WORKER.update(X=X, categorical_cols=categorical_cols, gamma=gamma, init=init, max_iter=max_iter)
+
+
+def _fit_one(task):
+    k, init_no, seed = task
+    w = _WORKER
+    kproto = KPrototypes(n_clusters=k, init=w["init"], n_init=1, gamma=w["gamma"],
+                         max_iter=w["max_iter"], random_state=seed)
+    kproto.fit(w["X"], categorical=w["categorical_cols"])
+    return {
+        "k": k,
+        "init_no": init_no,
+        "seed": seed,
+        "cost": float(kproto.cost_),
+        "labels": np.asarray(kproto.labels_, dtype=np.int64),
+        "prototypes": kproto.cluster_centroids_,
+        "n_iter": kproto.n_iter_,
+    }
+
+
+def task_seeds(random_state, k_range, n_init):
+    """
+    Independent seed per (k, init) task spawned from one SeedSequence, so a
+    sweep gives the same fits whatever the number of workers or task order.
+    """
+    root = np.random.SeedSequence(random_state)
+    seeds = {}
+    for k, k_seq in zip(k_range, root.spawn(len(k_range))):
+        for init_no, seq in enumerate(k_seq.spawn(n_init)):
+            seeds[(k, init_no)] = int(seq.generate_state(1)[0] & 0x7FFFFFFF)
+    return seeds
+
+
+def kprototypes_sweep(df, categorical_cols, k_range, n_init=10, random_state=42,
+                      init="Huang", max_iter=100, n_jobs=None):
+    """
+    Fit K-Prototypes for every k in k_range with n_init initialisations each,
+    spreading the (k, init) fits over a process pool and keeping the best
+    (lowest cost) run per k.
+
+    Returns {k: {"cost", "labels", "prototypes", "gamma", "seed", "n_iter"}}.
+    """
+    k_range = list(k_range)
+    X = df.to_numpy() if isinstance(df, pd.DataFrame) else np.asarray(df)
+    categorical_cols = list(categorical_cols)
+    gamma = kprototypes_gamma(X, categorical_cols)
+    seeds = task_seeds(random_state, k_range, n_init)
+    tasks = [(k, init_no, seeds[(k, init_no)]) for k in k_range for init_no in range(n_init)]
+
+    n_jobs = n_jobs or os.cpu_count() or 1
+    initargs = (X, categorical_cols, gamma, init, max_iter)
+    if n_jobs == 1:
+        _init_worker(*initargs)
+        fits = [_fit_one(t) for t in tasks]
+    else:
+        with ProcessPoolExecutor(max_workers=min(n_jobs, len(tasks)),
+                                 initializer=_init_worker, initargs=initargs) as pool:
+            fits = list(pool.map(_fit_one, tasks))
+
+    best = {}
+    for fit in fits:  # tasks are in (k, init_no) order, so ties keep the first init
+        k = fit["k"]
+        if k not in best or fit["cost"] < best[k]["cost"]:
+            best[k] = fit
+
+    return {
+        k: {
+            "cost": best[k]["cost"],
+            "labels": best[k]["labels"],
+            "prototypes": best[k]["prototypes"],
+            "gamma": gamma,
+            "seed": best[k]["seed"],
+            "n_iter": best[k]["n_iter"],
+        }
+        for k in k_range
+    }
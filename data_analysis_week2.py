@@ -1,29 +1,27 @@
 import pandas as pd
 import matplotlib.pyplot as plt
 from mlxtend.frequent_patterns import apriori, association_rules
+from survey_schema import read_survey, question_block, LIKERT_QUESTIONS
 
 # 1. Load the dataset (replace 'survey_data.csv' with your file name)
 # this code runs for the file survey_transformed_3 with binary and numeric (likert) data 
 file_path = "/Users/bazam/Library/CloudStorage/OneDrive-Personal/Documentos/academia/#PhD PLASTIC UNDERGROUND/7.1_excel/survey_transformed_3.csv"
 # First 3 rows are headers: (section, question, option)
-df = pd.read_csv(file_path, header=[0,1,2])
-
-# Make respondent_id the index
-if ('respondent_id', 'respondent_id', 'respondent_id') in df.columns:
-    df = df.set_index(('respondent_id', 'respondent_id', 'respondent_id'))
+# read_survey makes respondent_id the index and returns the column schema
+df, schema = read_survey(file_path)
 
 # 2. Display first few rows to check structure
 print("Preview of dataset:")
 print(df.head())
 
 # Identify Likert scale questions (they are numeric, not binary)
-likert_questions = {"Q6", "Q15", "Q17", "Q26"}
+likert_questions = LIKERT_QUESTIONS
 
 # 3. Descriptive analysis for each question
 print("\nDescriptive statistics for each question:")
 
-for question in df.columns.get_level_values(1).unique():
-    q_cols = df.loc[:, df.columns.get_level_values(1) == question]
+for question in schema.questions():
+    q_cols = question_block(df, schema, question)
     
     print(f"\n=== {question} ===")
     
@@ -1,46 +1,47 @@
-import pandas as pd
 import matplotlib.pyplot as plt
+from survey_schema import read_survey, question_block, decode_onehot, LIKERT_QUESTIONS
+from bitmatrix import BitMatrix
 
 # 1. Load dataset (adjust file path)
 # this code runs for the file survey_transformed_3 with binary and numeric (likert) data 
 file_path = "/Users/bazam/Library/CloudStorage/OneDrive-Personal/Documentos/academia/#PhD PLASTIC UNDERGROUND/7.1_excel/survey_transformed_3.csv"
-df = pd.read_csv(file_path, header=[0,1,2])
-
-# Make respondent_id the index
-if ('respondent_id', 'respondent_id', 'respondent_id') in df.columns:
-    df = df.set_index(('respondent_id', 'respondent_id', 'respondent_id'))
+# read_survey makes respondent_id the index and returns the column schema
+df, schema = read_survey(file_path)
 
 # Identify Likert scale questions
-likert_questions = {"Q6", "Q15", "Q17", "Q26"}
+likert_questions = LIKERT_QUESTIONS
+
+# Pack the one-hot (non-Likert) columns once for the per-group counts
+bits = BitMatrix.from_frame(df.iloc[:, schema.binary_positions(exclude=likert_questions)])
 
 # --- DEMOGRAPHIC SECTION ---
-demographics = df.loc[:, df.columns.get_level_values(0) == "demographic"]
+demographic_questions = schema.questions("demographic")
 
 print("Available demographic variables:")
-print(demographics.columns.get_level_values(1).unique())
+print(demographic_questions)
 
 # === General function to analyze responses by demographic variable ===
 def analyze_by_demographic(demo_keyword: str): 
     """
     demo_keyword: string to match demographic question (e.g., 'age', 'gender', 'education', 'country').
     """
-    demo_cols = [col for col in demographics.columns if demo_keyword.lower() in col[1].lower()]
+    demo_questions = [q for q in demographic_questions if demo_keyword.lower() in q.lower()]
     
-    if not demo_cols:
+    if not demo_questions:
         print(f"No demographic columns found for keyword: {demo_keyword}")
         return
 
-    # Reconstruct single categorical column from one-hot encoding
-    demo_groups = demographics[demo_cols].idxmax(axis=1).apply(lambda x: x[2])
+    # Reconstruct single categorical column from one-hot encoding (across every matched question)
+    demo_groups = decode_onehot(df, schema, demo_questions)
 
     print(f"\n=== Analyzing survey responses by {demo_keyword.title()} ===")
     print("Groups detected:")
     print(demo_groups.value_counts())
 
     # Loop through survey questions
-    for question in df.columns.get_level_values(1).unique():
+    for question in schema.questions():
         if question in likert_questions:
-            data = df.loc[:, df.columns.get_level_values(1) == question].squeeze()
+            data = question_block(df, schema, question).squeeze()
             grouped = data.groupby(demo_groups).mean()
             print(f"\n--- {question} by {demo_keyword.title()} (mean Likert score) ---")
             print(grouped)
@@ -52,8 +53,8 @@ def analyze_by_demographic(demo_keyword: str):
             plt.tight_layout()
             plt.show()
         else:
-            data = df.loc[:, df.columns.get_level_values(1) == question]
-            counts = data.groupby(demo_groups).sum()
+            data = question_block(df, schema, question)
+            counts = bits.group_counts(demo_groups, columns=data.columns)
             percentages = (counts.T / counts.T.sum() * 100).T.round(1)
             
             print(f"\n--- {question} by {demo_keyword.title()} (percentage selecting each option) ---")
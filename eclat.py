@@ -0,0 +1,208 @@
+import numpy as np
+import pandas as pd
+from bitmatrix import popcount
+
+
+def _min_count(min_support, n_rows):
+    """Smallest respondent count that reaches min_support (a share of n_rows)."""
+    return max(1, int(np.ceil(min_support * n_rows - 1e-9)))
+
+
+def _row_counts(bits):
+    return popcount(bits).sum(axis=1, dtype=np.int64)
+
+
+def eclat_counts(bits, min_support=0.05, max_len=None, where=None):
+    """
+    Frequent itemsets of a BitMatrix as (item index tuples, counts, n).
+
+    Eclat: the tidset (respondent bitset) of every itemset is kept while the
+    search goes depth first, so extending an itemset by all of its candidate
+    items is one vectorized AND of its tidset with theirs plus a popcount.
+    Memory is bounded by the current search path, not by the number of
+    itemsets, and there is no candidate generation by levels.
+
+    where: optional respondent bitset (BitMatrix.rows_bitset); support is
+        then relative to the selected respondents
+    """
+    data = bits.bits if where is None else bits.bits & where
+    n = bits.n_rows if where is None else int(popcount(where).sum(dtype=np.int64))
+    if n == 0:
+        return [], np.zeros(0, dtype=np.int64), 0
+    min_count = _min_count(min_support, n)
+    max_len = max_len or bits.n_cols
+
+    itemsets, counts = [], []
+    singles = _row_counts(data)
+    frequent = np.flatnonzero(singles >= min_count)
+    for j in frequent:
+        itemsets.append((int(j),))
+        counts.append(int(singles[j]))
+
+    def extend(prefix, items, tidsets):
+        # items/tidsets: frequent extensions of prefix (each already appended)
+        if len(prefix) + 1 >= max_len:
+            return
+        for k in range(len(items) - 1):
+            joint = tidsets[k] & tidsets[k + 1:]
+            c = _row_counts(joint)
+            keep = c >= min_count
+            if not keep.any():
+                continue
+            child = prefix + (int(items[k]),)
+            ext_items, ext_tids = items[k + 1:][keep], joint[keep]
+            itemsets.extend(child + (int(j),) for j in ext_items)
+            counts.extend(c[keep].tolist())
+            extend(child, ext_items, ext_tids)
+
+    extend((), frequent, data[frequent])
+    return itemsets, np.array(counts, dtype=np.int64), n
+
+
+def closed_counts(bits, min_support=0.05, where=None, maximal=False):
+    """
+    Frequent closed itemsets (or only the maximal ones) as (item index
+    tuples, counts, n), by LCM's prefix-preserving closure extension.
+
+    An itemset is closed when no superset has the same support: its closure
+    (every item ticked by all of its respondents) is itself. Every node of
+    the search is a closed set P with tidset T; extending P by an item e
+    above the item that created it and taking the closure gives the next
+    closed set, kept only if the closure adds no item below e that P lacks,
+    so each closed set is reached exactly once and nothing is stored but the
+    search path. A closed set is maximal when no single item keeps it
+    frequent.
+    """
+    data = bits.bits if where is None else bits.bits & where
+    n = bits.n_rows if where is None else int(popcount(where).sum(dtype=np.int64))
+    if n == 0:
+        return [], np.zeros(0, dtype=np.int64), 0
+    min_count = _min_count(min_support, n)
+    frequent = np.flatnonzero(_row_counts(data) >= min_count)  # closures only ever use these
+    tids = data[frequent]
+    itemsets, counts = [], []
+
+    def closure(T):
+        return frozenset(np.flatnonzero(((tids & T) == T).all(axis=1)).tolist())
+
+    def visit(P, T, c, core):
+        ext = _row_counts(tids & T)
+        if P and (not maximal or not any(ext[e] >= min_count for e in range(len(frequent)) if e not in P)):
+            itemsets.append(tuple(int(frequent[e]) for e in sorted(P)))
+            counts.append(c)
+        for e in range(core + 1, len(frequent)):
+            if e in P or ext[e] < min_count:
+                continue
+            T2 = T & tids[e]
+            Q = closure(T2)
+            if any(q < e and q not in P for q in Q):
+                continue  # not prefix-preserving: reached from another branch
+            visit(Q, T2, int(ext[e]), e)
+
+    root = bits.all_rows() if where is None else where.copy()
+    visit(closure(root), root, n, -1)
+    return itemsets, np.array(counts, dtype=np.int64), n
+
+
+def eclat(bits, min_support=0.05, max_len=None, where=None, mode="all"):
+    """
+    Frequent itemsets of a BitMatrix in mlxtend's apriori format: a DataFrame
+    with "support" (share of respondents) and "itemsets" (frozensets of
+    column names), singletons included, ordered by length like apriori.
+    Usable directly with mlxtend.frequent_patterns.association_rules.
+
+    mode: "all" (every frequent itemset), "closed" (lossless: every frequent
+        itemset and its support can be recovered, see ClosedItemsets) or
+        "maximal" (only the largest frequent itemsets; their subsets are
+        frequent but their supports are lost). max_len applies to "all" only.
+    """
+    if mode == "all":
+        itemsets, counts, n = eclat_counts(bits, min_support, max_len, where)
+    elif mode in ("closed", "maximal"):
+        if max_len is not None:
+            raise ValueError("max_len only applies to mode='all' (a length cap would break closedness).")
+        itemsets, counts, n = closed_counts(bits, min_support, where, maximal=mode == "maximal")
+    else:
+        raise ValueError(f"Unknown mode {mode!r}; use 'all', 'closed' or 'maximal'.")
+    if not itemsets:
+        return pd.DataFrame({"support": pd.Series(dtype=float), "itemsets": pd.Series(dtype=object)})
+    order = sorted(range(len(itemsets)), key=lambda i: (len(itemsets[i]), itemsets[i]))
+    columns = bits.columns
+    return pd.DataFrame({
+        "support": counts[order] / n,
+        "itemsets": [frozenset(columns[j] for j in itemsets[i]) for i in order],
+    })
+
+
+class ClosedItemsets:
+    """
+    Support of any itemset from the frequent closed itemsets alone.
+
+    The support of an itemset is the largest support among the closed sets
+    that contain it (its closure). Closed sets are numbered by decreasing
+    support and every item keeps the ids of the closed sets holding it as
+    one Python-int bitset, so a lookup is a few big-int ANDs and taking the
+    lowest set bit.
+    """
+
+    def __init__(self, closed):
+        closed = closed.sort_values("support", ascending=False, kind="stable").reset_index(drop=True)
+        self.itemsets = list(closed["itemsets"])
+        self.supports = closed["support"].to_numpy()
+        self._postings = {}
+        for i, items in enumerate(self.itemsets):
+            for item in items:
+                self._postings[item] = self._postings.get(item, 0) | (1 << i)
+        self._all = (1 << len(self.itemsets)) - 1
+
+    def _closure_id(self, items):
+        ids = self._all
+        for item in items:
+            ids &= self._postings.get(item, 0)
+            if not ids:
+                return None
+        return (ids & -ids).bit_length() - 1
+
+    def closure(self, items):
+        """Closed itemset containing `items` with the same support (None if not frequent)."""
+        items = list(items)
+        if not items:  # the items every respondent ticked
+            return self.itemsets[0] if len(self.itemsets) and self.supports[0] == 1 else frozenset()
+        i = self._closure_id(items)
+        return None if i is None else self.itemsets[i]
+
+    def support(self, items):
+        """Support of `items` (None if it is below the mining min_support)."""
+        items = list(items)
+        if not items:
+            return 1.0
+        i = self._closure_id(items)
+        return None if i is None else float(self.supports[i])
+
+    def expand(self, max_len=None):
+        """
+        All frequent itemsets (mlxtend format) recovered from the closed ones.
+
+        Depth first over the items in sorted order, so every itemset is
+        generated once; the closed-set ids of the current itemset are carried
+        down and narrowed with one AND per extension, and the search stops
+        where no closed set contains the itemset.
+        """
+        items = sorted(self._postings)
+        found, supports = [], []
+
+        def grow(prefix, ids, start):
+            for i in range(start, len(items)):
+                sub = ids & self._postings[items[i]]
+                if not sub:
+                    continue
+                itemset = prefix + (items[i],)
+                found.append(frozenset(itemset))
+                supports.append(float(self.supports[(sub & -sub).bit_length() - 1]))
+                if max_len is None or len(itemset) < max_len:
+                    grow(itemset, sub, i + 1)
+
+        grow((), self._all, 0)
+        frame = pd.DataFrame({"support": supports, "itemsets": found})
+        order = frame["itemsets"].map(lambda s: (len(s), sorted(s)))
+        return frame.iloc[sorted(range(len(frame)), key=order.iloc.__getitem__)].reset_index(drop=True)
@@ -0,0 +1,121 @@
+from functools import partial
+import numpy as np
+import pandas as pd
+from scipy.linalg import orthogonal_procrustes
+from scipy.optimize import linear_sum_assignment
+from factor_analyzer.rotator import OBLIQUE_ROTATIONS
+from efa_session import EFASession, CorrFactorAnalyzer
+from efa_sweep import ROTATION_NAMES
+from polychoric import encode_ordinal, weighted_polychoric, smooth_correlation
+from reliability import cov_to_corr
+from resampling import bootstrap_weighted_stats, weighted_covariances, percentile_ci
+
+
+def align_loadings(loadings, target, oblique=False):
+    """
+    Align bootstrap loadings with the target so factor k means the same
+    thing in every replicate.
+
+    Orthogonal solutions are rotated (and reflected/permuted) onto the target
+    with orthogonal Procrustes. A rotation would undo an oblique solution's
+    own rotation and mix its correlated factors, so those are only permuted
+    (matching factors by the largest total |congruence|) and sign-flipped.
+    """
+    if not oblique:
+        T, _ = orthogonal_procrustes(loadings, target)
+        return loadings @ T
+    norms = np.linalg.norm(loadings, axis=0)[:, None] * np.linalg.norm(target, axis=0)[None, :]
+    congruence = loadings.T @ target / np.where(norms > 0, norms, 1)
+    rows, cols = linear_sum_assignment(-np.abs(congruence))
+    aligned = np.empty_like(loadings)
+    aligned[:, cols] = loadings[:, rows] * np.where(congruence[rows, cols] < 0, -1, 1)
+    return aligned
+
+
+def _replicate_loadings(X, W, n_factors, rotation, method, target, correlation, n_cat):
+    """Bootstrap statistic: aligned loadings of every resample in W, (B, p * m); NaN if a fit fails."""
+    out = np.full((len(W), target.size), np.nan)
+    if correlation == "pearson":
+        corrs = cov_to_corr(weighted_covariances(X, W))
+    else:
+        codes = X.astype(np.int16)
+    for b in range(len(W)):
+        R = corrs[b] if correlation == "pearson" else weighted_polychoric(codes, n_cat, W[b])
+        if np.isnan(R).any():
+            continue  # an item was constant in this resample
+        R, _ = smooth_correlation(R)
+        try:
+            fa = CorrFactorAnalyzer(n_factors=n_factors, rotation=rotation, method=method,
+                                    is_corr_matrix=True).fit(R)
+        except Exception:
+            continue
+        out[b] = align_loadings(fa.loadings_, target, rotation in OBLIQUE_ROTATIONS).ravel()
+    return out
+
+
+def efa_bootstrap(df, n_factors, rotation="varimax", method="minres", correlation="pearson",
+                  n_boot=2000, confidence=0.95, cross_loading=0.3, random_state=42, n_jobs=None,
+                  chunk=25):
+    """
+    Bootstrap stability of an EFA solution.
+
+    Respondents are resampled n_boot times (as multinomial weights), the model
+    is refitted on every resample's correlation matrix and the loadings are
+    aligned to the full-sample solution (Procrustes rotation for orthogonal
+    rotations, factor permutation and reflection for oblique ones). Pearson
+    matrices for a whole chunk of resamples come from one batched weighted
+    covariance; polychoric ones are re-estimated per resample from weighted
+    tables. Chunks of `chunk` replicates are spread over a process pool.
+
+    df: respondents x items (rows with missing values are dropped)
+    cross_loading: |loading| counted as a salient loading
+
+    Returns a dict with
+        "loadings": per item and factor the estimate, bootstrap mean, SE and
+                    percentile CI
+        "items": per item the primary factor, the share of replicates keeping
+                 it, and the share with salient loadings on two or more factors
+        "replicates": (n_ok, items, factors) aligned loadings
+        "n_failed": replicates whose fit failed
+    """
+    complete = df.dropna()
+    items = list(complete.columns)
+    rotation_name = ROTATION_NAMES.get(rotation, rotation)
+    session = EFASession.from_frame(complete, drop_columns=(), correlation=correlation)
+    target = session.fit(n_factors, rotation_name, method).loadings_
+
+    if correlation == "pearson":
+        X, n_cat = complete.to_numpy(dtype=np.float64), None
+    else:
+        codes, n_cat = encode_ordinal(complete)
+        X = codes.astype(np.float64)
+    statistic = partial(_replicate_loadings, n_factors=n_factors, rotation=rotation_name, method=method,
+                        target=target, correlation=correlation, n_cat=n_cat)
+    boot = bootstrap_weighted_stats({"efa": X}, {"efa": statistic}, n_boot=n_boot,
+                                    random_state=random_state, n_jobs=n_jobs, chunk=chunk)["efa"]
+
+    ok = ~np.isnan(boot).any(axis=1)
+    reps = boot[ok].reshape(-1, len(items), n_factors)
+    low, high = percentile_ci(reps, confidence)
+    factors = [f"Factor{f + 1}" for f in range(n_factors)]
+
+    loadings = pd.DataFrame({
+        "Item": np.repeat(items, n_factors),
+        "Factor": np.tile(factors, len(items)),
+        "Estimate": target.ravel(),
+        "Boot_Mean": reps.mean(axis=0).ravel(),
+        "SE": reps.std(axis=0, ddof=1).ravel(),
+        "CI_low": low.ravel(),
+        "CI_high": high.ravel(),
+    })
+
+    primary = np.abs(target).argmax(axis=1)
+    salient = np.abs(reps) >= cross_loading
+    item_table = pd.DataFrame({
+        "Item": items,
+        "Primary_Factor": [factors[f] for f in primary],
+        "Primary_Stability": (np.abs(reps).argmax(axis=2) == primary).mean(axis=0),
+        "Cross_Loading_Freq": (salient.sum(axis=2) >= 2).mean(axis=0),
+        "No_Salient_Loading_Freq": (salient.sum(axis=2) == 0).mean(axis=0),
+    })
+    return {"loadings": loadings, "items": item_table, "replicates": reps, "n_failed": int((~ok).sum())}
@@ -0,0 +1,204 @@
+import os
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+import pandas as pd
+from efa_session import EFASession
+from efa_sweep import ROTATION_NAMES
+from parallel_analysis import parallel_analysis
+from polychoric import polychoric_matrix
+from cfa_batch import cfa_batch, efa_groups, spec_from_groups
+from shared_data import SharedArray, attach_array
+
+FIT_COLUMNS = ("CFI", "TLI", "RMSEA", "Chi2", "DoF", "BIC")
+
+
+def stratified_halves(strata, rng):
+    """
+    Random exploration/confirmation split that halves every stratum (the odd
+    respondent of a stratum goes to either half at random).
+    Returns a boolean mask of the exploration half.
+    """
+    explore = np.zeros(len(strata), dtype=bool)
+    for s in np.unique(strata):
+        idx = rng.permutation(np.flatnonzero(strata == s))
+        k = len(idx) // 2 + int(rng.integers(0, len(idx) % 2 + 1))
+        explore[idx[:k]] = True
+    return explore
+
+
+def structure_signature(groups, columns):
+    """
+    Label of a factor structure that ignores factor names and order:
+    items in column order, factors ordered by their first item.
+    """
+    order = {c: i for i, c in enumerate(columns)}
+    factors = sorted((sorted(items, key=order.get) for items in groups.values()), key=lambda f: order[f[0]])
+    return " | ".join("+".join(f) for f in factors)
+
+
+def _correlation(half, correlation):
+    if correlation == "pearson":
+        return np.corrcoef(half.to_numpy(), rowvar=False)
+    return polychoric_matrix(half, n_jobs=1).to_numpy()
+
+
+# Worker state, set once per process by the pool initializer
+_WORKER = {}
+
+
+def _init_worker(spec, columns, strata, settings):
+    _WORKER.update(X=attach_array(spec) if isinstance(spec, tuple) else spec, columns=columns, strata=strata,
+                   settings=settings)
+
+
+def _explore(half, rng, s):
+    """EFA of one half: (factor count, {factor: items} simple structure)."""
+    corr = _correlation(half, s["correlation"])
+    n_factors = s["n_factors"]
+    if n_factors is None:
+        # random reference eigenvalues are Pearson ones, so compare with the Pearson matrix
+        pa_corr = corr if s["correlation"] == "pearson" else _correlation(half, "pearson")
+        pa = parallel_analysis(pa_corr, len(half), n_iter=s["pa_iter"], random_state=int(rng.integers(2**32)))
+        n_factors = max(pa["n_factors"], 1)
+    session = EFASession(corr, len(half), half.columns)
+    loadings = session.loadings(n_factors, ROTATION_NAMES.get(s["rotation"], s["rotation"]), s["method"])
+    return n_factors, efa_groups(loadings, s["threshold"])
+
+
+def _run_split(task):
+    split, seed = task
+    w, s = _WORKER, _WORKER["settings"]
+    rng = np.random.default_rng(seed)
+    explore = stratified_halves(w["strata"], rng)
+    data = pd.DataFrame(w["X"], columns=w["columns"])
+    halves = data[explore], data[~explore]
+    row = {"Split": split, "N_Explore": int(explore.sum()), "N_Confirm": int((~explore).sum())}
+    try:
+        n_factors, groups = _explore(halves[0], rng, s)
+        row.update({"N_Factors": n_factors, "Structure": structure_signature(groups, w["columns"])})
+        # the same EFA on the confirmation half tells whether the structure itself replicates
+        _, confirm_groups = _explore(halves[1], rng, s)
+        row["Confirm_Structure"] = structure_signature(confirm_groups, w["columns"])
+        row["Replicated"] = row["Confirm_Structure"] == row["Structure"]
+
+        specs = [spec_from_groups("Derived", groups)]
+        if s["reference_desc"]:
+            specs.append({"name": "Reference", "desc": s["reference_desc"], "parent": None})
+        if s["correlation"] == "pearson":
+            table, _ = cfa_batch(specs, data=halves[1], n_jobs=1)
+        else:
+            poly = polychoric_matrix(halves[1], n_jobs=1)
+            table, _ = cfa_batch(specs, cov=poly, n_samples=poly.attrs["n_obs"], n_jobs=1)
+        for prefix, (_, fit) in zip(("", "Ref_"), table.iterrows()):
+            row.update({prefix + c: fit.get(c, np.nan) for c in FIT_COLUMNS})
+            row[prefix + "CFA_Error"] = fit["Error"]
+        row["Error"] = ""
+    except Exception as e:  # one degenerate split should not stop the run
+        row["Error"] = f"{type(e).__name__}: {e}"
+    return row
+
+
+def _run_splits(tasks):
+    return [_run_split(t) for t in tasks]
+
+
+def efa_cfa_crossval(df, strata, n_splits=500, n_factors=None, rotation="oblimin", method="minres",
+                     correlation="pearson", threshold=0.4, reference_desc=None, pa_iter=200,
+                     random_state=42, n_jobs=None, chunk=10):
+    """
+    Repeated split-half EFA -> CFA cross-validation.
+
+    Every split halves the respondents within each stratum (e.g. country),
+    runs EFA on the exploration half (factor count from parallel analysis
+    unless n_factors is given, items assigned to their largest loading
+    >= threshold, see cfa_batch.efa_groups) and fits that structure as a CFA
+    on the confirmation half, together with reference_desc (e.g.
+    CFA.model_desc) when given. The EFA is repeated on the confirmation half to check whether
+    the structure itself replicates.
+
+    df: respondents x items (rows with missing items or strata are dropped)
+    strata: column name of df or Series aligned with df
+
+    The item data is placed in shared memory once; splits run in chunks of
+    `chunk` on a process pool. Split i always uses the i-th seed spawned from
+    random_state, so results do not depend on n_jobs or chunk.
+
+    Returns a dict with
+        "splits": one row per split (structures, fit of the derived and
+                  reference models, errors)
+        "structures": how often each derived structure occurs, how often it
+                      replicates on the confirmation half and its median fit
+        "fit": distribution (mean, SD, 2.5/50/97.5 percentiles) of the CFA fit
+               indices of the derived and reference models
+    """
+    key = df[strata] if isinstance(strata, str) else pd.Series(strata, index=df.index)
+    items = list(df.columns.drop(strata)) if isinstance(strata, str) else list(df.columns)
+    complete = df[items].assign(_strata=key).dropna()
+    X = complete[items].to_numpy(dtype=np.float64)
+    strata_codes = pd.factorize(complete["_strata"])[0]
+    settings = {"n_factors": n_factors, "rotation": rotation, "method": method, "correlation": correlation,
+                "threshold": threshold, "reference_desc": reference_desc, "pa_iter": pa_iter}
+
+    seeds = np.random.SeedSequence(random_state).spawn(n_splits)
+    tasks = [(i, seed) for i, seed in enumerate(seeds)]
+    chunks = [tasks[s:s + chunk] for s in range(0, len(tasks), chunk)]
+
+    n_jobs = n_jobs or os.cpu_count() or 1
+    if n_jobs == 1 or len(chunks) == 1:
+        _init_worker(X, items, strata_codes, settings)
+        rows = [r for c in chunks for r in _run_splits(c)]
+    else:
+        with SharedArray(X) as shared:
+            with ProcessPoolExecutor(max_workers=min(n_jobs, len(chunks)), initializer=_init_worker,
+                                     initargs=(shared.spec, items, strata_codes, settings)) as pool:
+                rows = [r for part in pool.map(_run_splits, chunks) for r in part]
+    splits = pd.DataFrame(rows)
+
+    ok = splits[splits["Error"] == ""]
+    structures = pd.DataFrame(columns=["Structure", "N_Factors", "Count", "Share", "Replication_Rate"])
+    if len(ok):
+        grouped = ok.groupby("Structure")
+        structures = pd.DataFrame({
+            "N_Factors": grouped["N_Factors"].first(),
+            "Count": grouped.size(),
+            "Share": grouped.size() / len(ok),
+            "Replication_Rate": grouped["Replicated"].mean(),
+            "CFI_Median": grouped["CFI"].median(),
+            "RMSEA_Median": grouped["RMSEA"].median(),
+        }).sort_values("Count", ascending=False).reset_index()
+
+    fit_rows = []
+    for model, prefix in (("Derived", ""), ("Reference", "Ref_")):
+        for c in ("CFI", "TLI", "RMSEA"):
+            if prefix + c not in ok:
+                continue
+            values = pd.to_numeric(ok[prefix + c], errors="coerce").dropna()
+            if not len(values):
+                continue
+            fit_rows.append({"Model": model, "Index": c, "Mean": values.mean(), "SD": values.std(),
+                             "P2.5": values.quantile(0.025), "Median": values.median(),
+                             "P97.5": values.quantile(0.975)})
+    return {"splits": splits, "structures": structures, "fit": pd.DataFrame(fit_rows)}
+
+
+if __name__ == "__main__":
+    from CFA import model_desc
+    from cfa_invariance import survey_groups
+
+    data_csv = "/Users/bazam/Library/CloudStorage/OneDrive-Personal/Documentos/academia/#PhD PLASTIC UNDERGROUND/7.1_excel/survey/data/database_awareness_questions.csv"
+    survey_csv = "/Users/bazam/Library/CloudStorage/OneDrive-Personal/Documentos/academia/#PhD PLASTIC UNDERGROUND/7.1_excel/survey_transformed_3.csv"
+    df = pd.read_csv(data_csv).set_index("respondent_id")
+    country = survey_groups(survey_csv, "Q33")  # country of residency, aligned on respondent_id
+
+    result = efa_cfa_crossval(df, country, n_splits=500, reference_desc=model_desc)
+    failed = result["splits"][result["splits"]["Error"] != ""]
+    if len(failed):
+        print(f"⚠️  {len(failed)} split(s) failed, e.g. {failed['Error'].iloc[0]}")
+    print("\n=== Structures found on the exploration halves ===")
+    print(result["structures"].round(3).to_string(index=False))
+    print("\n=== CFA fit on the confirmation halves ===")
+    print(result["fit"].round(3).to_string(index=False))
+    result["splits"].to_csv("EFA_CFA_crossval_splits.csv", index=False)
+    result["structures"].to_csv("EFA_CFA_crossval_structures.csv", index=False)
+    result["fit"].to_csv("EFA_CFA_crossval_fit.csv", index=False)
+    print("\n✅ Saved 'EFA_CFA_crossval_splits.csv', 'EFA_CFA_crossval_structures.csv' and 'EFA_CFA_crossval_fit.csv'")
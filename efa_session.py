@@ -0,0 +1,194 @@
+import json
+import os
+from datetime import datetime, timezone
+import numpy as np
+import pandas as pd
+from scipy.stats import chi2
+from factor_analyzer import FactorAnalyzer
+from survey_store import CACHE_DIR_NAME, file_digest, load_table
+from polychoric import polychoric_matrix
+
+SESSION_FORMAT = "efa-session"
+SESSION_VERSION = 1
+
+
+class CorrFactorAnalyzer(FactorAnalyzer):
+    """
+    FactorAnalyzer fitted on a correlation matrix (is_corr_matrix=True).
+    factor_analyzer's principal method standardizes its input as raw data,
+    so here it takes the leading eigenvectors of the correlation matrix instead.
+    """
+
+    def _arg_checker(self):
+        # the base class rejects method="principal" for correlation input
+        is_corr, self.is_corr_matrix = self.is_corr_matrix, False
+        try:
+            super()._arg_checker()
+        finally:
+            self.is_corr_matrix = is_corr
+
+    def _fit_principal(self, X):
+        values, vectors = np.linalg.eigh(X)
+        values, vectors = values[::-1][:self.n_factors], vectors[:, ::-1][:, :self.n_factors]
+        return vectors * np.sqrt(np.maximum(values, 0))
+
+
+class EFASession:
+    """
+    Correlation matrix of the EFA items, with its inverse and determinant,
+    computed once and shared by KMO, Bartlett, eigenvalues and every factor fit.
+
+    Build it from data with from_frame/from_csv; save()/load() keep the
+    correlation matrix so later runs with other n_factors or rotations never
+    touch the raw data again.
+    """
+
+    def __init__(self, corr, n_obs, columns, source=None):
+        self.corr = np.asarray(corr, dtype=np.float64)
+        self.n_obs = int(n_obs)
+        self.columns = list(columns)
+        self.source = dict(source or {})
+        self._inverse = None
+        self._logdet = None
+        self._eigenvalues = None
+        self._fits = {}
+
+    @classmethod
+    def from_frame(cls, df, drop_columns=("respondent_id",), source=None, correlation="pearson",
+                   cache_dir=None, n_jobs=None):
+        """
+        Correlation matrix over complete cases of all columns except drop_columns.
+
+        correlation: "pearson", or "polychoric" for ordinal/binary items
+            (see polychoric.polychoric_matrix; cache_dir and n_jobs are passed on)
+        """
+        df = df.drop(columns=[c for c in drop_columns if c in df.columns])
+        complete = df.dropna()
+        if len(complete) < len(df):
+            print(f"⚠️  EFA uses {len(complete)} complete cases ({len(df) - len(complete)} rows with missing values dropped)")
+        if correlation == "pearson":
+            corr = np.corrcoef(complete.to_numpy(dtype=np.float64), rowvar=False)
+        elif correlation == "polychoric":
+            poly = polychoric_matrix(complete, n_jobs=n_jobs, cache_dir=cache_dir)
+            if poly.attrs["smoothed"]:
+                print("⚠️  Polychoric matrix was not positive definite and has been smoothed")
+            corr = poly.to_numpy()
+        else:
+            raise ValueError(f"Unknown correlation {correlation!r}; use 'pearson' or 'polychoric'.")
+        source = dict(source or {}, correlation=correlation)
+        return cls(corr, len(complete), complete.columns, source)
+
+    @classmethod
+    def from_csv(cls, csv_path, cache_path=None, drop_columns=("respondent_id",), correlation="pearson",
+                 n_jobs=None):
+        """
+        Session for a survey CSV. With cache_path, a saved session is reused
+        while the CSV is unchanged (same content digest) and rebuilt otherwise.
+        Polychoric matrices are also cached in the CSV's cache folder.
+        """
+        digest = file_digest(csv_path)
+        if cache_path and os.path.exists(cache_path):
+            session = cls.load(cache_path)
+            if session.source.get("digest") == digest and session.source.get("correlation", "pearson") == correlation:
+                return session
+        cache_dir = os.path.join(os.path.dirname(os.path.abspath(csv_path)), CACHE_DIR_NAME)
+        session = cls.from_frame(load_table(csv_path), drop_columns,
+                                 source={"path": os.path.abspath(csv_path), "digest": digest},
+                                 correlation=correlation, cache_dir=cache_dir, n_jobs=n_jobs)
+        if cache_path:
+            session.save(cache_path)
+        return session
+
+    # --- cached matrix quantities ---
+    @property
+    def inverse(self):
+        if self._inverse is None:
+            # same fallback as factor_analyzer: pseudo-inverse for near-singular matrices
+            if np.linalg.det(self.corr) > np.finfo(np.float32).eps:
+                self._inverse = np.linalg.inv(self.corr)
+            else:
+                self._inverse = np.linalg.pinv(self.corr)
+        return self._inverse
+
+    @property
+    def logdet(self):
+        if self._logdet is None:
+            self._logdet = np.linalg.slogdet(self.corr)[1]
+        return self._logdet
+
+    def eigenvalues(self):
+        """Eigenvalues of the correlation matrix, largest first."""
+        if self._eigenvalues is None:
+            self._eigenvalues = np.linalg.eigvalsh(self.corr)[::-1]
+        return self._eigenvalues
+
+    # --- adequacy checks ---
+    def kmo(self):
+        """(KMO per item as a Series, overall KMO), as factor_analyzer.calculate_kmo."""
+        inv = self.inverse
+        d = np.sqrt(np.diag(inv))
+        partial = -inv / np.outer(d, d)
+        r = self.corr.copy()
+        np.fill_diagonal(partial, 0)
+        np.fill_diagonal(r, 0)
+        r2, p2 = r ** 2, partial ** 2
+        per_item = r2.sum(axis=0) / (r2.sum(axis=0) + p2.sum(axis=0))
+        overall = r2.sum() / (r2.sum() + p2.sum())
+        return pd.Series(per_item, index=self.columns), overall
+
+    def bartlett(self):
+        """(chi-square, p-value) of Bartlett's test of sphericity."""
+        p = len(self.columns)
+        statistic = -self.logdet * (self.n_obs - 1 - (2 * p + 5) / 6)
+        return statistic, chi2.sf(statistic, p * (p - 1) / 2)
+
+    # --- factor fits ---
+    def fit(self, n_factors=3, rotation="varimax", method="minres", **kwargs):
+        """Fitted FactorAnalyzer for these settings; repeated calls reuse the fit."""
+        key = (n_factors, rotation, method, tuple(sorted(kwargs.items())))
+        if key not in self._fits:
+            fa = CorrFactorAnalyzer(n_factors=n_factors, rotation=rotation, method=method,
+                                    is_corr_matrix=True, **kwargs)
+            self._fits[key] = fa.fit(self.corr)
+        return self._fits[key]
+
+    def loadings(self, n_factors=3, rotation="varimax", method="minres", **kwargs):
+        fa = self.fit(n_factors, rotation, method, **kwargs)
+        return pd.DataFrame(fa.loadings_, index=self.columns,
+                            columns=[f"Factor{i + 1}" for i in range(fa.loadings_.shape[1])])
+
+    def variance(self, n_factors=3, rotation="varimax", method="minres", **kwargs):
+        fa = self.fit(n_factors, rotation, method, **kwargs)
+        ss, prop, cum = fa.get_factor_variance()
+        return pd.DataFrame({
+            "Factor": [f"Factor{i + 1}" for i in range(len(ss))],
+            "SS Loadings": ss,
+            "Variance Explained (%)": prop * 100,
+            "Cumulative (%)": cum * 100,
+        })
+
+    # --- persistence ---
+    def to_dict(self):
+        return {
+            "format": SESSION_FORMAT,
+            "version": SESSION_VERSION,
+            "created": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+            "n_obs": self.n_obs,
+            "columns": self.columns,
+            "corr": self.corr.tolist(),
+            "source": self.source,
+        }
+
+    def save(self, path):
+        with open(path, "w") as f:
+            json.dump(self.to_dict(), f)
+
+    @classmethod
+    def load(cls, path):
+        with open(path) as f:
+            d = json.load(f)
+        if d.get("format") != SESSION_FORMAT:
+            raise ValueError(f"{path} is not a saved EFA session.")
+        if d.get("version", 0) > SESSION_VERSION:
+            raise ValueError(f"{path} was written by a newer version ({d['version']}) of efa_session.")
+        return cls(d["corr"], d["n_obs"], d["columns"], d.get("source"))
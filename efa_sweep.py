@@ -0,0 +1,157 @@
+import os
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+import pandas as pd
+from efa_session import EFASession
+
+METHODS = ("minres", "ml", "principal")
+ROTATIONS = ("varimax", "promax", "oblimin", "geomin")
+
+# factor_analyzer names for rotations that come in several flavours
+ROTATION_NAMES = {"geomin": "geomin_obl"}
+
+
+def efa_dof(p, m):
+    """Degrees of freedom of an m-factor model for p items."""
+    return ((p - m) ** 2 - (p + m)) / 2
+
+
+def fit_statistics(corr, n_obs, loadings, phi=None):
+    """
+    Fit of an EFA solution to the correlation matrix it was estimated from.
+
+    The implied matrix is L Phi L' with unit diagonal (uniquenesses 1 - h2),
+    so the statistics do not depend on the rotation. chi2 is the ML
+    discrepancy with Bartlett's correction; RMSEA, TLI (against the
+    independence model) and BIC follow from it; RMSR is the root mean square
+    off-diagonal residual.
+    """
+    p, m = loadings.shape
+    phi = np.eye(m) if phi is None else phi
+    implied = loadings @ phi @ loadings.T
+    np.fill_diagonal(implied, 1.0)
+    residual = corr - implied
+    off = ~np.eye(p, dtype=bool)
+
+    logdet_r = np.linalg.slogdet(corr)[1]
+    sign, logdet_s = np.linalg.slogdet(implied)
+    discrepancy = logdet_s - logdet_r + np.trace(np.linalg.solve(implied, corr)) - p if sign > 0 else np.nan
+    dof = efa_dof(p, m)
+    chi2 = (n_obs - 1 - (2 * p + 5) / 6 - 2 * m / 3) * discrepancy
+    chi2_null = -(n_obs - 1 - (2 * p + 5) / 6) * logdet_r
+    dof_null = p * (p - 1) / 2
+
+    if dof > 0:
+        rmsea = np.sqrt(max(chi2 - dof, 0) / (dof * (n_obs - 1)))
+        tli = (chi2_null / dof_null - chi2 / dof) / (chi2_null / dof_null - 1)
+    else:
+        rmsea = tli = np.nan
+    return {
+        "ML_Discrepancy": discrepancy,
+        "Chi2": chi2,
+        "DoF": dof,
+        "RMSEA": rmsea,
+        "TLI": tli,
+        "BIC": chi2 - dof * np.log(n_obs),
+        "RMSR": np.sqrt(np.mean(residual[off] ** 2)),
+    }
+
+
+# Worker state, set once per process by the pool initializer
+_WORKER = {}
+
+
+def _init_worker(corr, n_obs, columns):
+    _WORKER["session"] = EFASession(corr, n_obs, columns)
+
+
+def _fit_config(config):
+    n_factors, method, rotation = config
+    session = _WORKER["session"]
+    row = {"Model": f"{n_factors}f_{method}_{rotation or 'none'}", "N_Factors": n_factors,
+           "Method": method, "Rotation": rotation or "none"}
+    try:
+        fa = session.fit(n_factors, ROTATION_NAMES.get(rotation, rotation), method)
+    except Exception as e:  # a failed configuration should not stop the sweep
+        row["Error"] = f"{type(e).__name__}: {e}"
+        return row, None, None
+    loadings = fa.loadings_
+    ss, prop, cum = fa.get_factor_variance()
+    # fit does not depend on the rotation, so take it from the unrotated solution
+    # (factor_analyzer reorders rotated loadings without reordering phi_)
+    row.update(fit_statistics(session.corr, session.n_obs, session.fit(n_factors, None, method).loadings_))
+    row["Error"] = ""
+    return row, loadings, (ss, prop, cum)
+
+
+def efa_sweep(session, max_factors=None, methods=METHODS, rotations=ROTATIONS, n_jobs=None):
+    """
+    Fit every (factor count, extraction method, rotation) combination from the
+    session's correlation matrix, in parallel.
+
+    max_factors: largest factor count; defaults to the largest with
+        non-negative degrees of freedom
+    rotations: factor_analyzer rotation names; "geomin" means oblique geomin.
+        One-factor models are fitted once per method without rotation.
+
+    Returns (loadings, variance, fit) tidy DataFrames keyed by Model,
+    N_Factors, Method and Rotation.
+    """
+    p = len(session.columns)
+    if max_factors is None:
+        max_factors = max(m for m in range(1, p) if efa_dof(p, m) >= 0)
+    configs = []
+    for n in range(1, max_factors + 1):
+        for method in methods:
+            for rotation in ([None] if n == 1 else rotations):
+                configs.append((n, method, rotation))
+
+    initargs = (session.corr, session.n_obs, session.columns)
+    n_jobs = n_jobs or os.cpu_count() or 1
+    if n_jobs == 1:
+        _init_worker(*initargs)
+        results = [_fit_config(c) for c in configs]
+    else:
+        with ProcessPoolExecutor(max_workers=min(n_jobs, len(configs)),
+                                 initializer=_init_worker, initargs=initargs) as pool:
+            results = list(pool.map(_fit_config, configs))
+
+    keys = ["Model", "N_Factors", "Method", "Rotation"]
+    fit_rows, loading_rows, variance_rows = [], [], []
+    for row, loadings, variance in results:
+        fit_rows.append(row)
+        if loadings is None:
+            continue
+        key = {k: row[k] for k in keys}
+        for i, item in enumerate(session.columns):
+            for f in range(loadings.shape[1]):
+                loading_rows.append({**key, "Item": item, "Factor": f"Factor{f + 1}", "Loading": loadings[i, f]})
+        ss, prop, cum = variance
+        for f in range(len(ss)):
+            variance_rows.append({**key, "Factor": f"Factor{f + 1}", "SS Loadings": ss[f],
+                                  "Variance Explained (%)": prop[f] * 100, "Cumulative (%)": cum[f] * 100})
+    return pd.DataFrame(loading_rows), pd.DataFrame(variance_rows), pd.DataFrame(fit_rows)
+
+
+def save_sweep(sweep, prefix="EFA_sweep"):
+    loadings, variance, fit = sweep
+    loadings.to_csv(f"{prefix}_loadings.csv", index=False)
+    variance.to_csv(f"{prefix}_variance.csv", index=False)
+    fit.to_csv(f"{prefix}_fit.csv", index=False)
+    return [f"{prefix}_loadings.csv", f"{prefix}_variance.csv", f"{prefix}_fit.csv"]
+
+
+if __name__ == "__main__":
+    file_path = "/Users/bazam/Library/CloudStorage/OneDrive-Personal/Documentos/academia/#PhD PLASTIC UNDERGROUND/7.1_excel/survey/data/database_awareness_questions.csv"
+    session = EFASession.from_csv(file_path, cache_path="EFA_session.json", correlation="polychoric")
+
+    sweep = efa_sweep(session)
+    fit = sweep[2]
+    print("\n=== EFA sweep: fit by configuration ===\n")
+    print(fit.drop(columns="Error").round(3).to_string(index=False))
+    failed = fit[fit["Error"] != ""]
+    if len(failed):
+        print(f"\n⚠️  {len(failed)} configuration(s) failed:")
+        print(failed[["Model", "Error"]].to_string(index=False))
+    files = save_sweep(sweep)
+    print(f"\n✅ Saved {', '.join(files)}")
@@ -1,32 +1,31 @@
-import pandas as pd
-from kmodes.kprototypes import KPrototypes
+from cluster_sweep import load_knowledge_data, kprototypes_sweep
+from cluster_model import ClusterModel
 
-def cluster_knowledge(data_csv, n_clusters=4, output_csv="clusters.csv"):
+def cluster_knowledge(data_csv, n_clusters=4, output_csv="clusters.csv", sweep=None, model_path="cluster_model_k{n_clusters}.json"):
     """
     Cluster respondents based on knowledge score and demographic one-hot data.
     
     data_csv: /Users/bazam/Library/CloudStorage/OneDrive-Personal/Documentos/academia/#PhD PLASTIC UNDERGROUND/7.1_excel/survey/data/knowledge_database_clean.csv
     n_clusters: number of clusters (default 4)
     output_csv: path to save clustered data
+    sweep: optional result of kprototypes_sweep that already contains n_clusters
+    model_path: where to save the fitted model for assigning new respondents
+                (see cluster_model.assign_clusters), {n_clusters} is filled in; None to skip
     """
 
-    # Load dataset (skip first row of section headers, use second row for columns)
-    df = pd.read_csv(data_csv, header=1)
+    # Load dataset and find categorical (binary) vs numeric columns
+    df, respondent_ids, categorical_cols = load_knowledge_data(data_csv)
 
-    # Separate respondent_id
-    respondent_ids = df["respondent_id"]
-    df = df.drop(columns=["respondent_id"])
+    # K-Prototypes clustering (reuse a shared sweep if one was passed in)
+    if sweep is None:
+        sweep = kprototypes_sweep(df, categorical_cols, [n_clusters], n_init=10, random_state=42)
+    clusters = sweep[n_clusters]["labels"]
 
-    # Ensure numeric types are correct
-    df["Knowledge_score"] = df["Knowledge_score"].astype(float)
-
-    # Find categorical (binary) vs numeric columns
-    categorical_cols = [i for i, col in enumerate(df.columns) if set(df[col].unique()) <= {0, 1}]
-    numeric_cols = [i for i, col in enumerate(df.columns) if i not in categorical_cols]
-
-    # K-Prototypes clustering
-    kproto = KPrototypes(n_clusters=n_clusters, random_state=42, init='Huang', n_init=10)
-    clusters = kproto.fit_predict(df, categorical=categorical_cols)
+    # Keep the fitted prototypes so later waves can be assigned without refitting
+    if model_path:
+        model_path = model_path.format(n_clusters=n_clusters)
+        ClusterModel.from_sweep(df, categorical_cols, sweep[n_clusters], metadata={"source": data_csv}).save(model_path)
+        print(f"Cluster model saved to {model_path}")
 
     # Add cluster labels back to dataframe
     df_out = df.copy()
@@ -44,8 +43,9 @@ def cluster_knowledge(data_csv, n_clusters=4, output_csv="clusters.csv"):
 
     return df_out, cluster_summary
 
-df_clusters, summary = cluster_knowledge("/Users/bazam/Library/CloudStorage/OneDrive-Personal/Documentos/academia/#PhD PLASTIC UNDERGROUND/7.1_excel/survey/data/knowledge_database_clean.csv", n_clusters=4)
+if __name__ == "__main__":
+    df_clusters, summary = cluster_knowledge("/Users/bazam/Library/CloudStorage/OneDrive-Personal/Documentos/academia/#PhD PLASTIC UNDERGROUND/7.1_excel/survey/data/knowledge_database_clean.csv", n_clusters=4)
 
-# See first few clustered rows
-print(df_clusters.head())
+    # See first few clustered rows
+    print(df_clusters.head())
 
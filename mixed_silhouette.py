@@ -0,0 +1,126 @@
+import numpy as np
+import pandas as pd
+from scipy import stats
+
+
+def split_mixed(df, categorical_cols):
+    """
+    Split the clustering input into a float64 numeric block and a one-hot
+    block of the categorical columns. For one-hot rows, the number of
+    matching categorical values between two respondents is their dot
+    product, so mismatches = n_categorical - OH_i . OH_j.
+    """
+    X = df.to_numpy() if isinstance(df, pd.DataFrame) else np.asarray(df)
+    cat = list(categorical_cols)
+    num = [i for i in range(X.shape[1]) if i not in set(cat)]
+    Xnum = np.asarray(X[:, num], dtype=np.float64)
+
+    blocks = []
+    for j in cat:
+        _, codes = np.unique(X[:, j], return_inverse=True)
+        blocks.append(np.eye(codes.max() + 1, dtype=np.float64)[codes])
+    OH = np.hstack(blocks) if blocks else np.zeros((X.shape[0], 0))
+    return Xnum, OH, len(cat)
+
+
+def _block_rows(n, n_clusters, max_memory_mb):
+    # n-wide float64 arrays per block row: the distance row and the one-hot match row (the
+    # other terms are added in place), plus the K-wide cluster sums, means and silhouette
+    # inputs; the n x K cluster indicator matrix is allocated once
+    per_row = 8 * (2 * n + 3 * n_clusters)
+    budget = max_memory_mb * 1024 ** 2 - 8 * n * n_clusters
+    return int(max(1, min(n, budget // per_row)))
+
+
+def _silhouette_rows(rows, Xnum, sqn, OH, n_cat, gamma, codes, counts, max_memory_mb):
+    """Silhouette value of each respondent in `rows` against all respondents."""
+    n = Xnum.shape[0]
+    K = len(counts)
+    L = np.zeros((n, K))
+    L[np.arange(n), codes] = 1.0
+    out = np.empty(len(rows))
+    step = _block_rows(n, K, max_memory_mb)
+    for s in range(0, len(rows), step):
+        r = rows[s:s + step]
+        # K-Prototypes dissimilarity: squared Euclidean + gamma * mismatches
+        # (in place, so a block holds no n-wide temporaries beyond D and the match counts)
+        D = Xnum[r] @ Xnum.T
+        D *= -2.0
+        D += sqn[r, None]
+        D += sqn[None, :]
+        np.maximum(D, 0.0, out=D)
+        if n_cat:
+            M = OH[r] @ OH.T
+            M -= n_cat
+            M *= -gamma
+            D += M
+            del M
+        D[np.arange(len(r)), r] = 0.0
+
+        sums = D @ L  # block x clusters
+        own = codes[r]
+        own_n = counts[own]
+        with np.errstate(divide="ignore", invalid="ignore"):
+            a = sums[np.arange(len(r)), own] / (own_n - 1)
+            means = sums / counts[None, :]
+        means[np.arange(len(r)), own] = np.inf
+        b = means.min(axis=1)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            sil = (b - a) / np.maximum(a, b)
+        # singleton clusters score 0, as in sklearn
+        sil[own_n == 1] = 0.0
+        out[s:s + step] = np.nan_to_num(sil)
+    return out
+
+
+def mixed_silhouette(df, categorical_cols, labels, gamma, mode="exact", sample_size=1000,
+                     confidence=0.95, max_memory_mb=256, random_state=42):
+    """
+    Silhouette score under the K-Prototypes dissimilarity, computed in row
+    blocks so memory stays below max_memory_mb instead of needing an N x N
+    distance matrix.
+
+    mode="exact": every respondent is scored against all others.
+    mode="sample": a cluster-stratified sample of sample_size respondents is
+        scored exactly against all others; the mean is the stratified
+        estimate and a normal confidence interval is attached.
+
+    Returns a dict with silhouette, ci_low, ci_high, n_scored and mode.
+    """
+    Xnum, OH, n_cat = split_mixed(df, categorical_cols)
+    _, codes = np.unique(np.asarray(labels), return_inverse=True)
+    counts = np.bincount(codes).astype(np.float64)
+    n, K = len(codes), len(counts)
+    if K < 2:
+        raise ValueError("Silhouette needs at least 2 clusters.")
+    sqn = np.einsum("ij,ij->i", Xnum, Xnum)
+
+    if mode == "exact":
+        sil = _silhouette_rows(np.arange(n), Xnum, sqn, OH, n_cat, gamma, codes, counts, max_memory_mb)
+        value = float(sil.mean())
+        return {"silhouette": value, "ci_low": value, "ci_high": value, "n_scored": n, "mode": mode}
+
+    if mode != "sample":
+        raise ValueError(f"Unknown mode: {mode!r} (use 'exact' or 'sample').")
+
+    # proportional allocation, at least 2 per cluster so each stratum has a variance
+    rng = np.random.default_rng(random_state)
+    alloc = np.maximum(2, np.round(sample_size * counts / n)).astype(int)
+    alloc = np.minimum(alloc, counts.astype(int))
+    rows, strata = [], []
+    for h in range(K):
+        members = np.flatnonzero(codes == h)
+        rows.append(rng.choice(members, size=alloc[h], replace=False))
+        strata.append(np.full(alloc[h], h))
+    rows, strata = np.concatenate(rows), np.concatenate(strata)
+
+    sil = _silhouette_rows(rows, Xnum, sqn, OH, n_cat, gamma, codes, counts, max_memory_mb)
+    W = counts / n
+    means = np.array([sil[strata == h].mean() for h in range(K)])
+    variances = np.array([sil[strata == h].var(ddof=1) if alloc[h] > 1 else 0.0 for h in range(K)])
+    fpc = 1.0 - alloc / counts
+    value = float(np.sum(W * means))
+    se = float(np.sqrt(np.sum(W ** 2 * fpc * variances / alloc)))
+    z = stats.norm.ppf(0.5 + confidence / 2)
+    return {"silhouette": value, "ci_low": float(value - z * se), "ci_high": float(value + z * se),
+            "n_scored": int(len(rows)), "mode": mode}
@@ -0,0 +1,108 @@
+import numpy as np
+import pandas as pd
+import matplotlib.pyplot as plt
+
+
+def _reduce(R):
+    """Replace the diagonal with squared multiple correlations (common-factor eigenvalues)."""
+    R = R.copy()
+    smc = 1 - 1 / np.diagonal(np.linalg.pinv(R), axis1=-2, axis2=-1)
+    idx = np.arange(R.shape[-1])
+    R[..., idx, idx] = smc
+    return R
+
+
+def _batch_correlations(X):
+    """Correlation matrices of a stack of datasets (B, n, p) with one batched matmul."""
+    Z = X - X.mean(axis=1, keepdims=True)
+    Z /= np.sqrt((Z ** 2).sum(axis=1, keepdims=True))
+    return np.matmul(Z.transpose(0, 2, 1), Z)
+
+
+def random_eigenvalues(n_obs, n_items, n_iter=1000, data=None, method="normal", kind="pca",
+                       random_state=42, max_memory_mb=256):
+    """
+    Eigenvalues of n_iter random datasets shaped like the survey, largest first.
+
+    method: "normal" draws independent standard normal items; "permute"
+        shuffles every column of `data` independently (keeps the item
+        distributions, destroys the correlations)
+    kind: "pca" for correlation-matrix eigenvalues, "fa" for reduced
+        (SMC-diagonal) matrices as in common-factor parallel analysis
+
+    Datasets are generated in batches that fit in max_memory_mb and all
+    eigenvalues of a batch come from one stacked eigvalsh call.
+    """
+    if method == "permute":
+        if data is None:
+            raise ValueError("method='permute' needs the data.")
+        data = np.asarray(data, dtype=np.float64)
+        n_obs, n_items = data.shape
+    elif method != "normal":
+        raise ValueError(f"Unknown method {method!r}; use 'normal' or 'permute'.")
+
+    rng = np.random.default_rng(random_state)
+    batch = int(max(1, min(n_iter, max_memory_mb * 2**20 // (3 * n_obs * n_items * 8))))
+    out = np.empty((n_iter, n_items))
+    for start in range(0, n_iter, batch):
+        size = min(batch, n_iter - start)
+        if method == "normal":
+            X = rng.standard_normal((size, n_obs, n_items))
+        else:
+            order = rng.random((size, n_obs, n_items)).argsort(axis=1)
+            X = np.take_along_axis(np.broadcast_to(data, (size, n_obs, n_items)), order, axis=1)
+        R = _batch_correlations(X)
+        if kind == "fa":
+            R = _reduce(R)
+        out[start:start + size] = np.linalg.eigvalsh(R)[:, ::-1]
+    return out
+
+
+def parallel_analysis(corr, n_obs, data=None, n_iter=1000, method="normal", kind="pca",
+                      percentile=95, random_state=42, max_memory_mb=256):
+    """
+    Horn's parallel analysis: keep the leading factors whose observed eigenvalue
+    exceeds the chosen percentile of the random-data eigenvalues.
+
+    corr, n_obs: observed correlation matrix and sample size (e.g. an EFASession)
+    data: raw item data, only needed for method="permute"
+
+    Returns a dict with "n_factors", a per-factor "table" (observed, random
+    mean and percentile threshold) and the raw "random" eigenvalues.
+    """
+    corr = np.asarray(corr, dtype=np.float64)
+    observed = np.linalg.eigvalsh(_reduce(corr) if kind == "fa" else corr)[::-1]
+    random = random_eigenvalues(n_obs, corr.shape[0], n_iter, data, method, kind,
+                                random_state, max_memory_mb)
+    threshold = np.percentile(random, percentile, axis=0)
+
+    above = observed > threshold
+    n_factors = int(np.argmin(above)) if not above.all() else len(above)
+    table = pd.DataFrame({
+        "Factor": np.arange(1, len(observed) + 1),
+        "Observed": observed,
+        "Random_Mean": random.mean(axis=0),
+        f"Random_P{percentile:g}": threshold,
+        "Retain": np.arange(len(observed)) < n_factors,
+    })
+    return {"n_factors": n_factors, "table": table, "random": random,
+            "settings": {"n_iter": n_iter, "method": method, "kind": kind, "percentile": percentile}}
+
+
+def plot_parallel_analysis(result, path, title="Parallel Analysis"):
+    """Scree plot of observed vs random eigenvalues, saved to `path` (never shown)."""
+    table = result["table"]
+    threshold_col = [c for c in table.columns if c.startswith("Random_P")][0]
+    fig, ax = plt.subplots(figsize=(6, 4))
+    ax.plot(table["Factor"], table["Observed"], "o-", linewidth=2, label="Observed")
+    ax.plot(table["Factor"], table[threshold_col], "s--", color="red",
+            label=f"Random ({threshold_col.replace('Random_P', '')}th percentile)")
+    ax.axvline(result["n_factors"] + 0.5, color="grey", linestyle=":", linewidth=1)
+    ax.set_title(f"{title} (retain {result['n_factors']})")
+    ax.set_xlabel("Factor Number")
+    ax.set_ylabel("Eigenvalue")
+    ax.legend()
+    fig.tight_layout()
+    fig.savefig(path, dpi=150)
+    plt.close(fig)
+    return path
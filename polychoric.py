@@ -0,0 +1,212 @@
+import hashlib
+import os
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+import pandas as pd
+from scipy.optimize import minimize_scalar
+from scipy.stats import norm
+
+# Gauss-Legendre rule for the bivariate normal integral
+GL_NODES, GL_WEIGHTS = np.polynomial.legendre.leggauss(32)
+
+# Thresholds beyond +/- BOUND stand in for infinity (Phi(10) == 1 in float64)
+BOUND = 10.0
+
+# Bump when the estimator changes so cached matrices are recomputed
+POLYCHORIC_VERSION = 1
+
+
+def bivariate_normal_cdf(h, k, rho):
+    """
+    P(X <= h, Y <= k) for a standard bivariate normal with correlation rho,
+    for arrays h, k (broadcast together) and a scalar rho.
+
+    Uses Sheppard's formula in the angle form
+        Phi(h) Phi(k) + 1/(2 pi) * int_0^asin(rho) exp(-(h^2 + k^2 - 2hk sin t) / (2 cos^2 t)) dt,
+    whose integrand is smooth even close to |rho| = 1.
+    """
+    h, k = np.broadcast_arrays(np.asarray(h, dtype=np.float64), np.asarray(k, dtype=np.float64))
+    a = np.arcsin(rho)
+    t = 0.5 * a * (GL_NODES + 1)
+    s, c2 = np.sin(t), np.cos(t) ** 2
+    hh, kk = h[..., None], k[..., None]
+    integrand = np.exp(-(hh ** 2 + kk ** 2 - 2 * hh * kk * s) / (2 * c2))
+    return norm.cdf(h) * norm.cdf(k) + 0.5 * a * (integrand @ GL_WEIGHTS) / (2 * np.pi)
+
+
+def encode_ordinal(df):
+    """
+    Integer codes 0..c-1 of every column (sorted observed values), -1 for missing.
+    Returns (codes array, number of categories per column).
+    """
+    codes = np.full(df.shape, -1, dtype=np.int16)
+    n_cat = []
+    for j, col in enumerate(df.columns):
+        values = df[col].to_numpy()
+        present = ~pd.isna(values)
+        levels, inverse = np.unique(values[present], return_inverse=True)
+        codes[present, j] = inverse
+        n_cat.append(len(levels))
+    return codes, np.array(n_cat)
+
+
+def item_thresholds(codes, n_cat, weights=None):
+    """
+    Normal thresholds of every item from its marginal proportions (computed
+    once per item), padded with -BOUND/+BOUND: item j gets n_cat[j] + 1 values.
+    weights: optional per-respondent frequency weights (e.g. bootstrap counts)
+    """
+    out = []
+    for j, c in enumerate(n_cat):
+        x = codes[:, j]
+        ok = x >= 0
+        counts = np.bincount(x[ok], weights=None if weights is None else weights[ok], minlength=c)
+        cum = np.cumsum(counts)[:-1] / counts.sum()
+        out.append(np.concatenate([[-BOUND], np.clip(norm.ppf(cum), -BOUND, BOUND), [BOUND]]))
+    return out
+
+
+def _cell_probabilities(ta, tb, rho):
+    F = bivariate_normal_cdf(ta[:, None], tb[None, :], rho)
+    return F[1:, 1:] - F[:-1, 1:] - F[1:, :-1] + F[:-1, :-1]
+
+
+def pair_correlation(table, ta, tb):
+    """
+    Two-step polychoric correlation of one contingency table: thresholds are
+    fixed at their marginal estimates, so the likelihood is maximised over
+    rho alone (a bounded 1-D search instead of a joint fit).
+    """
+    if table.shape[0] < 2 or table.shape[1] < 2:
+        return np.nan
+    nz = table > 0
+    counts = table[nz]
+
+    def negloglik(rho):
+        return -(counts * np.log(np.maximum(_cell_probabilities(ta, tb, rho)[nz], 1e-300))).sum()
+
+    res = minimize_scalar(negloglik, bounds=(-0.9999, 0.9999), method="bounded", options={"xatol": 1e-7})
+    return res.x
+
+
+# Worker state, set once per process by the pool initializer
+_WORKER = {}
+
+
+def _init_worker(codes, n_cat, thresholds):
+    _WORKER.update(codes=codes, n_cat=n_cat, thresholds=thresholds)
+
+
+def _pair_table(codes, n_cat, i, j, weights=None):
+    x, y = codes[:, i], codes[:, j]
+    ok = (x >= 0) & (y >= 0)
+    ci, cj = n_cat[i], n_cat[j]
+    w = None if weights is None else weights[ok]
+    return np.bincount(x[ok] * cj + y[ok], weights=w, minlength=ci * cj).reshape(ci, cj)
+
+
+def _fit_pairs(pairs):
+    codes, n_cat, thresholds = _WORKER["codes"], _WORKER["n_cat"], _WORKER["thresholds"]
+    return [(i, j, pair_correlation(_pair_table(codes, n_cat, i, j), thresholds[i], thresholds[j]))
+            for i, j in pairs]
+
+
+def weighted_polychoric(codes, n_cat, weights):
+    """
+    Polychoric matrix of coded data (see encode_ordinal) under per-respondent
+    frequency weights, e.g. one bootstrap resample. Serial and uncached:
+    meant to run inside workers that each handle many resamples.
+    """
+    thresholds = item_thresholds(codes, n_cat, weights)
+    p = len(n_cat)
+    R = np.eye(p)
+    for i in range(p):
+        for j in range(i + 1, p):
+            R[i, j] = R[j, i] = pair_correlation(_pair_table(codes, n_cat, i, j, weights),
+                                                 thresholds[i], thresholds[j])
+    return R
+
+
+def smooth_correlation(R, eps=1e-6):
+    """
+    Nearest-looking positive definite correlation matrix: eigenvalues below
+    eps are raised to eps and the result is rescaled to a unit diagonal.
+    Returns (matrix, whether smoothing was needed).
+    """
+    values, vectors = np.linalg.eigh(R)
+    if values.min() >= eps:
+        return R, False
+    S = (vectors * np.maximum(values, eps)) @ vectors.T
+    d = np.sqrt(np.diag(S))
+    S = S / np.outer(d, d)
+    np.fill_diagonal(S, 1.0)
+    return S, True
+
+
+def _data_digest(codes, columns, smooth):
+    h = hashlib.blake2b(digest_size=16)
+    h.update(np.ascontiguousarray(codes).tobytes())
+    h.update(repr((list(map(str, columns)), codes.shape, smooth, POLYCHORIC_VERSION)).encode())
+    return h.hexdigest()
+
+
+def polychoric_matrix(df, n_jobs=None, cache_dir=None, smooth=True, chunk_size=25):
+    """
+    Polychoric (tetrachoric for binary items) correlation matrix of all
+    columns of df, using pairwise complete observations.
+
+    Thresholds are estimated once per item; every pair then needs only a 1-D
+    likelihood search, and the pairs are spread over a process pool in chunks
+    of chunk_size. With cache_dir, the matrix is stored under a hash of the
+    coded data and reused on later calls with the same data.
+
+    smooth: make the matrix positive definite (see smooth_correlation) so it
+        can go straight into FactorAnalyzer or a semopy fit
+
+    Returns a DataFrame (items x items); attrs["n_obs"] holds the number of
+    complete cases and attrs["smoothed"] whether smoothing changed it.
+    """
+    columns = list(df.columns)
+    codes, n_cat = encode_ordinal(df)
+    n_obs = int(np.all(codes >= 0, axis=1).sum())
+
+    cache_path = None
+    if cache_dir:
+        cache_path = os.path.join(cache_dir, f"polychoric.{_data_digest(codes, columns, smooth)}.npz")
+        if os.path.exists(cache_path):
+            with np.load(cache_path) as f:
+                out = pd.DataFrame(f["corr"], index=columns, columns=columns)
+                out.attrs.update(n_obs=n_obs, smoothed=bool(f["smoothed"]))
+                return out
+
+    thresholds = item_thresholds(codes, n_cat)
+    p = len(columns)
+    pairs = [(i, j) for i in range(p) for j in range(i + 1, p)]
+    chunks = [pairs[s:s + chunk_size] for s in range(0, len(pairs), chunk_size)]
+
+    n_jobs = n_jobs or os.cpu_count() or 1
+    if n_jobs == 1 or len(chunks) <= 1:
+        _init_worker(codes, n_cat, thresholds)
+        results = [_fit_pairs(c) for c in chunks]
+    else:
+        with ProcessPoolExecutor(max_workers=min(n_jobs, len(chunks)), initializer=_init_worker,
+                                 initargs=(codes, n_cat, thresholds)) as pool:
+            results = list(pool.map(_fit_pairs, chunks))
+
+    R = np.eye(p)
+    for part in results:
+        for i, j, r in part:
+            R[i, j] = R[j, i] = r
+    smoothed = False
+    if smooth and not np.isnan(R).any():
+        R, smoothed = smooth_correlation(R)
+
+    if cache_path:
+        os.makedirs(cache_dir, exist_ok=True)
+        tmp = cache_path + ".tmp.npz"
+        np.savez(tmp, corr=R, smoothed=smoothed)
+        os.replace(tmp, cache_path)
+
+    out = pd.DataFrame(R, index=columns, columns=columns)
+    out.attrs.update(n_obs=n_obs, smoothed=smoothed)
+    return out
@@ -1,6 +1,8 @@
 import pandas as pd
 import scipy.stats as stats
 import numpy as np
+from bitmatrix import BitMatrix
+from chi_square_batch import chi2_pairs
 
 # Load binary survey dataset (already one-hot encoded, Likert transformed to binary)
 # this code runs for the file survey_transformed_4 in which all the data is one-hot encoded.
@@ -14,7 +16,7 @@ def cramers_v(confusion_matrix):
     r, k = confusion_matrix.shape
     return np.sqrt(phi2 / min(k - 1, r - 1))
 
-def test_relationships_binary(df, comparisons_csv, alpha=0.05, output_csv="relationship_tests.csv"):
+def test_relationships_binary(df, comparisons_csv, alpha=0.05, output_csv="relationship_tests.csv", min_expected=5):
     """
     Run chi-square tests for binary vs binary variables from a comparisons list.
 
@@ -22,31 +24,57 @@ def test_relationships_binary(df, comparisons_csv, alpha=0.05, output_csv="relat
     comparisons_csv: path to CSV file with antecedent and consequent columns.
     alpha: significance threshold.
     output_csv: where to save results.
+    min_expected: warn about pairs with an expected cell count below this.
     """
 
+    # Pack the 0/1 columns once; 2x2 tables then come from popcounts
+    binary_cols = [c for c in df.columns if df[c].isin([0, 1]).all()]
+    bits = BitMatrix.from_frame(df[binary_cols])
+
     # Load comparisons list
     comps = pd.read_csv("/Users/bazam/Library/CloudStorage/OneDrive-Personal/Documentos/academia/#PhD PLASTIC UNDERGROUND/7.1_excel/antecedents_consequents.csv").fillna("")
-    results = []
 
-    
-    for _, row in comps.iterrows():
-        antecedent = row["Antecedent"].strip()
-        consequents = [c.strip() for c in row[1:].tolist() if isinstance(c, str) and c.strip() != ""]
+    # Flatten to (antecedent, consequent) pairs, keeping row then column order
+    antecedents = comps["Antecedent"].astype(str).str.strip().to_numpy()
+    cons_block = comps.iloc[:, 1:].to_numpy(dtype=object)
+    pairs = [
+        (antecedents[i], c.strip())
+        for i in range(len(comps))
+        for c in cons_block[i]
+        if isinstance(c, str) and c.strip() != ""
+    ]
 
-        for cons in consequents:
-            if antecedent not in df.columns or cons not in df.columns:
-                results.append((antecedent, cons, "Chi-square", None, None, None, False, "Column missing"))
-                continue
+    # All binary pairs go through the batched engine in one call
+    binary_set = set(binary_cols)
+    batch = [(a, c) for a, c in pairs if a in binary_set and c in binary_set]
+    batch_results = {}
+    if batch:
+        tests = chi2_pairs(bits, [a for a, _ in batch], [c for _, c in batch])
+        low = tests[tests["MinExpected"] < min_expected]
+        if not low.empty:
+            print(f"⚠️ {len(low)} pair(s) have expected counts below {min_expected}; chi-square may be unreliable:")
+            print(low[["Antecedent", "Consequent", "MinExpected"]].to_string(index=False))
+        for a, c, chi2, p, v in zip(tests["Antecedent"], tests["Consequent"], tests["Chi2"], tests["p-value"], tests["CramersV"]):
+            batch_results[(a, c)] = (a, c, "Chi-square", chi2, p, v, p < alpha, "OK")
+
+    results = []
+    for antecedent, cons in pairs:
+        if antecedent not in df.columns or cons not in df.columns:
+            results.append((antecedent, cons, "Chi-square", None, None, None, False, "Column missing"))
+            continue
+        if (antecedent, cons) in batch_results:
+            results.append(batch_results[(antecedent, cons)])
+            continue
 
-            # Crosstab
-            table = pd.crosstab(df[antecedent], df[cons])
+        # Non-binary columns: per-pair crosstab
+        table = pd.crosstab(df[antecedent], df[cons])
 
-            try:
-                chi2, p, dof, expected = stats.chi2_contingency(table)
-                v = cramers_v(table)
-                results.append((antecedent, cons, "Chi-square", chi2, p, v, p < alpha, "OK"))
-            except Exception as e:
-                results.append((antecedent, cons, "ERROR", None, None, None, False, str(e)))
+        try:
+            chi2, p, dof, expected = stats.chi2_contingency(table)
+            v = cramers_v(table)
+            results.append((antecedent, cons, "Chi-square", chi2, p, v, p < alpha, "OK"))
+        except Exception as e:
+            results.append((antecedent, cons, "ERROR", None, None, None, False, str(e)))
 
     # Save results
     results_df = pd.DataFrame(
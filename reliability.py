@@ -0,0 +1,289 @@
+from functools import partial
+import numpy as np
+import pandas as pd
+from resampling import bootstrap_covariance_stats, percentile_ci
+
+
+def item_covariance(df, items=None):
+    """
+    Covariance matrix of the items over complete cases.
+    Returns (cov DataFrame, number of respondents used).
+    """
+    data = df if items is None else df[list(items)]
+    data = data.dropna(axis=0)
+    X = data.to_numpy(dtype=np.float64)
+    return pd.DataFrame(np.cov(X, rowvar=False, ddof=1), index=data.columns, columns=data.columns), len(X)
+
+
+def reliability_from_cov(cov):
+    """
+    Reliability statistics of one scale from its item covariance matrix,
+    all as O(k^2) algebra on the matrix (no pass over respondents).
+
+    Returns (scale dict, item DataFrame) where the item table holds
+    alpha-if-item-deleted and corrected item-total correlations.
+    """
+    C = np.asarray(cov, dtype=np.float64)
+    items = list(cov.index) if isinstance(cov, pd.DataFrame) else list(range(len(C)))
+    k = len(C)
+    diag = np.diag(C)
+    trace = diag.sum()
+    total = C.sum()
+    row = C.sum(axis=1)
+
+    sd = np.sqrt(diag)
+    R = C / np.outer(sd, sd)
+    off = R[~np.eye(k, dtype=bool)]
+    mean_r = off.mean() if k > 1 else np.nan
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        alpha = k / (k - 1) * (1 - trace / total) if k > 1 else np.nan
+        std_alpha = k * mean_r / (1 + (k - 1) * mean_r) if k > 1 else np.nan
+
+        # dropping item i: trace - C_ii and total - 2 * rowsum_i + C_ii
+        rest_var = total - 2 * row + diag
+        if k > 2:
+            alpha_deleted = (k - 1) / (k - 2) * (1 - (trace - diag) / rest_var)
+        else:
+            alpha_deleted = np.full(k, np.nan)
+        item_total = (row - diag) / np.sqrt(diag * rest_var)
+
+    scale = {
+        "N_Items": k,
+        "Cronbach_Alpha": alpha,
+        "Standardized_Alpha": std_alpha,
+        "Mean_Inter_Item_Corr": mean_r,
+        "Min_Inter_Item_Corr": off.min() if k > 1 else np.nan,
+        "Max_Inter_Item_Corr": off.max() if k > 1 else np.nan,
+        "Mean_Item-Total_Corr": np.mean(item_total),
+    }
+    item_table = pd.DataFrame({
+        "Item": items,
+        "Corrected_Item-Total_Corr": item_total,
+        "Alpha_If_Deleted": alpha_deleted,
+    })
+    return scale, item_table
+
+
+def scale_reliability(df, scales):
+    """
+    Reliability of several scales at once.
+
+    df: respondents x items
+    scales: {"scale_name": [item columns]}
+
+    One covariance matrix is computed for all items used by any scale and
+    every scale is read off its sub-matrix. If the items have missing values
+    each scale falls back to its own complete cases, as in the per-scale
+    scripts, so results do not change with the set of scales requested.
+
+    Returns (summary DataFrame, one row per scale; item DataFrame, one row
+    per scale item).
+    """
+    all_items = list(dict.fromkeys(c for items in scales.values() for c in items))
+    shared_cov = None
+    if not df[all_items].isna().any().any():
+        shared_cov, n = item_covariance(df, all_items)
+
+    summary, details = [], []
+    for name, items in scales.items():
+        if shared_cov is not None:
+            cov, n_used = shared_cov.loc[items, items], n
+        else:
+            cov, n_used = item_covariance(df, items)
+        scale, item_table = reliability_from_cov(cov)
+        summary.append({"Group": name, "N": n_used, **scale})
+        item_table.insert(0, "Group", name)
+        details.append(item_table)
+
+    if not details:  # no scale to score: empty tables with the usual columns
+        return (pd.DataFrame(columns=["Group", "N", "N_Items", "Cronbach_Alpha", "Standardized_Alpha",
+                                      "Mean_Inter_Item_Corr", "Min_Inter_Item_Corr", "Max_Inter_Item_Corr",
+                                      "Mean_Item-Total_Corr"]),
+                pd.DataFrame(columns=["Group", "Item", "Corrected_Item-Total_Corr", "Alpha_If_Deleted"]))
+    return pd.DataFrame(summary), pd.concat(details, ignore_index=True)
+
+
+def cronbach_alpha(df):
+    """
+    Cronbach's alpha for a dataframe of items (rows = respondents, columns = items),
+    using complete cases.
+    """
+    cov, _ = item_covariance(df)
+    k = cov.shape[0]
+    C = cov.to_numpy()
+    return (k / (k - 1)) * (1 - np.trace(C) / C.sum())
+
+
+def item_total_corr(df_subset):
+    """Corrected item-total correlation of each item (item vs sum of the others)."""
+    cov, _ = item_covariance(df_subset)
+    _, item_table = reliability_from_cov(cov)
+    return dict(zip(item_table["Item"], item_table["Corrected_Item-Total_Corr"]))
+
+
+# --- McDonald's omega ---
+
+def cov_to_corr(cov):
+    """Correlation matrix (or stack of them) from covariance."""
+    sd = np.sqrt(np.diagonal(cov, axis1=-2, axis2=-1))
+    return cov / (sd[..., :, None] * sd[..., None, :])
+
+
+def one_factor_loadings(R, method="minres", max_iter=1000, tol=1e-7):
+    """
+    Standardized loadings of a one-factor model fitted to a correlation
+    matrix, or to a stack of them (B, k, k) all at once.
+
+    minres: iterated principal-axis factoring (converges to the minres/ULS fit)
+    ml: Lawley's fixed-point iteration for maximum likelihood
+
+    Communalities are kept in [0.005, 0.995] so Heywood cases stay finite.
+    Signs are chosen so the loadings sum to a positive value.
+    """
+    if method not in ("minres", "ml"):
+        raise ValueError(f"Unknown method {method!r}; use 'minres' or 'ml'.")
+    R = np.asarray(R, dtype=np.float64)
+    single = R.ndim == 2
+    if single:
+        R = R[None]
+    k = R.shape[-1]
+    diag = np.eye(k, dtype=bool)
+
+    # start from squared multiple correlations
+    h2 = np.clip(1 - 1 / np.diagonal(np.linalg.pinv(R), axis1=1, axis2=2), 0.005, 0.995)
+    lam = np.sqrt(h2)
+    active = np.arange(len(R))  # only matrices that have not converged are iterated
+    if k <= 3:
+        # just-identified: every method reproduces the correlations exactly,
+        # so use the closed form and iterate only the Heywood cases
+        lam, ok = _just_identified_loadings(R)
+        h2 = np.clip(lam ** 2, 0.005, 0.995)
+        active = active[~ok]
+    for _ in range(max_iter):
+        if not len(active):
+            break
+        Ra, ha = R[active], h2[active]
+        if method == "minres":
+            Ra[:, diag] = ha
+            w, v = np.linalg.eigh(Ra)
+            la = v[..., -1] * np.sqrt(np.maximum(w[..., -1], 0))[:, None]
+        else:
+            psi_sqrt = np.sqrt(1 - ha)
+            S = Ra / (psi_sqrt[:, :, None] * psi_sqrt[:, None, :])
+            w, v = np.linalg.eigh(S)
+            la = psi_sqrt * v[..., -1] * np.sqrt(np.maximum(w[..., -1] - 1, 0))[:, None]
+        new = np.clip(la ** 2, 0.005, 0.995)
+        lam[active], h2[active] = la, new
+        active = active[np.max(np.abs(new - ha), axis=1) >= tol]
+
+    lam = np.sign(lam) * np.sqrt(h2)
+    lam *= np.where(lam.sum(axis=1) < 0, -1.0, 1.0)[:, None]
+    return lam[0] if single else lam
+
+
+def _just_identified_loadings(R):
+    """
+    Closed-form one-factor loadings for 2 or 3 items (2 items: equal loadings).
+    Returns (loadings, ok) where ok marks solutions inside (0.005, 0.995).
+    """
+    if R.shape[-1] == 2:
+        r = R[:, 0, 1]
+        h2 = np.column_stack([np.abs(r), np.abs(r)])
+        sign = np.column_stack([np.ones_like(r), np.sign(r)])
+    else:
+        r01, r02, r12 = R[:, 0, 1], R[:, 0, 2], R[:, 1, 2]
+        with np.errstate(divide="ignore", invalid="ignore"):
+            h2 = np.column_stack([r01 * r02 / r12, r01 * r12 / r02, r02 * r12 / r01])
+        sign = np.column_stack([np.ones_like(r01), np.sign(r01), np.sign(r02)])
+    ok = np.all((h2 > 0.005) & (h2 < 0.995), axis=1)
+    return sign * np.sqrt(np.clip(np.nan_to_num(h2), 0, None)), ok
+
+
+def omega_from_loadings(R, loadings):
+    """
+    (omega_total, omega_total_observed) of a one-factor solution.
+    omega_t = (sum l)^2 / ((sum l)^2 + sum psi) uses the model-implied total
+    variance; omega_obs = (sum l)^2 / 1'R1 the observed one, so it is lower
+    when residual correlations are positive. With one factor there is no
+    general/group split, so neither is omega hierarchical.
+    Works on single matrices or stacks.
+    """
+    common = loadings.sum(axis=-1) ** 2
+    unique = (1 - loadings ** 2).sum(axis=-1)
+    return common / (common + unique), common / R.sum(axis=(-2, -1))
+
+
+def _omega_stat(cov, scale_index, method):
+    """Bootstrap statistic: omega_t and omega_obs of each scale, (B, 2 * n_scales)."""
+    out = []
+    for idx in scale_index:
+        R = cov_to_corr(cov[:, idx][:, :, idx])
+        omega_t, omega_obs = omega_from_loadings(R, one_factor_loadings(R, method))
+        out += [omega_t, omega_obs]
+    return np.column_stack(out)
+
+
+def scale_omega(df, scales, method="minres", by=None, n_boot=1000, confidence=0.95,
+                random_state=42, n_jobs=None, max_memory_mb=256):
+    """
+    McDonald's omega total (over model-implied and over observed total
+    variance) of several scales from
+    one-factor fits, with percentile bootstrap CIs.
+
+    df: respondents x items
+    scales: {"scale_name": [item columns]}
+    method: "minres" or "ml"
+    by: optional column name (or Series aligned with df) to also report every
+        subsample separately, e.g. the country of each respondent
+    n_boot: bootstrap replicates (0 for point estimates only)
+
+    Scales share one covariance matrix per (sub)sample, as in
+    scale_reliability, and every bootstrap for every subsample runs on one
+    process pool. Two-item scales are just-identified only with equal
+    loadings, so read their omega with care.
+
+    Returns a DataFrame with one row per (subsample, scale).
+    """
+    samples = {"All": df}
+    if by is not None:
+        key = df[by] if isinstance(by, str) else pd.Series(by, index=df.index)
+        samples.update({sub: df[key == sub] for sub in key.dropna().unique()})
+
+    # datasets of complete cases, each with the scales it serves
+    datasets, members = {}, {}
+    for sub, data in samples.items():
+        all_items = list(dict.fromkeys(c for items in scales.values() for c in items))
+        if not data[all_items].isna().any().any():
+            groups = [(sub, list(scales), all_items)]
+        else:
+            groups = [((sub, name), [name], scales[name]) for name in scales]
+        for key, names, items in groups:
+            datasets[key] = data[items].dropna().to_numpy(dtype=np.float64)
+            members[key] = (sub, names, [[items.index(c) for c in scales[n]] for n in names])
+
+    rows = []
+    boot = {}
+    if n_boot:
+        statistics = {key: partial(_omega_stat, scale_index=m[2], method=method) for key, m in members.items()}
+        boot = bootstrap_covariance_stats(datasets, statistics, n_boot=n_boot, random_state=random_state,
+                                          n_jobs=n_jobs, max_memory_mb=max_memory_mb)
+
+    for key, (sub, names, scale_index) in members.items():
+        X = datasets[key]
+        point = _omega_stat(np.cov(X, rowvar=False, ddof=1)[None], scale_index, method)[0]
+        if key in boot:
+            low, high = percentile_ci(boot[key], confidence)
+        for j, name in enumerate(names):
+            row = {"Subsample": sub, "Group": name, "N": len(X), "N_Items": len(scale_index[j]),
+                   "Omega_Total": point[2 * j], "Omega_Total_ObservedVar": point[2 * j + 1]}
+            if key in boot:
+                row.update({"Omega_Total_CI_low": low[2 * j], "Omega_Total_CI_high": high[2 * j],
+                            "Omega_Total_ObservedVar_CI_low": low[2 * j + 1],
+                            "Omega_Total_ObservedVar_CI_high": high[2 * j + 1]})
+            rows.append(row)
+
+    out = pd.DataFrame(rows)
+    if by is None:
+        out = out.drop(columns="Subsample")
+    return out
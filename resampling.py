@@ -0,0 +1,118 @@
+import os
+from functools import partial
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+from shared_data import SharedArray, attach_array
+
+
+def multinomial_weights(rng, n, size):
+    """Bootstrap resamples as (size, n) counts: how often each row is drawn."""
+    return rng.multinomial(n, np.full(n, 1.0 / n), size=size).astype(np.float64)
+
+
+def weighted_covariances(X, W):
+    """
+    Covariance matrices of X (n x k) under each row of weights W (B x n),
+    i.e. of every bootstrap resample, without materialising the resamples.
+    """
+    n = W.sum(axis=1)
+    means = W @ X / n[:, None]
+    cross = np.einsum("bn,ni,nj->bij", W, X, X, optimize=True)
+    cov = cross - n[:, None, None] * means[:, :, None] * means[:, None, :]
+    return cov / (n - 1)[:, None, None]
+
+
+def chunk_size(n, k, n_boot, max_memory_mb=256):
+    """Replicates per chunk so one chunk's weighted data stays within max_memory_mb."""
+    per_replicate = max(1, n * max(k, 1) * 8)
+    return int(max(1, min(n_boot, 250, max_memory_mb * 2**20 // per_replicate)))
+
+
+# Worker state, set once per process by the pool initializer
+_WORKER = {}
+
+
+def _init_worker(specs, statistics):
+    data = {name: attach_array(spec) if isinstance(spec, tuple) else spec for name, spec in specs.items()}
+    _WORKER.update(data=data, statistics=statistics)
+
+
+def _run_chunk(task):
+    name, start, size, seed = task
+    X = _WORKER["data"][name]
+    rng = np.random.default_rng(seed)
+    return name, start, np.asarray(_WORKER["statistics"][name](X, multinomial_weights(rng, len(X), size)))
+
+
+def _covariance_statistic(X, W, statistic):
+    return statistic(weighted_covariances(X, W))
+
+
+def bootstrap_weighted_stats(datasets, statistics, n_boot=1000, random_state=42,
+                             n_jobs=None, max_memory_mb=256, chunk=None):
+    """
+    Bootstrap any statistic that can be computed from the data and a stack of
+    resample weights.
+
+    datasets: {name: n x k array} (complete cases)
+    statistics: {name: f(X, W) -> (B, m) array} where W is (B, n) resample
+        counts; must be picklable (module-level function or functools.partial)
+    chunk: replicates per task; by default as many as fit in max_memory_mb
+        (at most 250). Smaller chunks spread slow statistics over more workers.
+
+    Resamples are drawn as multinomial weights, so no resampled copy of the
+    data is ever built. All datasets share one process pool. Chunks have fixed
+    sizes and seeds spawned from random_state, so results do not depend on
+    n_jobs.
+
+    Returns {name: (n_boot, m) array}.
+    """
+    datasets = {name: np.ascontiguousarray(X, dtype=np.float64) for name, X in datasets.items()}
+    tasks = []
+    for (name, X), ss in zip(datasets.items(), np.random.SeedSequence(random_state).spawn(len(datasets))):
+        size = chunk or chunk_size(len(X), X.shape[1], n_boot, max_memory_mb)
+        starts = range(0, n_boot, size)
+        for start, child in zip(starts, ss.spawn(len(starts))):
+            tasks.append((name, start, min(size, n_boot - start), child))
+
+    parts = {name: {} for name in datasets}
+    n_jobs = n_jobs or os.cpu_count() or 1
+    if n_jobs == 1 or len(tasks) == 1:
+        _init_worker(datasets, statistics)
+        for t in tasks:
+            name, start, out = _run_chunk(t)
+            parts[name][start] = out
+    else:
+        shared = {name: SharedArray(X) for name, X in datasets.items()}
+        try:
+            initargs = ({name: s.spec for name, s in shared.items()}, statistics)
+            with ProcessPoolExecutor(max_workers=min(n_jobs, len(tasks)),
+                                     initializer=_init_worker, initargs=initargs) as pool:
+                for name, start, out in pool.map(_run_chunk, tasks):
+                    parts[name][start] = out
+        finally:
+            for s in shared.values():
+                s.close()
+
+    return {name: np.concatenate([p[s] for s in sorted(p)], axis=0) for name, p in parts.items()}
+
+
+def bootstrap_covariance_stats(datasets, statistics, n_boot=1000, random_state=42,
+                               n_jobs=None, max_memory_mb=256, chunk=None):
+    """
+    Bootstrap any statistic that only needs the covariance matrix.
+
+    statistics: {name: f(cov stack of shape (B, k, k)) -> (B, m) array}
+
+    Each chunk of resamples becomes one stack of weighted covariance matrices
+    (see bootstrap_weighted_stats for the other arguments).
+    """
+    wrapped = {name: partial(_covariance_statistic, statistic=f) for name, f in statistics.items()}
+    return bootstrap_weighted_stats(datasets, wrapped, n_boot, random_state, n_jobs, max_memory_mb, chunk)
+
+
+def percentile_ci(samples, confidence=0.95):
+    """Percentile interval of bootstrap samples along axis 0 (NaN replicates ignored)."""
+    alpha = (1 - confidence) / 2
+    return (np.nanpercentile(samples, 100 * alpha, axis=0),
+            np.nanpercentile(samples, 100 * (1 - alpha), axis=0))
@@ -0,0 +1,261 @@
+import heapq
+import os
+import re
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+import pandas as pd
+from reliability import item_covariance, cov_to_corr, one_factor_loadings, omega_from_loadings
+
+
+# Worker state, set once per process by the pool initializer
+_WORKER = {}
+
+
+def _init_worker(C, min_size, max_size, min_inter_item_r, min_alpha):
+    _WORKER.update(C=C, R=cov_to_corr(C), diag=np.diag(C).copy(), min_size=min_size,
+                   max_size=max_size, min_r=min_inter_item_r, min_alpha=min_alpha)
+
+
+def _search_from(task):
+    """
+    Depth-first search over all subsets that start with the items of
+    `prefix` (in index order); with expand=False only the prefix itself.
+
+    The subset's trace, total variance and row sums C @ 1_S are updated
+    incrementally when an item is added, so every subset is scored in O(k).
+    The minimum inter-item correlation can only fall as items are added, so
+    a branch below min_inter_item_r is cut with all its supersets.
+    """
+    prefix, expand = task
+    w = _WORKER
+    C, R, diag = w["C"], w["R"], w["diag"]
+    p = len(C)
+    min_size, max_size, min_r, min_alpha = w["min_size"], w["max_size"], w["min_r"], w["min_alpha"]
+    limit = max_size if expand else len(prefix)
+    masks, sizes, alphas, mean_rs, min_rs, itcs = [], [], [], [], [], []
+
+    def visit(members, mask, trace, total, row, low_r, sum_r):
+        k = len(members)
+        if k >= min_size:
+            alpha = k / (k - 1) * (1 - trace / total)
+            if min_alpha is None or alpha >= min_alpha:
+                idx = np.array(members)
+                rows, d = row[idx], diag[idx]
+                itc = (rows - d) / np.sqrt(d * (total - 2 * rows + d))
+                masks.append(mask)
+                sizes.append(k)
+                alphas.append(alpha)
+                mean_rs.append(sum_r / (k * (k - 1) / 2))
+                min_rs.append(low_r)
+                itcs.append(itc.mean())
+        if limit is not None and k >= limit:
+            return
+        for j in range(members[-1] + 1, p):
+            r_new = R[j, members]
+            low = min(low_r, r_new.min())
+            if min_r is not None and low < min_r:
+                continue
+            visit(members + [j], mask | (1 << j), trace + diag[j], total + 2 * row[j] + diag[j],
+                  row + C[:, j], low, sum_r + r_new.sum())
+
+    first = prefix[0]
+    state = ([first], 1 << first, diag[first], diag[first], C[:, first].copy(), np.inf, 0.0)
+    for j in prefix[1:]:
+        members, mask, trace, total, row, low_r, sum_r = state
+        r_new = R[j, members]
+        low = min(low_r, r_new.min())
+        if min_r is not None and low < min_r:
+            break  # the prefix itself is cut
+        state = (members + [j], mask | (1 << j), trace + diag[j], total + 2 * row[j] + diag[j],
+                 row + C[:, j], low, sum_r + r_new.sum())
+    else:
+        visit(*state)
+    return (np.array(masks, dtype=np.int64), np.array(sizes, dtype=np.int64), np.array(alphas),
+            np.array(mean_rs), np.array(min_rs), np.array(itcs))
+
+
+def _prefix_tasks(p, n_tasks, max_size=None):
+    """
+    (prefix, expand) search tasks of roughly equal size.
+
+    The subtree below a prefix whose last item is l holds 2^(p-1-l) subsets,
+    so splitting by first item alone leaves half the work in one task.
+    The largest subtree is split into its children plus a task scoring the
+    prefix alone until there are at least n_tasks tasks; largest come first.
+    """
+    heap = [(-2.0 ** (p - 1 - i), (i,)) for i in range(p)]
+    heapq.heapify(heap)
+    done = []
+    while heap and len(heap) + len(done) < n_tasks:
+        weight, prefix = heapq.heappop(heap)
+        if prefix[-1] == p - 1 or (max_size is not None and len(prefix) >= max_size):
+            done.append((weight, prefix, True))  # nothing (more) to split
+            continue
+        done.append((-1.0, prefix, False))
+        for j in range(prefix[-1] + 1, p):
+            heapq.heappush(heap, (-2.0 ** (p - 1 - j), prefix + (j,)))
+    tasks = done + [(weight, prefix, True) for weight, prefix in heap]
+    return [(prefix, expand) for _, prefix, expand in sorted(tasks, key=lambda t: t[0])]
+
+
+def _mask_items(mask, items):
+    return [items[i] for i in range(len(items)) if mask >> i & 1]
+
+
+def search_scales(df, items, min_size=2, max_size=None, min_inter_item_r=0.0, min_alpha=None,
+                  n_jobs=None):
+    """
+    Score every subset of `items` with at least min_size items.
+
+    The covariance matrix is computed once (complete cases over all items)
+    and each subset's alpha, inter-item and corrected item-total correlations
+    come from incremental updates along a depth-first search.
+
+    min_inter_item_r: skip subsets (and all their supersets) containing a
+        pair of items correlated below this; None to search everything
+    min_alpha: only keep subsets with at least this alpha
+    n_jobs: worker processes; the search is split into subtrees of similar
+        size (see _prefix_tasks)
+
+    Returns a DataFrame with one row per kept subset, best alpha first.
+    Items are limited to 62 (subsets are stored as 64-bit masks).
+    """
+    items = list(items)
+    if len(items) > 62:
+        raise ValueError("search_scales supports at most 62 items.")
+    cov, n = item_covariance(df, items)
+    C = cov.to_numpy()
+    initargs = (C, min_size, max_size, min_inter_item_r, min_alpha)
+
+    n_jobs = n_jobs or os.cpu_count() or 1
+    if n_jobs == 1:
+        _init_worker(*initargs)
+        parts = [_search_from(((f,), True)) for f in range(len(items))]
+    else:
+        tasks = _prefix_tasks(len(items), 8 * n_jobs, max_size)
+        with ProcessPoolExecutor(max_workers=min(n_jobs, len(tasks)),
+                                 initializer=_init_worker, initargs=initargs) as pool:
+            parts = list(pool.map(_search_from, tasks))
+
+    masks, sizes, alphas, mean_rs, min_rs, itcs = (np.concatenate(col) for col in zip(*parts))
+    out = pd.DataFrame({
+        "Mask": masks,
+        "Items": [", ".join(_mask_items(int(m), items)) for m in masks],
+        "N_Items": sizes,
+        "Cronbach_Alpha": alphas,
+        "Mean_Inter_Item_Corr": mean_rs,
+        "Min_Inter_Item_Corr": min_rs,
+        "Mean_Item-Total_Corr": itcs,
+    })
+    out.attrs.update(items=items, cov=C, n=n)
+    return out.sort_values(["Cronbach_Alpha", "N_Items"], ascending=False, ignore_index=True)
+
+
+def subset_omega(C, masks, method="minres"):
+    """
+    Omega total over model-implied and over observed variance of the subsets
+    in `masks` (bitmasks over the rows of C), fitted in one batch per subset size.
+    """
+    masks = np.asarray(masks, dtype=np.int64)
+    bits = (masks[:, None] >> np.arange(len(C))) & 1
+    omega_t, omega_obs = np.full(len(masks), np.nan), np.full(len(masks), np.nan)
+    sizes = bits.sum(axis=1)
+    for k in np.unique(sizes):
+        sel = np.flatnonzero(sizes == k)
+        idx = np.array([np.flatnonzero(bits[i]) for i in sel])
+        R = cov_to_corr(C[idx[:, :, None], idx[:, None, :]])
+        omega_t[sel], omega_obs[sel] = omega_from_loadings(R, one_factor_loadings(R, method))
+    return omega_t, omega_obs
+
+
+def rank_partitions(subsets, n_scales=None, max_unassigned=0, top=20):
+    """
+    Best ways to split the items into disjoint scales drawn from `subsets`
+    (the output of search_scales).
+
+    A partition is scored by its weakest scale (minimum alpha), ties broken
+    by mean alpha. Branch and bound: the lowest item not yet placed must go
+    into a scale containing it (or be left out, at most max_unassigned times);
+    its candidate scales are tried best alpha first and the branch stops as
+    soon as it cannot beat the current top-th partition.
+
+    n_scales: require exactly this many scales (None for any number)
+
+    Returns a DataFrame of the top partitions.
+    """
+    items = subsets.attrs["items"]
+    p = len(items)
+    masks = subsets["Mask"].to_numpy()
+    alphas = subsets["Cronbach_Alpha"].to_numpy()
+    by_item = [[] for _ in range(p)]
+    for i in np.argsort(-alphas, kind="stable"):
+        m = int(masks[i])
+        low = (m & -m).bit_length() - 1
+        # a scale can only be chosen when its lowest item is the next unplaced one
+        by_item[low].append((alphas[i], m))
+
+    best = []  # min-heap of (min_alpha, mean_alpha, scales, unassigned)
+    full = (1 << p) - 1
+
+    def bound():
+        return best[0][0] if len(best) >= top else -np.inf
+
+    def place(used, scales, low_alpha, sum_alpha, dropped):
+        if used == full:
+            if scales and (n_scales is None or len(scales) == n_scales):
+                entry = (low_alpha, sum_alpha / len(scales), tuple(scales), tuple(dropped))
+                if len(best) < top:
+                    heapq.heappush(best, entry)
+                elif entry[:2] > best[0][:2]:
+                    heapq.heapreplace(best, entry)
+            return
+        if n_scales is not None and len(scales) > n_scales:
+            return
+        free = ~used & full
+        i = (free & -free).bit_length() - 1
+        for alpha, m in by_item[i]:
+            if alpha < bound():
+                break
+            if m & used:
+                continue
+            place(used | m, scales + [m], min(low_alpha, alpha), sum_alpha + alpha, dropped)
+        if len(dropped) < max_unassigned:
+            place(used | (1 << i), scales, low_alpha, sum_alpha, dropped + [i])
+
+    place(0, [], np.inf, 0.0, [])
+    ranked = sorted(best, key=lambda e: e[:2], reverse=True)
+    return pd.DataFrame([{
+        "Rank": r + 1,
+        "N_Scales": len(scales),
+        "Min_Alpha": low,
+        "Mean_Alpha": mean,
+        "Scales": " | ".join("+".join(_mask_items(m, items)) for m in scales),
+        "Unassigned": ", ".join(items[i] for i in dropped),
+    } for r, (low, mean, scales, dropped) in enumerate(ranked)])
+
+
+def awareness_items(columns, first=8, last=29):
+    """Question columns Q<first>..Q<last> present in the data, in question order."""
+    found = [(int(m.group(1)), c) for c in columns if (m := re.fullmatch(r"Q(\d+)", c))]
+    return [c for q, c in sorted(found) if first <= q <= last]
+
+
+if __name__ == "__main__":
+    df = pd.read_csv("/Users/bazam/Library/CloudStorage/OneDrive-Personal/Documentos/academia/#PhD PLASTIC UNDERGROUND/7.1_excel/survey/data/database_awareness_questions.csv")
+    items = awareness_items(df.columns)
+    print(f"Searching all subsets of {len(items)} awareness items: {', '.join(items)}")
+
+    subsets = search_scales(df, items, min_size=2, min_inter_item_r=0.0)
+    print(f"✅ Scored {len(subsets)} candidate scales")
+
+    # omega only for the strongest candidates
+    top = subsets.head(1000).copy()
+    top["McDonald_Omega"], top["Omega_Total_ObservedVar"] = subset_omega(subsets.attrs["cov"], top["Mask"])
+    top.drop(columns="Mask").to_csv("scale_search_subsets.csv", index=False)
+    print(top.drop(columns="Mask").head(20).round(3))
+
+    partitions = rank_partitions(subsets, n_scales=3, max_unassigned=len(items) // 3)
+    partitions.to_csv("scale_search_partitions.csv", index=False)
+    print("\n=== Best partitions into 3 scales ===\n")
+    print(partitions.round(3).to_string(index=False))
+    print("\n✅ Saved scale_search_subsets.csv and scale_search_partitions.csv")
@@ -0,0 +1,49 @@
+from multiprocessing import shared_memory
+import numpy as np
+
+
+class SharedArray:
+    """
+    A numpy array placed in shared memory so pool workers can read it
+    without each receiving a pickled copy.
+
+    The owner creates it with SharedArray(array) and passes `spec` to the
+    workers, which call attach_array(spec). The owner must call close()
+    (or use it as a context manager) to free the segment.
+    """
+
+    def __init__(self, array):
+        array = np.ascontiguousarray(array)
+        self._shm = shared_memory.SharedMemory(create=True, size=max(1, array.nbytes))
+        self.array = np.ndarray(array.shape, dtype=array.dtype, buffer=self._shm.buf)
+        self.array[...] = array
+        self.spec = (self._shm.name, array.shape, array.dtype.str)
+
+    def close(self):
+        if self._shm is not None:
+            self.array = None
+            self._shm.close()
+            self._shm.unlink()
+            self._shm = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+# Segments attached in this (worker) process, kept open for its lifetime
+_ATTACHED = {}
+
+
+def attach_array(spec):
+    """Read-only view of a SharedArray from its spec (call inside workers)."""
+    name, shape, dtype = spec
+    if name not in _ATTACHED:
+        # pool workers share the owner's resource tracker, so attaching here
+        # does not make the segment outlive (or die before) the owner
+        _ATTACHED[name] = shared_memory.SharedMemory(name=name)
+    arr = np.ndarray(shape, dtype=np.dtype(dtype), buffer=_ATTACHED[name].buf)
+    arr.flags.writeable = False
+    return arr
@@ -1,39 +1,27 @@
-import pandas as pd
-from kmodes.kprototypes import KPrototypes
-from sklearn.metrics import silhouette_score
 import numpy as np
 import matplotlib.pyplot as plt
+from cluster_sweep import load_knowledge_data, kprototypes_sweep
+from mixed_silhouette import mixed_silhouette
 
-def cluster_knowledge_with_silhouette(data_csv, n_clusters=4):
+def cluster_knowledge_with_silhouette(data_csv, n_clusters=4, sweep=None, mode="exact", max_memory_mb=256):
     """
     Cluster respondents with K-Prototypes and calculate silhouette score.
+    sweep: optional result of kprototypes_sweep that already contains n_clusters
+    mode: "exact" or "sample" (stratified estimate with CI, for very large panels)
+    max_memory_mb: memory ceiling for the blockwise distance computation
     """
-    # Load dataset
-    df = pd.read_csv(data_csv, header=1)
-
-    respondent_ids = df["respondent_id"]
-    df = df.drop(columns=["respondent_id"])
-    df["Knowledge_score"] = df["Knowledge_score"].astype(float)
-
-    # Identify categorical vs numeric
-    categorical_cols = [i for i, col in enumerate(df.columns) if set(df[col].unique()) <= {0, 1}]
-    numeric_cols = [i for i, col in enumerate(df.columns) if i not in categorical_cols]
-
-    # Fit clustering
-    kproto = KPrototypes(n_clusters=n_clusters, random_state=42, init='Huang', n_init=10)
-    clusters = kproto.fit_predict(df, categorical=categorical_cols)
-
-    # Prepare data for silhouette: convert categorical to string safely
-    df_for_sil = df.copy()
-    for col_idx in categorical_cols:
-        col_name = df.columns[col_idx]
-        df_for_sil[col_name] = df_for_sil[col_name].astype(str)
-
-    # One-hot encode categoricals for distance calculation
-    df_encoded = pd.get_dummies(df_for_sil, drop_first=False)
-
-    # Compute silhouette score
-    sil_score = silhouette_score(df_encoded, clusters, metric="euclidean")
+    # Load dataset and identify categorical vs numeric
+    df, respondent_ids, categorical_cols = load_knowledge_data(data_csv)
+
+    # Fit clustering (or reuse the shared sweep)
+    if sweep is None:
+        sweep = kprototypes_sweep(df, categorical_cols, [n_clusters], n_init=10, random_state=42)
+    clusters = sweep[n_clusters]["labels"]
+
+    # Silhouette under the K-Prototypes dissimilarity, computed in row blocks
+    sil = mixed_silhouette(df, categorical_cols, clusters, sweep[n_clusters]["gamma"],
+                           mode=mode, max_memory_mb=max_memory_mb)
+    sil_score = sil["silhouette"]
     print(f"Silhouette Score for {n_clusters} clusters: {sil_score:.3f}")
 
     # Return results
@@ -43,16 +31,6 @@ def cluster_knowledge_with_silhouette(data_csv, n_clusters=4):
 
     return df_out, sil_score
 
-scores = {}
-for k in range(2, 7):  # test 2 to 6 clusters
-    _, sil = cluster_knowledge_with_silhouette("/Users/bazam/Library/CloudStorage/OneDrive-Personal/Documentos/academia/#PhD PLASTIC UNDERGROUND/7.1_excel/survey/data/knowledge_database_clean.csv", n_clusters=k)
-    scores[k] = sil
-
-print("\nSilhouette scores by number of clusters:")
-for k, s in scores.items():
-    print(f"{k} clusters: {s:.3f}")
-
-
 def plot_silhouette_scores(scores, output_file="silhouette_scores.png"):
     """
     Plot silhouette scores for different numbers of clusters.
@@ -83,9 +61,21 @@ def plot_silhouette_scores(scores, output_file="silhouette_scores.png"):
     plt.show()
     print(f"Silhouette score plot saved as {output_file}")
 
-scores = {}
-for k in range(2, 7):  # test k=2 to k=6
-    _, sil = cluster_knowledge_with_silhouette("/Users/bazam/Library/CloudStorage/OneDrive-Personal/Documentos/academia/#PhD PLASTIC UNDERGROUND/7.1_excel/survey/data/knowledge_database_clean.csv", n_clusters=k)
-    scores[k] = sil
+if __name__ == "__main__":
+    data_csv = "/Users/bazam/Library/CloudStorage/OneDrive-Personal/Documentos/academia/#PhD PLASTIC UNDERGROUND/7.1_excel/survey/data/knowledge_database_clean.csv"
+
+    # Fit k=2 to k=6 once, in parallel, and reuse the fits for every score
+    df, _, categorical_cols = load_knowledge_data(data_csv)
+    sweep = kprototypes_sweep(df, categorical_cols, range(2, 7), n_init=10, random_state=42)
+
+    # Blockwise K-Prototypes silhouette: no N x N matrix, memory stays under the ceiling
+    # (use mode="sample" on the pooled multi-country panel)
+    scores = {}
+    print("\nSilhouette scores by number of clusters:")
+    for k in range(2, 7):
+        sil = mixed_silhouette(df, categorical_cols, sweep[k]["labels"], sweep[k]["gamma"],
+                               mode="exact", max_memory_mb=256)
+        scores[k] = sil["silhouette"]
+        print(f"{k} clusters: {sil['silhouette']:.3f} (95% CI {sil['ci_low']:.3f}-{sil['ci_high']:.3f})")
 
-plot_silhouette_scores(scores)
+    plot_silhouette_scores(scores)
@@ -0,0 +1,230 @@
+import os
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+import pandas as pd
+from scipy.stats import chi2
+from statsmodels.stats.multitest import multipletests
+from bitmatrix import BitMatrix, popcount
+from eclat import eclat_counts
+from shared_data import SharedArray, attach_array
+from survey_schema import read_survey, decode_onehot, question_block, LIKERT_QUESTIONS
+from topk_rules import topk_rules
+
+# Demographic one-hot blocks decoded in demographic_analysis.py
+DEMOGRAPHIC_QUESTIONS = {"Q31": "gender", "Q32": "age", "Q33": "residence", "Q35": "education"}
+
+
+def demographic_groups(df, schema, questions=DEMOGRAPHIC_QUESTIONS):
+    """
+    {question: Series of option labels} for each demographic question, with
+    decode_onehot; respondents who ticked none of the options get NaN.
+    """
+    out = {}
+    for question in questions:
+        labels = decode_onehot(df, schema, question)
+        answered = question_block(df, schema, question).to_numpy().sum(axis=1) > 0
+        out[question] = labels.where(answered)
+    return out
+
+
+# Worker state, set once per process by the pool initializer
+_WORKER = {}
+
+
+def _init_worker(spec, n_rows, columns, settings):
+    bits = attach_array(spec) if isinstance(spec, tuple) else spec
+    _WORKER.update(bits=BitMatrix(bits, n_rows, columns), settings=settings)
+
+
+def _mine_group(task):
+    """Frequent itemsets and top rules (with their column index tuples) of one subgroup."""
+    question, label, where = task
+    bits, s = _WORKER["bits"], _WORKER["settings"]
+    itemsets, counts, n = eclat_counts(bits, s["min_support"], s["max_len"], where)
+    rules = topk_rules(bits, s["k"], s["min_support"], s["min_confidence"], s["min_lift"], s["max_len"], where)
+    rule_ids = rules.attrs["rule_ids"]
+    rules.insert(0, "Group", label)
+    rules.insert(0, "Question", question)
+    return question, label, n, len(itemsets), rules, rule_ids
+
+
+def _count_rules(task):
+    """(n, n_A, n_C, n_AC) of every rule within one subgroup."""
+    question, label, where, rules = task
+    bits = _WORKER["bits"]
+    n = int(popcount(where).sum(dtype=np.int64))
+
+    def count(items):
+        acc = where.copy()
+        for j in items:
+            acc &= bits.bits[j]
+        return int(popcount(acc).sum(dtype=np.int64))
+
+    memo = {}
+    out = np.empty((len(rules), 3), dtype=np.int64)
+    for r, (ante, cons) in enumerate(rules):
+        for c, items in enumerate((ante, cons, tuple(sorted(ante + cons)))):
+            if items not in memo:
+                memo[items] = count(items)
+            out[r, c] = memo[items]
+    return question, label, n, out
+
+
+def lift_heterogeneity(counts, min_count=5):
+    """
+    Cochran's Q test of equal lift of one rule across subgroups.
+
+    counts: (G, 4) array of (n, n_A, n_C, n_AC) per subgroup. By the delta
+    method on the 2x2 multinomial, log lift has variance
+        1/n_AC - 1/n_A - 1/n_C + 2 n_AC / (n_A n_C) - 1/n,
+    which is 1/n_AC - 1/n_A - 1/n_C + 1/n when A and C are independent.
+    Subgroups with n_AC < min_count or a non-positive variance are skipped.
+    Returns (Q, dof, p, I2, log lifts, variances) with NaN when fewer than
+    two subgroups are usable.
+    """
+    n, n_a, n_c, n_ac = np.asarray(counts, dtype=np.float64).T
+    with np.errstate(divide="ignore", invalid="ignore"):
+        log_lift = np.log(n_ac * n / (n_a * n_c))
+        var = 1 / n_ac - 1 / n_a - 1 / n_c + 2 * n_ac / (n_a * n_c) - 1 / n
+    ok = (n_ac >= min_count) & (var > 0)
+    if ok.sum() < 2:
+        return np.nan, 0, np.nan, np.nan, log_lift, var
+    w = 1 / var[ok]
+    pooled = (w * log_lift[ok]).sum() / w.sum()
+    q = float((w * (log_lift[ok] - pooled) ** 2).sum())
+    dof = int(ok.sum() - 1)
+    i2 = max(0.0, (q - dof) / q) if q > 0 else 0.0
+    return q, dof, float(chi2.sf(q, dof)), i2, log_lift, var
+
+
+def subgroup_mining(bits, groups, min_support=0.05, max_len=None, k=500, min_confidence=0.0, min_lift=1.0,
+                    min_group_size=30, min_count=5, alpha=0.05, n_jobs=None):
+    """
+    Frequent itemsets and rules mined separately in every subgroup of every
+    demographic question, and rules whose lift differs between subgroups.
+
+    bits: BitMatrix of the response options (demographic options can be
+        left in; rules are mined on whatever columns it holds)
+    groups: {question: Series of group labels aligned with the respondents},
+        e.g. demographic_groups(df, schema)
+
+    The packed bitsets go into shared memory once; every (question, group)
+    is mined on the process pool with eclat and topk_rules restricted to that
+    group's respondents. Then every rule found in any group of a question is
+    counted in all of its groups, and Cochran's Q on log lift tests whether
+    the lift is the same everywhere; p-values are BH-adjusted over all rules
+    of all questions.
+
+    Returns a dict with
+        "groups": respondents and frequent itemsets per subgroup
+        "rules": top rules of each subgroup
+        "heterogeneity": one row per (question, rule) with Q, p, BH p_adj,
+                         I2 and the lowest/highest subgroup lift
+        "by_group": long table of per-subgroup counts, lift and log-lift SE
+    """
+    settings = {"min_support": min_support, "max_len": max_len, "k": k, "min_confidence": min_confidence,
+                "min_lift": min_lift}
+    wheres = {}
+    for question, labels in groups.items():
+        values = np.asarray(labels, dtype=object)
+        for label in sorted(pd.Series(values).dropna().unique(), key=str):
+            mask = values == label
+            if mask.sum() >= min_group_size:
+                wheres[(question, label)] = bits.rows_bitset(mask)
+    mine_tasks = [(q, label, where) for (q, label), where in wheres.items()]
+
+    n_jobs = n_jobs or os.cpu_count() or 1
+    shared = None
+    if n_jobs == 1 or len(mine_tasks) <= 1:
+        _init_worker(bits.bits, bits.n_rows, bits.columns, settings)
+        run = lambda f, tasks: [f(t) for t in tasks]
+        pool = None
+    else:
+        shared = SharedArray(bits.bits)
+        pool = ProcessPoolExecutor(max_workers=min(n_jobs, len(mine_tasks)), initializer=_init_worker,
+                                   initargs=(shared.spec, bits.n_rows, bits.columns, settings))
+        run = lambda f, tasks: list(pool.map(f, tasks))
+    try:
+        mined = run(_mine_group, mine_tasks)
+
+        # every rule seen in any subgroup of a question, counted in all its subgroups
+        rule_sets = {}
+        for question, label, n, n_itemsets, rules, rule_ids in mined:
+            keys = rule_sets.setdefault(question, {})
+            for ids, a, c in zip(rule_ids, rules["Antecedent"], rules["Consequent"]):
+                keys.setdefault(ids, (a, c))
+        count_tasks = [(q, label, where, list(rule_sets.get(q, {})))
+                       for (q, label), where in wheres.items()]
+        counted = run(_count_rules, count_tasks)
+    finally:
+        if pool is not None:
+            pool.shutdown()
+        if shared is not None:
+            shared.close()
+
+    group_table = pd.DataFrame([{"Question": q, "Group": label, "N": n, "N_Itemsets": n_itemsets,
+                                 "N_Rules": len(rules)} for q, label, n, n_itemsets, rules, _ in mined])
+    all_rules = [r for *_, r, _ in mined if len(r)]
+    rules_table = pd.concat(all_rules, ignore_index=True) if all_rules else pd.DataFrame()
+
+    per_question = {}
+    for question, label, n, out in counted:
+        per_question.setdefault(question, []).append((label, n, out))
+    het_rows, long_rows = [], []
+    for question, parts in per_question.items():
+        names = list(rule_sets.get(question, {}).values())
+        for r, (ante, cons) in enumerate(names):
+            counts = np.array([[n, out[r, 0], out[r, 1], out[r, 2]] for _, n, out in parts])
+            q, dof, p, i2, log_lift, var = lift_heterogeneity(counts, min_count)
+            lifts = np.exp(log_lift)
+            usable = np.where((counts[:, 3] >= min_count) & (var > 0), lifts, np.nan)
+            labels = [label for label, _, _ in parts]
+            for label, c, lift, v in zip(labels, counts, lifts, var):
+                long_rows.append({"Question": question, "Group": label, "Antecedent": ante, "Consequent": cons,
+                                  "N": c[0], "N_A": c[1], "N_C": c[2], "N_AC": c[3], "Lift": lift,
+                                  "Log_Lift_SE": np.sqrt(v) if v > 0 else np.nan})
+            row = {"Question": question, "Antecedent": ante, "Consequent": cons,
+                   "N_Groups": int(np.isfinite(usable).sum()), "Cochran_Q": q, "DoF": dof, "p": p, "I2": i2,
+                   "Min_Lift_Group": "", "Min_Lift": np.nan, "Max_Lift_Group": "", "Max_Lift": np.nan}
+            if np.isfinite(usable).any():
+                lo, hi = int(np.nanargmin(usable)), int(np.nanargmax(usable))
+                row.update({"Min_Lift_Group": labels[lo], "Min_Lift": usable[lo],
+                            "Max_Lift_Group": labels[hi], "Max_Lift": usable[hi]})
+            het_rows.append(row)
+    het = pd.DataFrame(het_rows)
+    if len(het):
+        tested = het["p"].notna()
+        het["p_adj"] = np.nan
+        if tested.any():
+            het.loc[tested, "p_adj"] = multipletests(het.loc[tested, "p"], method="fdr_bh")[1]
+        het["Significant"] = het["p_adj"] < alpha
+        het = het.sort_values(["p_adj", "Cochran_Q"], ascending=[True, False], na_position="last")
+        het = het.reset_index(drop=True)
+    return {"groups": group_table, "rules": rules_table, "heterogeneity": het, "by_group": pd.DataFrame(long_rows)}
+
+
+if __name__ == "__main__":
+    file_path = "/Users/bazam/Library/CloudStorage/OneDrive-Personal/Documentos/academia/#PhD PLASTIC UNDERGROUND/7.1_excel/survey_transformed_3.csv"
+    df, schema = read_survey(file_path)
+    groups = demographic_groups(df, schema)
+
+    # response options only: the demographic blocks define the subgroups
+    demographic = set(schema.questions("demographic"))
+    positions = schema.binary_positions(exclude=LIKERT_QUESTIONS | demographic)
+    bits = BitMatrix.from_dense(df.iloc[:, positions].to_numpy(), schema.flat_names(positions), df.index)
+    del df
+
+    result = subgroup_mining(bits, groups, min_support=0.05, k=500)
+    print("\n=== Subgroups mined ===")
+    print(result["groups"].to_string(index=False))
+    het = result["heterogeneity"]
+    if het.empty:
+        print("No rules found in any subgroup, try lowering min_support.")
+    else:
+        significant = het[het["Significant"]]
+        print(f"\n{len(significant)} of {len(het)} rules have a lift that differs between subgroups (BH q < 0.05)")
+        print(significant.head(20).round(4).to_string(index=False))
+        result["rules"].to_csv("subgroup_rules.csv", index=False)
+        het.to_csv("subgroup_lift_heterogeneity.csv", index=False)
+        result["by_group"].to_csv("subgroup_lift_by_group.csv", index=False)
+        print("✅ Saved 'subgroup_rules.csv', 'subgroup_lift_heterogeneity.csv' and 'subgroup_lift_by_group.csv'")
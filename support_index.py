@@ -0,0 +1,226 @@
+import argparse
+import json
+import os
+import numpy as np
+from bitmatrix import BitMatrix, popcount
+from survey_schema import read_survey, LIKERT_QUESTIONS
+from survey_store import file_digest, CACHE_DIR_NAME
+
+# Bump when the index layout changes so stored indexes are rebuilt
+INDEX_VERSION = 1
+
+
+def index_path(csv_path, digest):
+    csv_path = os.path.abspath(csv_path)
+    stem = os.path.splitext(os.path.basename(csv_path))[0]
+    return os.path.join(os.path.dirname(csv_path), CACHE_DIR_NAME,
+                        f"{stem}.support_index.v{INDEX_VERSION}.{digest}.npz")
+
+
+class SupportIndex:
+    """
+    Respondent bitsets of every one-hot option of a survey, for ad-hoc
+    support / confidence / lift queries.
+
+    Pair counts are precomputed; every other count (larger itemsets, or any
+    itemset within a demographic filter) is one AND + popcount over the
+    packed bitsets and is memoised, and save() persists the memo with the
+    index so repeated questions are dictionary lookups in later sessions.
+
+    Items are flat column names (as in association1.py) or (question, option)
+    pairs. Filters are {question: option or [options]}: options of one
+    question are OR-ed, questions are AND-ed, e.g. {"Q33": "Italy"}.
+    """
+
+    def __init__(self, bits, options, pairs=None, cache=None, source_digest=None):
+        self.bits = bits
+        self.options = options  # question -> {option label: column index}
+        self.pairs = pairs if pairs is not None else bits.cooccurrence()
+        self.cache = dict(cache or {})  # (item ids, filter key) -> count
+        self.source_digest = source_digest
+        self._where = {}
+        self._names = {name: j for j, name in enumerate(bits.columns)}
+
+    # --- construction / persistence ---
+    @classmethod
+    def build(cls, csv_path):
+        """Index of the one-hot (non-Likert) columns of a three-row-header survey file."""
+        df, schema = read_survey(csv_path)
+        positions = schema.binary_positions(exclude=LIKERT_QUESTIONS)
+        bits = BitMatrix.from_dense(df.iloc[:, positions].to_numpy(), schema.flat_names(positions), df.index)
+        options = {}
+        for j, p in enumerate(positions):
+            _, question, option = schema.columns[p]
+            options.setdefault(question, {})[option] = j
+        return cls(bits, options, source_digest=file_digest(csv_path))
+
+    @classmethod
+    def open(cls, csv_path):
+        """Stored index of csv_path, rebuilt (and saved) when the file has changed."""
+        path = index_path(csv_path, file_digest(csv_path))
+        if os.path.exists(path):
+            try:
+                return cls.load(path)
+            except (OSError, ValueError, KeyError) as e:
+                print(f"⚠️ Rebuilding unreadable support index {path}: {e}")
+        index = cls.build(csv_path)
+        cache_dir = os.path.dirname(path)
+        stem = os.path.splitext(os.path.basename(csv_path))[0]
+        try:
+            # drop indexes of earlier versions of the same file
+            if os.path.isdir(cache_dir):
+                for name in os.listdir(cache_dir):
+                    if name.startswith(f"{stem}.support_index.") and name.endswith(".npz"):
+                        os.remove(os.path.join(cache_dir, name))
+            index.save(path)
+        except OSError as e:
+            print(f"⚠️ Could not save support index for {csv_path}: {e}")
+        return index
+
+    def save(self, path):
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        keys = [json.dumps([list(ids), [list(k) for k in where]]) for ids, where in self.cache]
+        meta = {"version": INDEX_VERSION, "n_rows": self.bits.n_rows, "columns": self.bits.columns,
+                "options": self.options, "source_digest": self.source_digest}
+        tmp = path + ".tmp.npz"
+        np.savez(tmp, bits=self.bits.bits, pairs=self.pairs, meta=json.dumps(meta),
+                 cache_keys=np.array(keys, dtype=str), cache_counts=np.array(list(self.cache.values()), dtype=np.int64))
+        os.replace(tmp, path)
+
+    @classmethod
+    def load(cls, path):
+        with np.load(path) as f:
+            meta = json.loads(str(f["meta"]))
+            if meta["version"] != INDEX_VERSION:
+                raise ValueError(f"index version {meta['version']} != {INDEX_VERSION}")
+            bits = BitMatrix(f["bits"], meta["n_rows"], meta["columns"])
+            cache = {}
+            for key, c in zip(f["cache_keys"], f["cache_counts"]):
+                ids, where = json.loads(str(key))
+                cache[(tuple(ids), tuple(tuple(k) for k in where))] = int(c)
+            return cls(bits, meta["options"], f["pairs"], cache, meta["source_digest"])
+
+    # --- resolving items and filters ---
+    def item_id(self, item):
+        if isinstance(item, tuple):
+            question, option = item
+            return self.options[question][self._option(question, option)]
+        return self._names[item]
+
+    def _option(self, question, option):
+        labels = self.options[question]
+        if option in labels:
+            return option
+        if f"{question}_{option}" in labels:
+            return f"{question}_{option}"
+        raise KeyError(f"{question} has no option {option!r}; options: {list(labels)}")
+
+    def _filter_key(self, where):
+        if not where:
+            return ()
+        key = []
+        for question, value in sorted(where.items()):
+            values = [value] if isinstance(value, str) else list(value)
+            key.append((question,) + tuple(sorted(self._option(question, v) for v in values)))
+        return tuple(key)
+
+    def _where_bits(self, key):
+        if key not in self._where:
+            acc = self.bits.all_rows()
+            for question, *labels in key:
+                any_of = np.zeros_like(acc)
+                for label in labels:
+                    any_of |= self.bits.bits[self.options[question][label]]
+                acc &= any_of
+            self._where[key] = acc
+        return self._where[key]
+
+    # --- counts ---
+    def _count(self, ids, key):
+        if not key and len(ids) <= 2:
+            if not ids:
+                return self.bits.n_rows
+            return int(self.pairs[ids[0], ids[-1]])
+        cache_key = (ids, key)
+        if cache_key not in self.cache:
+            acc = self._where_bits(key).copy() if key else self.bits.bits[ids[0]].copy()
+            for j in ids:
+                acc &= self.bits.bits[j]
+            self.cache[cache_key] = int(popcount(acc).sum(dtype=np.int64))
+        return self.cache[cache_key]
+
+    def count(self, items=(), where=None):
+        """Number of respondents (within the filter) who chose all of `items`."""
+        ids = tuple(sorted({self.item_id(i) for i in items}))
+        return self._count(ids, self._filter_key(where))
+
+    def support(self, items, where=None):
+        """Share of the (filtered) respondents who chose all of `items`."""
+        key = self._filter_key(where)
+        n = self._count((), key)
+        return self._count(tuple(sorted({self.item_id(i) for i in items})), key) / n if n else np.nan
+
+    def rule(self, antecedent, consequent, where=None):
+        """support, confidence and lift of antecedent -> consequent (within the filter)."""
+        key = self._filter_key(where)
+        a = tuple(sorted({self.item_id(i) for i in antecedent}))
+        c = tuple(sorted({self.item_id(i) for i in consequent}))
+        n, n_a, n_c = self._count((), key), self._count(a, key), self._count(c, key)
+        n_ac = self._count(tuple(sorted(set(a) | set(c))), key)
+        confidence = n_ac / n_a if n_a else np.nan
+        return {"n": n, "count": n_ac, "support": n_ac / n if n else np.nan, "confidence": confidence,
+                "lift": confidence * n / n_c if n_a and n_c else np.nan}
+
+    def confidence(self, antecedent, consequent, where=None):
+        return self.rule(antecedent, consequent, where)["confidence"]
+
+    def lift(self, antecedent, consequent, where=None):
+        return self.rule(antecedent, consequent, where)["lift"]
+
+
+def _parse_item(text):
+    # "Q33:Italy" -> ("Q33", "Italy"); anything else is a flat column name
+    return tuple(text.split(":", 1)) if ":" in text and not text.startswith(":") else text
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Support / confidence / lift of survey response combinations.")
+    parser.add_argument("csv", help="one-hot survey file with the three-row header (e.g. survey_transformed_3.csv)")
+    parser.add_argument("items", nargs="*", help="items (flat column names or QUESTION:OPTION); "
+                                                 "with --then these are the antecedent")
+    parser.add_argument("--then", nargs="+", default=None, help="consequent items of a rule")
+    parser.add_argument("--where", action="append", default=[], metavar="QUESTION=OPTION[,OPTION]",
+                        help="restrict to respondents with one of these options (repeatable)")
+    parser.add_argument("--options", metavar="QUESTION", help="list the options of a question and exit")
+    parser.add_argument("--rebuild", action="store_true", help="rebuild the stored index")
+    args = parser.parse_args(argv)
+
+    path = index_path(args.csv, file_digest(args.csv))
+    if args.rebuild and os.path.exists(path):
+        os.remove(path)
+    index = SupportIndex.open(args.csv)
+
+    if args.options:
+        for label in index.options[args.options]:
+            print(label)
+        return
+    where = {}
+    for spec in args.where:
+        question, values = spec.split("=", 1)
+        where[question] = values.split(",")
+    items = [_parse_item(i) for i in args.items]
+    n_cached = len(index.cache)
+    if args.then:
+        result = index.rule(items, [_parse_item(i) for i in args.then], where)
+        print(f"n = {result['n']}, count = {result['count']}")
+        print(f"support = {result['support']:.4f}, confidence = {result['confidence']:.4f}, "
+              f"lift = {result['lift']:.4f}")
+    else:
+        print(f"n = {index.count((), where)}, count = {index.count(items, where)}, "
+              f"support = {index.support(items, where):.4f}")
+    if len(index.cache) > n_cached:
+        index.save(path)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,166 @@
+import json
+import os
+import numpy as np
+import pandas as pd
+from survey_store import file_digest
+
+RESPONDENT_ID = ("respondent_id", "respondent_id", "respondent_id")
+
+# Likert questions are stored as a single numeric column, everything else is one-hot
+LIKERT_QUESTIONS = {"Q6", "Q15", "Q17", "Q26"}
+
+SCHEMA_VERSION = 1
+
+
+class SurveySchema:
+    """
+    Codebook for the three-row (section, question, option) survey header.
+
+    Maps section -> question -> option to column positions so a question's
+    columns can be taken as one block (a slice when the columns are
+    contiguous, which they are in the transformed survey files) instead of
+    scanning get_level_values on every lookup.
+    """
+
+    def __init__(self, columns, dtypes=None, source_digest=None):
+        self.columns = [tuple(str(x) for x in col) for col in columns]
+        self.dtypes = list(dtypes) if dtypes is not None else [None] * len(self.columns)
+        self.source_digest = source_digest
+
+        self._sections = {}   # section -> list of positions
+        self._questions = {}  # question -> list of positions
+        self._options = {}    # (question, option) -> position
+        self._section_of = {}  # question -> section
+        for pos, (section, question, option) in enumerate(self.columns):
+            self._sections.setdefault(section, []).append(pos)
+            self._questions.setdefault(question, []).append(pos)
+            self._options[(question, option)] = pos
+            self._section_of.setdefault(question, section)
+
+        self._blocks = {q: _as_block(p) for q, p in self._questions.items()}
+        self._section_blocks = {s: _as_block(p) for s, p in self._sections.items()}
+
+    # --- construction / persistence ---
+    @classmethod
+    def from_frame(cls, df, source_digest=None):
+        return cls(df.columns, [str(t) for t in df.dtypes], source_digest)
+
+    def to_dict(self):
+        return {
+            "version": SCHEMA_VERSION,
+            "source_digest": self.source_digest,
+            "columns": [list(c) for c in self.columns],
+            "dtypes": self.dtypes,
+        }
+
+    @classmethod
+    def from_dict(cls, d):
+        return cls([tuple(c) for c in d["columns"]], d.get("dtypes"), d.get("source_digest"))
+
+    def save(self, path):
+        with open(path, "w") as f:
+            json.dump(self.to_dict(), f, indent=1)
+
+    @classmethod
+    def load(cls, path):
+        with open(path) as f:
+            return cls.from_dict(json.load(f))
+
+    # --- lookups ---
+    def sections(self):
+        return list(self._sections)
+
+    def questions(self, section=None):
+        if section is None:
+            return list(self._questions)
+        return [q for q in self._questions if self._section_of[q] == section]
+
+    def options(self, question):
+        return [self.columns[p][2] for p in self._questions[question]]
+
+    def section_of(self, question):
+        return self._section_of[question]
+
+    def block(self, question):
+        """Column positions of a question (slice if contiguous, else index array)."""
+        return self._blocks[question]
+
+    def section_block(self, section):
+        return self._section_blocks[section]
+
+    def position(self, question, option):
+        return self._options[(question, option)]
+
+    def is_likert(self, question):
+        return question in LIKERT_QUESTIONS
+
+    def binary_positions(self, exclude=LIKERT_QUESTIONS):
+        """Positions of all one-hot (non-Likert) columns, in header order."""
+        return np.array([p for p, (_, q, _) in enumerate(self.columns) if q not in exclude], dtype=np.intp)
+
+    def flat_names(self, positions=None):
+        """'section_question_option' labels, as used for the mlxtend item names."""
+        cols = self.columns if positions is None else [self.columns[p] for p in positions]
+        return ["_".join(col).replace(" ", "_") for col in cols]
+
+
+def _as_block(positions):
+    positions = np.asarray(positions, dtype=np.intp)
+    if len(positions) and np.all(np.diff(positions) == 1):
+        return slice(int(positions[0]), int(positions[-1]) + 1)
+    return positions
+
+
+def schema_path(csv_path):
+    stem, _ = os.path.splitext(csv_path)
+    return stem + ".schema.json"
+
+
+def read_survey(csv_path):
+    """
+    Read a transformed survey file with its three-row header and return
+    (df, schema). respondent_id becomes the index, so schema positions refer
+    to df.columns. The schema is persisted next to the CSV and reused while
+    the file content is unchanged.
+    """
+    df = pd.read_csv(csv_path, header=[0, 1, 2])
+    if RESPONDENT_ID in df.columns:
+        df = df.set_index(RESPONDENT_ID)
+
+    digest = file_digest(csv_path)
+    path = schema_path(csv_path)
+    if os.path.exists(path):
+        try:
+            schema = SurveySchema.load(path)
+            if schema.source_digest == digest and schema.columns == [tuple(map(str, c)) for c in df.columns]:
+                return df, schema
+        except (OSError, ValueError, KeyError):
+            pass
+
+    schema = SurveySchema.from_frame(df, source_digest=digest)
+    try:
+        schema.save(path)
+    except OSError as e:
+        print(f"⚠️ Could not save schema next to {csv_path}: {e}")
+    return df, schema
+
+
+def question_block(df, schema, question):
+    """The columns of one question as a DataFrame (no boolean mask rebuild)."""
+    return df.iloc[:, schema.block(question)]
+
+
+def decode_onehot(df, schema, question):
+    """
+    Collapse a one-hot question block into a single categorical Series holding
+    the selected option (first selected option if several are ticked).
+    question can also be a list of questions, decoded together as one block.
+    """
+    if isinstance(question, str):
+        values = df.iloc[:, schema.block(question)].to_numpy()
+        labels = np.array(schema.options(question), dtype=object)
+        return pd.Series(labels[values.argmax(axis=1)], index=df.index, name=question)
+    positions = np.arange(df.shape[1])
+    values = df.iloc[:, np.concatenate([positions[schema.block(q)] for q in question])].to_numpy()
+    labels = np.array([option for q in question for option in schema.options(q)], dtype=object)
+    return pd.Series(labels[values.argmax(axis=1)], index=df.index, name=", ".join(question))
@@ -0,0 +1,129 @@
+import hashlib
+import json
+import os
+import pandas as pd
+import numpy as np
+
+# Columns that hold cluster assignments; stored as categoricals in the cache
+CLUSTER_COLUMNS = {"cluster", "Cluster", "cluster_label"}
+
+# Cache files live in a hidden folder next to each source CSV
+CACHE_DIR_NAME = ".survey_cache"
+
+# Bump when the typing rules below change so old caches are rebuilt
+CACHE_VERSION = 2
+
+
+def file_digest(path, chunk_size=1 << 20):
+    """
+    Return the BLAKE2b hex digest of a file's bytes.
+    The digest is memoised in the cache folder against (size, mtime) so an
+    unchanged file is not re-hashed on every run.
+    """
+    path = os.path.abspath(path)
+    stat = os.stat(path)
+    cache_dir = os.path.join(os.path.dirname(path), CACHE_DIR_NAME)
+    memo_path = os.path.join(cache_dir, os.path.basename(path) + ".digest.json")
+
+    if os.path.exists(memo_path):
+        try:
+            with open(memo_path) as f:
+                memo = json.load(f)
+            if memo.get("size") == stat.st_size and memo.get("mtime_ns") == stat.st_mtime_ns:
+                return memo["digest"]
+        except (OSError, ValueError, KeyError):
+            pass
+
+    h = hashlib.blake2b(digest_size=16)
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(chunk_size), b""):
+            h.update(block)
+    digest = h.hexdigest()
+
+    try:
+        os.makedirs(cache_dir, exist_ok=True)
+        with open(memo_path, "w") as f:
+            json.dump({"size": stat.st_size, "mtime_ns": stat.st_mtime_ns, "digest": digest}, f)
+    except OSError:
+        pass  # read-only data folder -> just re-hash next time
+    return digest
+
+
+def compact_dtypes(df):
+    """
+    Downcast a freshly parsed survey table:
+    - integer-valued item columns in 0..255 -> int16 (signed and wide enough
+      that differences and sums of items do not wrap around)
+    - cluster label columns -> categorical
+    - respondent_id and non-integer (normalised) scores are left untouched
+    """
+    df = df.copy()
+    for col in df.columns:
+        s = df[col]
+        if col in CLUSTER_COLUMNS:
+            df[col] = s.astype("category")
+            continue
+        if col == "respondent_id" or not pd.api.types.is_numeric_dtype(s) or s.isna().any():
+            continue
+        values = s.to_numpy()
+        if len(values) and np.all(values == np.round(values)) and values.min() >= 0 and values.max() <= 255:
+            df[col] = s.astype(np.int16)
+    return df
+
+
+def _cache_path(csv_path, digest):
+    csv_path = os.path.abspath(csv_path)
+    stem = os.path.splitext(os.path.basename(csv_path))[0]
+    cache_dir = os.path.join(os.path.dirname(csv_path), CACHE_DIR_NAME)
+    return os.path.join(cache_dir, f"{stem}.v{CACHE_VERSION}.{digest}.parquet")
+
+
+def load_table(csv_path, **read_csv_kwargs):
+    """
+    Load a survey CSV through the columnar cache.
+
+    On the first call (or whenever the CSV content changes) the file is parsed
+    with pd.read_csv, compacted with compact_dtypes and written to Parquet.
+    Later calls read the Parquet file directly. If pyarrow is not installed
+    the CSV is parsed as before.
+    """
+    try:
+        import pyarrow  # noqa: F401
+    except ImportError:
+        print("⚠️ pyarrow not installed — reading CSV without cache.")
+        return compact_dtypes(pd.read_csv(csv_path, **read_csv_kwargs))
+
+    digest = file_digest(csv_path)
+    key = digest
+    if read_csv_kwargs:
+        # different parse options must not share a cache entry
+        opts = json.dumps(read_csv_kwargs, sort_keys=True, default=str).encode()
+        key = f"{key}-{hashlib.blake2b(opts, digest_size=4).hexdigest()}"
+    cache_path = _cache_path(csv_path, key)
+
+    if os.path.exists(cache_path):
+        df = pd.read_parquet(cache_path)
+        # Parquet does not always round-trip integer categoricals
+        for col in CLUSTER_COLUMNS.intersection(df.columns):
+            if not isinstance(df[col].dtype, pd.CategoricalDtype):
+                df[col] = df[col].astype("category")
+        return df
+
+    df = compact_dtypes(pd.read_csv(csv_path, **read_csv_kwargs))
+    try:
+        cache_dir = os.path.dirname(cache_path)
+        os.makedirs(cache_dir, exist_ok=True)
+        stem = os.path.splitext(os.path.basename(csv_path))[0]
+        # drop caches of older versions or older contents of the same source before writing
+        # the new one; entries of the current file parsed with other read_csv options stay
+        current = f"{stem}.v{CACHE_VERSION}.{digest}"
+        for name in os.listdir(cache_dir):
+            if name.startswith(f"{stem}.v") and name.endswith(".parquet") \
+                    and not (name == current + ".parquet" or name.startswith(current + "-")):
+                os.remove(os.path.join(cache_dir, name))
+        tmp_path = cache_path + ".tmp"
+        df.to_parquet(tmp_path, index=False)
+        os.replace(tmp_path, cache_path)
+    except OSError as e:
+        print(f"⚠️ Could not write cache for {csv_path}: {e}")
+    return df
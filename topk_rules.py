@@ -0,0 +1,124 @@
+import heapq
+from functools import lru_cache
+from itertools import count as counter
+import numpy as np
+import pandas as pd
+from bitmatrix import popcount
+from eclat import _min_count, _row_counts
+
+
+def _next_consequents(passed):
+    """Apriori join: consequents one item larger whose every sub-consequent passed."""
+    passed_set = set(passed)
+    out = []
+    for a in range(len(passed)):
+        for b in range(a + 1, len(passed)):
+            x, y = passed[a], passed[b]
+            if x[:-1] != y[:-1]:
+                continue
+            cand = x + (y[-1],) if x[-1] < y[-1] else y + (x[-1],)
+            if all(cand[:i] + cand[i + 1:] in passed_set for i in range(len(cand))):
+                out.append(cand)
+    return out
+
+
+def topk_rules(bits, k=1000, min_support=0.05, min_confidence=0.0, min_lift=1.0, max_len=None, where=None,
+               cache_size=1 << 16):
+    """
+    The k association rules with the highest support (ties broken by
+    confidence, then lift) among rules with confidence >= min_confidence and
+    lift >= min_lift, mined straight from a BitMatrix.
+
+    The itemset search is Eclat with the most frequent items first. Once k
+    rules are held, the support of the weakest one becomes the minimum
+    support, so itemsets (and all their supersets) that cannot beat it are
+    never visited. Within an itemset, consequents grow apriori-style only
+    from rules that met min_confidence, since moving items from the
+    antecedent to the consequent can only lower confidence. Rules live in a
+    bounded heap and subset supports in an LRU cache of cache_size entries,
+    so memory depends on k, not on the number of rules.
+
+    Returns a DataFrame with Antecedent, Consequent, support, confidence and
+    lift (as written to frequent_itemsets_rules.csv), highest support first;
+    attrs["rule_ids"] holds the (antecedent, consequent) column index tuples
+    of the rows.
+    """
+    data = bits.bits if where is None else bits.bits & where
+    n = bits.n_rows if where is None else int(popcount(where).sum(dtype=np.int64))
+    columns = ["Antecedent", "Consequent", "support", "confidence", "lift"]
+    if n == 0 or k <= 0:
+        out = pd.DataFrame(columns=columns)
+        out.attrs["rule_ids"] = []
+        return out
+    min_count = _min_count(min_support, n)
+    max_len = max_len or bits.n_cols
+
+    heap = []  # (count, confidence, lift, seq, antecedent, consequent); weakest rule first
+    seq = counter()
+
+    def threshold():
+        return max(min_count, heap[0][0]) if len(heap) >= k else min_count
+
+    @lru_cache(maxsize=cache_size)
+    def support(items):
+        acc = data[items[0]].copy()
+        for j in items[1:]:
+            acc &= data[j]
+        return int(popcount(acc).sum(dtype=np.int64))
+
+    def add_rules(itemset, c_x):
+        consequents = [(j,) for j in itemset]
+        while consequents and len(consequents[0]) < len(itemset):
+            passed = []
+            for cons in consequents:
+                ante = tuple(j for j in itemset if j not in cons)
+                confidence = c_x / support(ante)
+                if confidence < min_confidence:
+                    continue  # every larger consequent of this one has lower confidence
+                passed.append(cons)
+                lift = confidence * n / support(cons)
+                if lift < min_lift:
+                    continue
+                rule = (c_x, confidence, lift, -next(seq), ante, cons)
+                if len(heap) < k:
+                    heapq.heappush(heap, rule)
+                elif rule[:3] > heap[0][:3]:
+                    heapq.heapreplace(heap, rule)
+            consequents = _next_consequents(passed)
+
+    singles = _row_counts(data)
+    # most frequent items first, so strong rules fill the heap early and raise the threshold
+    order = np.array(sorted(np.flatnonzero(singles >= min_count), key=lambda j: -singles[j]), dtype=np.intp)
+
+    def extend(prefix, items, tidsets):
+        if len(prefix) + 1 >= max_len:
+            return
+        for i in range(len(items) - 1):
+            joint = tidsets[i] & tidsets[i + 1:]
+            c = _row_counts(joint)
+            keep = c >= threshold()
+            if not keep.any():
+                continue
+            child = prefix + (int(items[i]),)
+            for j, c_x in zip(items[i + 1:][keep], c[keep]):
+                if c_x >= threshold():
+                    add_rules(tuple(sorted(child + (int(j),))), int(c_x))
+            # re-check: the threshold may have risen while adding rules
+            keep &= c >= threshold()
+            if keep.any():
+                extend(child, items[i + 1:][keep], joint[keep])
+
+    extend((), order, data[order])
+
+    names = bits.columns
+    ranked = sorted(heap, reverse=True)
+    rows = [{
+        "Antecedent": ", ".join(sorted(names[j] for j in ante)),
+        "Consequent": ", ".join(sorted(names[j] for j in cons)),
+        "support": c_x / n,
+        "confidence": confidence,
+        "lift": lift,
+    } for c_x, confidence, lift, _, ante, cons in ranked]
+    out = pd.DataFrame(rows, columns=columns)
+    out.attrs["rule_ids"] = [(ante, cons) for *_, ante, cons in ranked]
+    return out